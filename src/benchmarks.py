@@ -0,0 +1,241 @@
+"""
+Benchmark dei percorsi critici del modello con soglie di regressione.
+
+Uso:
+    python benchmarks.py run --size small --output bench_small.json
+    python benchmarks.py run --size production --repeat 3 --output bench_prod.json
+    python benchmarks.py compare baseline.json bench_small.json --threshold 10
+
+'compare' segnala ogni benchmark più lento della baseline oltre la soglia percentuale
+e termina con codice 1 se ne trova almeno uno.
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+from equations import CarbonCaptureModel, CineticModelEquation
+from model import AdvancedAnalysis, configure_plotting
+
+# Dimensioni dei problemi: punti per i percorsi vettoriali, chiamate per quelli scalari
+SIZES = {
+    'small': {'cycles': 1_000, 'times': 1_000, 'pairs': 100, 'points': 1_000,
+              'scalar_calls': 200, 'grid': 32},
+    'medium': {'cycles': 1_000, 'times': 10_000, 'pairs': 1_000, 'points': 100_000,
+               'scalar_calls': 1_000, 'grid': 316},
+    'production': {'cycles': 1_000, 'times': 10_000, 'pairs': 10_000, 'points': 1_000_000,
+                   'scalar_calls': 5_000, 'grid': 1_000},
+}
+
+
+def _time_call(function, repeat):
+    """Esegue function() repeat volte e restituisce i tempi in secondi"""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def _benchmark_cases(size):
+    """Costruisce i casi di benchmark come (nome, funzione, punti elaborati)"""
+    n = SIZES[size]
+    equations = CineticModelEquation()
+    capture_model = CarbonCaptureModel()
+    analytic_model = CarbonCaptureModel(integration_method='analytic', cache_size=0)
+    analysis = AdvancedAnalysis()
+    rng = np.random.default_rng(0)
+
+    cycles = np.arange(1, n['cycles'] + 1)
+    times = np.linspace(0, 30, n['times'])
+    scalar_cycles = rng.integers(1, 200, n['scalar_calls'])
+    scalar_times = rng.uniform(0, 30, n['scalar_calls'])
+
+    FCO2 = capture_model.params.mCO2_per_MW / capture_model.params.M_CO2_kg
+    F0_pairs = rng.uniform(0.001, 0.2, n['pairs']) * FCO2
+    FR_pairs = rng.uniform(1, 20, n['pairs']) * FCO2
+
+    Ws_points = rng.uniform(10, 500, n['points'])
+    F0_points = rng.choice([0.005, 0.01, 0.05], n['points'])
+    FR_points = rng.uniform(1, 20, n['points'])
+    scalar_conditions = [
+        {'Ws_per_MW': Ws, 'F0_FCO2_ratio': F0, 'FR_FCO2_ratio': FR}
+        for Ws, F0, FR in zip(Ws_points[:n['scalar_calls']], F0_points[:n['scalar_calls']],
+                              FR_points[:n['scalar_calls']])
+    ]
+
+    Ws_grid = np.linspace(10, 500, n['grid'])
+    FR_grid = np.linspace(1, 20, n['grid'])
+
+    return [
+        ('conversion_cycle_N', lambda: [equations.conversion_cycle_N(int(N), 'kinetic')
+                                        for N in scalar_cycles], n['scalar_calls']),
+        ('conversion_cycle_N_array', lambda: equations.conversion_cycle_N_array(cycles, 'kinetic'),
+         n['cycles']),
+        ('conversion_at_time_t', lambda: [equations.conversion_at_time_t(int(N), t)
+                                          for N, t in zip(scalar_cycles, scalar_times)], n['scalar_calls']),
+        ('conversion_at_time_t_surface', lambda: equations.conversion_at_time_t_array(
+            cycles[:, None], times[None, :]), n['cycles'] * n['times']),
+        ('average_maximum_conversion', lambda: analytic_model.average_maximum_conversion_array(
+            F0_pairs, FR_pairs), n['pairs']),
+        ('capture_efficiency_quad', lambda: [capture_model.capture_efficiency(c)
+                                             for c in scalar_conditions], n['scalar_calls']),
+        ('capture_efficiency_batch', lambda: analytic_model.capture_efficiency_batch(
+            Ws_points, F0_points, FR_points), n['points']),
+        ('parametric_study', lambda: analysis.parametric_study(Ws_points, 10, 0.01), n['points']),
+        ('optimization_study', lambda: analysis.optimization_study(Ws_grid, FR_grid, 0.01),
+         n['grid'] ** 2),
+    ]
+
+
+def measure_import_time(module='equations', repeat=3):
+    """Tempo (s) di import a freddo di un modulo in un nuovo interprete"""
+    src_dir = os.path.dirname(os.path.abspath(__file__))
+    code = ("import time; t = time.perf_counter(); import {0}; "
+            "print(time.perf_counter() - t)").format(module)
+    timings = []
+    for _ in range(repeat):
+        output = subprocess.run([sys.executable, '-c', code], cwd=src_dir, check=True,
+                                capture_output=True, text=True).stdout
+        timings.append(float(output.strip().splitlines()[-1]))
+    return timings
+
+
+def run_benchmarks(size='small', repeat=3, only=None):
+    """
+    Esegue i benchmark per la dimensione indicata.
+
+    Returns:
+        dict: {'meta': ..., 'benchmarks': {nome: statistiche}} serializzabile in JSON.
+    """
+    configure_plotting(enabled=False, show=False)
+    results = {}
+
+    cases = _benchmark_cases(size)
+    for name, function, points in cases:
+        if only and name not in only:
+            continue
+        function()  # riscaldamento (cache, import differiti)
+        timings = _time_call(function, repeat)
+        results[name] = _summary(timings, points)
+
+    for module in ('equations', 'model'):
+        name = f'import_{module}'
+        if only and name not in only:
+            continue
+        results[name] = _summary(measure_import_time(module, repeat), 1)
+
+    return {
+        'meta': {
+            'size': size,
+            'repeat': repeat,
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'platform': platform.platform(),
+        },
+        'benchmarks': results,
+    }
+
+
+def _summary(timings, points):
+    best = min(timings)
+    return {
+        'seconds_min': best,
+        'seconds_median': float(np.median(timings)),
+        'repeat': len(timings),
+        'points': points,
+        'points_per_second': points / best if best > 0 else float('inf'),
+    }
+
+
+def compare_results(baseline, current, threshold=10.0):
+    """
+    Confronta due risultati di run_benchmarks sul tempo minimo.
+
+    Returns:
+        list: Righe {'name', 'baseline', 'current', 'change_percent', 'regression'}
+            per i benchmark presenti in entrambi.
+    """
+    rows = []
+    for name, current_stats in current['benchmarks'].items():
+        baseline_stats = baseline['benchmarks'].get(name)
+        if baseline_stats is None:
+            continue
+        before = baseline_stats['seconds_min']
+        after = current_stats['seconds_min']
+        change = (after / before - 1) * 100 if before > 0 else 0.0
+        rows.append({
+            'name': name,
+            'baseline': before,
+            'current': after,
+            'change_percent': change,
+            'regression': change > threshold,
+        })
+    return rows
+
+
+def _print_results(results):
+    print(f"\n{'Benchmark':<32} {'min (s)':<12} {'mediana (s)':<12} {'punti/s':<14}")
+    print("-" * 72)
+    for name, stats in results['benchmarks'].items():
+        print(f"{name:<32} {stats['seconds_min']:<12.5f} {stats['seconds_median']:<12.5f} "
+              f"{stats['points_per_second']:<14.3g}")
+
+
+def _print_comparison(rows, threshold):
+    print(f"\n{'Benchmark':<32} {'baseline (s)':<14} {'attuale (s)':<14} {'variazione':<12}")
+    print("-" * 76)
+    for row in rows:
+        flag = '  REGRESSIONE' if row['regression'] else ''
+        print(f"{row['name']:<32} {row['baseline']:<14.5f} {row['current']:<14.5f} "
+              f"{row['change_percent']:+.1f}%{flag}")
+    regressions = sum(row['regression'] for row in rows)
+    print(f"\n{regressions} regressioni oltre la soglia del {threshold:.1f}%")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark del modello Calcium Looping")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = commands.add_parser('run', help="esegue i benchmark e salva i risultati in JSON")
+    run_parser.add_argument('--size', choices=tuple(SIZES), default='small')
+    run_parser.add_argument('--repeat', type=int, default=3)
+    run_parser.add_argument('--only', nargs='*', help="esegue solo i benchmark indicati")
+    run_parser.add_argument('--output', help="file JSON in cui salvare i risultati")
+
+    compare_parser = commands.add_parser('compare', help="confronta due file di risultati")
+    compare_parser.add_argument('baseline')
+    compare_parser.add_argument('current')
+    compare_parser.add_argument('--threshold', type=float, default=10.0,
+                                help="rallentamento percentuale oltre cui segnalare (default: 10)")
+
+    args = parser.parse_args(argv)
+
+    if args.command == 'run':
+        results = run_benchmarks(args.size, args.repeat, args.only)
+        _print_results(results)
+        if args.output:
+            with open(args.output, 'w', encoding='utf-8') as f:
+                json.dump(results, f, indent=2)
+            print(f"\n--> Risultati salvati in {args.output}")
+        return 0
+
+    with open(args.baseline, encoding='utf-8') as f:
+        baseline = json.load(f)
+    with open(args.current, encoding='utf-8') as f:
+        current = json.load(f)
+    rows = compare_results(baseline, current, args.threshold)
+    _print_comparison(rows, args.threshold)
+    return 1 if any(row['regression'] for row in rows) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
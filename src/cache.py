@@ -0,0 +1,66 @@
+"""
+Cache LRU limitata per i risultati del modello che dipendono solo dai parametri
+del sorbente (es. le conversioni medie massime dell'Equazione 11).
+"""
+
+from collections import OrderedDict
+
+
+class LRUCache:
+    """Cache LRU con dimensione massima, contatori di hit/miss e invalidazione"""
+
+    def __init__(self, maxsize=1024):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self._data = OrderedDict()
+        self._owner_key = None
+
+    def __len__(self):
+        return len(self._data)
+
+    def bind(self, owner_key):
+        """
+        Lega la cache a una chiave del proprietario (es. i valori di ModelParameters):
+        se la chiave cambia, il contenuto non è più valido e viene svuotato.
+        """
+        if owner_key != self._owner_key:
+            if self._data:
+                self.invalidate()
+            self._owner_key = owner_key
+
+    def get(self, key, default=None):
+        """Restituisce il valore associato a key aggiornandone la posizione LRU"""
+        try:
+            value = self._data[key]
+        except KeyError:
+            self.misses += 1
+            return default
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key, value):
+        """Inserisce un valore eliminando, se necessario, quello usato meno di recente"""
+        if self.maxsize <= 0:
+            return
+        self._data[key] = value
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def invalidate(self):
+        """Svuota la cache mantenendo i contatori"""
+        self._data.clear()
+        self.invalidations += 1
+
+    def info(self):
+        """Statistiche correnti della cache"""
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'size': len(self._data),
+            'maxsize': self.maxsize,
+            'invalidations': self.invalidations
+        }
@@ -242,15 +242,84 @@
 #             'flows': {'FCO2': FCO2, 'F0': F0, 'FR': FR}
 #         }
 
+import logging
+
 import numpy as np
-from scipy import integrate
 from parameters import ModelParameters
+from cache import LRUCache
+from incremental import DependencyGraph
+from instrumentation import Instrumentation
+from lazy_import import lazy_module
+
+# scipy serve solo per integration_method='quad': viene importato al primo utilizzo
+integrate = lazy_module('scipy.integrate')
+
+logger = logging.getLogger(__name__)
+
+# Metodi disponibili per gli integrali delle Equazioni (15) e (16)
+INTEGRATION_METHODS = ('quad', 'analytic')
+
+# Parametri di ModelParameters che capture_efficiency_batch accetta anche come array
+# di campioni (es. per la propagazione dell'incertezza)
+SAMPLED_PARAMETERS = ('j_kinetic', 'Xr_kinetic', 'X1_kinetic',
+                      'j_diffusion', 'Xr_diffusion', 'X1_diffusion', 't_kinetic', 'T0')
+
+# Efficienza massima restituita dal modello (Equazioni 21-23)
+MAX_EFFICIENCY = 0.99
+
+# Intervalli di ricerca di default di required_operating_condition per la variabile incognita
+INVERSE_BOUNDS = {
+    'Ws_per_MW': (1e-3, 1e5),
+    'FR_FCO2_ratio': (1e-3, 1e3),
+    'F0_FCO2_ratio': (1e-6, 1e2),
+}
+
+
+def _lower_gamma2(x):
+    """
+    Funzione gamma incompleta regolarizzata P(2, x) = 1 - e^(-x)·(1 + x),
+    cioè ∫[0 to x] s·e^(-s) ds. Per x piccolo si usa la serie di Taylor per
+    evitare la cancellazione numerica.
+    """
+    x = np.asarray(x, dtype=float)
+    direct = -np.expm1(-x) - x * np.exp(-x)
+
+    # P(2, x) = Σ[k>=2] (-1)^k (k-1) x^k / k!
+    series = np.zeros_like(x)
+    term = np.ones_like(x)
+    for k in range(1, 25):
+        term = term * (-x) / k
+        series = series + (k - 1) * term
+    return np.where(x < 0.5, series, direct)
+
+
+def _digamma(x):
+    """
+    Funzione digamma ψ(x) per x > 0: ricorrenza ψ(x) = ψ(x+1) - 1/x fino a x >= 10,
+    poi serie asintotica (errore ~1e-14).
+    """
+    x = np.array(x, dtype=float, copy=True)
+    result = np.zeros_like(x)
+    small = x < 10
+    while np.any(small):
+        result[small] -= 1 / x[small]
+        x[small] += 1
+        small = x < 10
+    inv = 1 / x
+    inv2 = inv * inv
+    return result + np.log(x) - 0.5 * inv - inv2 * (
+        1 / 12 - inv2 * (1 / 120 - inv2 * (1 / 252 - inv2 * (1 / 240 - inv2 / 132))))
+
 
 class CineticModelEquation:
     """Implementazione delle equazioni del modello cinetico"""
 
-    def __init__(self):
-        self.params = ModelParameters()
+    def __init__(self, params=None):
+        """
+        Args:
+            params (ModelParameters): Parametri del modello; default ModelParameters().
+        """
+        self.params = params if params is not None else ModelParameters()
 
     def conversion_cycle_N(self, N, phase='kinetic'):
         """
@@ -304,13 +373,159 @@ class CineticModelEquation:
             diffusion_contribution = (t_diffusion / max_t_diffusion) * XND
             return XNK + diffusion_contribution
 
+    def _deactivation_constants(self, phase):
+        """
+        Restituisce (k, Xr, X1) per la fase richiesta. `phase` può essere una
+        stringa o un array di stringhe: in quel caso le costanti sono array.
+        """
+        p = self.params
+        if isinstance(phase, str):
+            if phase == 'kinetic':
+                return p.j_kinetic, p.Xr_kinetic, p.X1_kinetic
+            return p.j_diffusion, p.Xr_diffusion, p.X1_diffusion
+
+        is_kinetic = np.asarray(phase) == 'kinetic'
+        k_deactivation = np.where(is_kinetic, p.j_kinetic, p.j_diffusion)
+        Xr = np.where(is_kinetic, p.Xr_kinetic, p.Xr_diffusion)
+        X1 = np.where(is_kinetic, p.X1_kinetic, p.X1_diffusion)
+        return k_deactivation, Xr, X1
+
+    def conversion_cycle_N_array(self, N, phase='kinetic'):
+        """
+        Versione vettoriale dell'Equazione (3).
+
+        Args:
+            N (array_like): Numeri di ciclo (interi >= 0).
+            phase (str o array_like): 'kinetic', 'diffusion' o un array di fasi
+                compatibile in broadcasting con N.
+
+        Returns:
+            np.ndarray: Conversioni massime, con la forma del broadcast di N e phase.
+        """
+        N = np.asarray(N, dtype=float)
+        k_deactivation, Xr, X1 = self._deactivation_constants(phase)
+
+        term_k = k_deactivation * (N - 1)
+        term_inv = 1 / (1 - (Xr / X1))
+        XN = X1 * ((Xr / X1) + 1 / (term_k + term_inv))
+
+        # Stessi casi particolari della versione scalare
+        XN = np.where(N == 1, X1, XN)
+        return np.where(N == 0, 0.0, XN)
+
+    def conversion_at_time_t_array(self, N, t_residence_min):
+        """
+        Versione vettoriale dell'Eq. (4): N e t_residence_min vengono combinati
+        in broadcasting (es. N[:, None] e t[None, :] danno una superficie cicli × tempi).
+        """
+        XNK = self.conversion_cycle_N_array(N, 'kinetic')
+        XND = self.conversion_cycle_N_array(N, 'diffusion')
+        kinetic_weight, diffusion_weight = self._phase_weights(t_residence_min)
+        return XNK * kinetic_weight + XND * diffusion_weight
+
+    def _phase_weights(self, t_residence_min):
+        """
+        Pesi di X_NK e X_ND nell'Eq. (4) al tempo t: solo fase cinetica (t/tK) fino a
+        tK, poi X_NK intero più la frazione di X_ND raggiunta, limitata al test TGA.
+        """
+        t = np.asarray(t_residence_min, dtype=float)
+        tK = self.params.t_kinetic
+        max_t_diffusion = self.params.T0 - tK
+        kinetic_weight = np.where(t <= tK, t / tK, 1.0)
+        diffusion_weight = np.where(t <= tK, 0.0, np.minimum(t - tK, max_t_diffusion) / max_t_diffusion)
+        return kinetic_weight, diffusion_weight
+
+    def conversion_surface(self, cycles, time_array):
+        """
+        Superficie della conversione dell'Eq. (4) su cicli × tempi: X_NK e X_ND sono
+        calcolati una sola volta per ciclo e combinati con i pesi delle fasi, calcolati
+        una sola volta per tempo.
+
+        Args:
+            cycles (array_like): Numeri di ciclo (1-D).
+            time_array (array_like): Tempi di residenza in minuti (1-D).
+
+        Returns:
+            dict: 'cycles', 'time' e 'XNK', 'XND' per ciclo, 'conversion' di forma
+                (len(cycles), len(time_array)).
+        """
+        cycles = np.asarray(cycles).ravel()
+        time_array = np.asarray(time_array, dtype=float).ravel()
+        XNK = self.conversion_cycle_N_array(cycles, 'kinetic')
+        XND = self.conversion_cycle_N_array(cycles, 'diffusion')
+        kinetic_weight, diffusion_weight = self._phase_weights(time_array)
+        conversion = np.multiply.outer(XNK, kinetic_weight)
+        conversion += np.multiply.outer(XND, diffusion_weight)
+        return {'cycles': cycles, 'time': time_array, 'XNK': XNK, 'XND': XND, 'conversion': conversion}
+
 
 class CarbonCaptureModel:
     """Modello per il calcolo dell'efficienza di cattura di CO2"""
     
-    def __init__(self):
-        self.params = ModelParameters()
-        self.equations = CineticModelEquation()
+    def __init__(self, integration_method='quad', cache_size=1024, instrumentation=None, params=None):
+        """
+        Args:
+            integration_method (str): 'quad' integra numericamente le Eq. (15) e (16)
+                con scipy, 'analytic' usa le primitive esatte (stesso risultato a ~1e-12).
+            cache_size (int): Numero massimo di frazioni di makeup F0/(F0+FR) di cui
+                conservare le conversioni medie massime (0 disattiva la cache).
+            instrumentation (Instrumentation): Raccolta di tempi e contatori; di default
+                una strumentazione disattivata (vedi enable_instrumentation).
+            params (ModelParameters): Parametri del modello, condivisi con le equazioni
+                cinetiche; default ModelParameters().
+        """
+        if integration_method not in INTEGRATION_METHODS:
+            raise ValueError(f"Metodo di integrazione non valido: {integration_method!r} "
+                             f"(valori ammessi: {', '.join(INTEGRATION_METHODS)})")
+        self.equations = CineticModelEquation(params)
+        self.integration_method = integration_method
+        # Errore assoluto massimo ammesso sulla somma esatta dell'Equazione (11)
+        self.conversion_tolerance = 1e-12
+        # Xmax_ave_K e Xmax_ave_D dipendono solo da F0/(F0+FR) e dai parametri del sorbente
+        self.conversion_cache = LRUCache(cache_size)
+        self.instrumentation = instrumentation if instrumentation is not None else Instrumentation()
+        # Grafo delle fasi di capture_efficiency_incremental, creato al primo utilizzo
+        self._stage_graph = None
+        # Uscite di fase più grandi di così non vengono conservate tra una valutazione e l'altra
+        self.incremental_retain_points = 1 << 20
+
+    def __getstate__(self):
+        # Il grafo delle fasi contiene funzioni locali, non serializzabili: i processi del
+        # pool (e le copie con pickle) lo ricostruiscono al primo capture_efficiency_incremental
+        state = self.__dict__.copy()
+        state['_stage_graph'] = None
+        return state
+
+    @property
+    def params(self):
+        """Parametri del modello (gli stessi delle equazioni cinetiche)"""
+        return self.equations.params
+
+    @params.setter
+    def params(self, params):
+        self.equations.params = params
+
+    def _sorbent_key(self):
+        """
+        Valori di ModelParameters da cui dipende l'Equazione (11): se cambiano, le
+        conversioni in cache non sono più valide.
+        """
+        p = self.equations.params
+        return (p.j_kinetic, p.Xr_kinetic, p.X1_kinetic,
+                p.j_diffusion, p.Xr_diffusion, p.X1_diffusion)
+
+    def invalidate_conversion_cache(self):
+        """Svuota la cache delle conversioni medie massime (es. dopo aver modificato i parametri)"""
+        self.conversion_cache.invalidate()
+
+    def cache_info(self):
+        """Statistiche della cache delle conversioni medie massime"""
+        return self.conversion_cache.info()
+
+    def enable_instrumentation(self, enabled=True):
+        """Attiva (o disattiva) la raccolta di tempi per fase e contatori"""
+        self.instrumentation.enabled = enabled
+        return self.instrumentation
     
     def get_operating_flows(self, F0_FCO2_ratio, FR_FCO2_ratio):
         """
@@ -335,26 +550,352 @@ class CarbonCaptureModel:
         
         return (F0 * (FR**(N - 1))) / ((F0 + FR)**N)
     
-    def average_maximum_conversion(self, F0, FR, max_cycles=100):
+    def average_maximum_conversion(self, F0, FR, max_cycles=None):
         """
         Calcola la conversione media massima della popolazione di particelle 
         nel reattore (Equazione 11).
+
+        Con max_cycles=None la somma è estesa a infiniti cicli (vedi
+        average_maximum_conversion_exact); con un intero si usa la somma troncata
+        a max_cycles cicli e a rho_N >= 1e-9.
         """
-        total_X_kinetic = 0
-        total_X_diffusion = 0
-        
-        for N in range(1, max_cycles + 1):
-            rho_N = self.particle_fraction_cycle_N(N, F0, FR)
-            
-            if rho_N < 1e-9: break
-                
-            XNK = self.equations.conversion_cycle_N(N, 'kinetic')
-            XND = self.equations.conversion_cycle_N(N, 'diffusion')
-            
-            total_X_kinetic += rho_N * XNK
-            total_X_diffusion += rho_N * XND
-        
-        return total_X_kinetic, total_X_diffusion
+        if F0 + FR == 0:
+            return 0, 0
+
+        Xmax_ave_K, Xmax_ave_D = self.average_maximum_conversion_array(F0, FR, max_cycles)
+        return float(Xmax_ave_K), float(Xmax_ave_D)
+
+    def average_maximum_conversion_array(self, F0, FR, max_cycles=None, samples=None):
+        """
+        Versione vettoriale dell'Equazione (11) per array (in broadcasting) di F0 e FR.
+        Le frazioni dell'Eq. (9) dipendono solo da F0/(F0 + FR), quindi ogni
+        rapporto distinto viene calcolato una sola volta.
+
+        Con samples (dizionario di array di parametri del sorbente, vedi
+        capture_efficiency_batch) la somma esatta è valutata punto per punto, senza cache.
+
+        Returns:
+            tuple: (Xmax_ave_K, Xmax_ave_D) con la forma del broadcast di F0 e FR.
+        """
+        makeup_fraction = self._makeup_fraction(F0, FR)
+
+        if samples:
+            if max_cycles is not None:
+                raise ValueError("I parametri campionati richiedono la somma esatta (max_cycles=None)")
+            arrays = np.broadcast_arrays(makeup_fraction, *samples.values())
+            shape = arrays[0].shape
+            flat_samples = {name: values.ravel() for name, values in zip(samples, arrays[1:])}
+            Xmax_ave_K, Xmax_ave_D, _ = self._population_sum_exact(
+                arrays[0].ravel(), self.conversion_tolerance, flat_samples)
+            return Xmax_ave_K.reshape(shape), Xmax_ave_D.reshape(shape)
+
+        shape = makeup_fraction.shape
+
+        unique_fractions, inverse = np.unique(makeup_fraction.ravel(), return_inverse=True)
+        inverse = inverse.reshape(-1)
+
+        Xmax_ave_K, Xmax_ave_D = self._cached_population_sum(unique_fractions, max_cycles)
+        return Xmax_ave_K[inverse].reshape(shape), Xmax_ave_D[inverse].reshape(shape)
+
+    def _cached_population_sum(self, makeup_fraction, max_cycles):
+        """
+        Equazione (11) per un array di frazioni di makeup distinte, servendo dalla
+        cache LRU quelle già calcolate con gli stessi parametri e la stessa modalità.
+        """
+        cache = self.conversion_cache
+        # Oltre la capienza della cache conviene calcolare tutto in blocco
+        use_cache = 0 < len(makeup_fraction) <= cache.maxsize
+        if use_cache:
+            cache.bind(self._sorbent_key())
+            mode = max_cycles if max_cycles is not None else ('exact', self.conversion_tolerance)
+            cached = [cache.get((fraction, mode)) for fraction in makeup_fraction.tolist()]
+            missing = np.array([i for i, value in enumerate(cached) if value is None], dtype=int)
+            self.instrumentation.count('cache_hits', len(cached) - len(missing))
+            self.instrumentation.count('cache_misses', len(missing))
+        else:
+            missing = np.arange(len(makeup_fraction))
+
+        if max_cycles is None:
+            new_K, new_D, _ = self._population_sum_exact(
+                makeup_fraction[missing], self.conversion_tolerance)
+        else:
+            new_K, new_D = self._population_sum_truncated(makeup_fraction[missing], max_cycles)
+
+        if not use_cache:
+            return new_K, new_D
+
+        Xmax_ave_K = np.empty(len(makeup_fraction))
+        Xmax_ave_D = np.empty(len(makeup_fraction))
+        for i, value in enumerate(cached):
+            if value is not None:
+                Xmax_ave_K[i], Xmax_ave_D[i] = value
+        Xmax_ave_K[missing] = new_K
+        Xmax_ave_D[missing] = new_D
+        for i, XK, XD in zip(missing.tolist(), new_K.tolist(), new_D.tolist()):
+            cache.put((float(makeup_fraction[i]), mode), (XK, XD))
+        return Xmax_ave_K, Xmax_ave_D
+
+    def average_maximum_conversion_exact(self, F0, FR, tol=None):
+        """
+        Equazione (11) sommata su infiniti cicli con errore garantito.
+
+        Poiché X_N = Xr + X1 / (k(N-1) + c) con c = 1/(1 - Xr/X1) e rho_N = p·q^(N-1)
+        (p = F0/(F0+FR), q = 1 - p), vale
+            Σ rho_N·X_N = Xr + X1·p·S,   S = Σ[n>=0] q^n / (kn + c).
+        Per p > 0.5 la serie converge rapidamente ed è sommata direttamente; per
+        p <= 0.5 (makeup basso, dove servirebbero ~1/p termini) S = 2F1(1, a; a+1; q)/(k·a)
+        con a = c/k viene sviluppata attorno a q = 1, in potenze di p
+        (Abramowitz-Stegun 15.3.10). In entrambi i casi la somma si ferma quando
+        una maggiorazione della coda è inferiore a tol.
+
+        Args:
+            F0, FR (array_like): Flussi di makeup e ricircolo (mol/s), in broadcasting.
+            tol (float): Errore assoluto massimo; default self.conversion_tolerance.
+
+        Returns:
+            tuple: (Xmax_ave_K, Xmax_ave_D, error_bound) come array.
+        """
+        if tol is None:
+            tol = self.conversion_tolerance
+        makeup_fraction = self._makeup_fraction(F0, FR)
+        shape = makeup_fraction.shape
+
+        unique_fractions, inverse = np.unique(makeup_fraction.ravel(), return_inverse=True)
+        inverse = inverse.reshape(-1)
+        results = self._population_sum_exact(unique_fractions, tol)
+        return tuple(values[inverse].reshape(shape) for values in results)
+
+    def _makeup_fraction(self, F0, FR):
+        """
+        Frazione di makeup p = F0/(F0 + FR); vale 0 se F0 + FR = 0, caso in cui
+        l'Equazione (11) restituisce conversione nulla.
+        """
+        F0, FR = np.broadcast_arrays(np.asarray(F0, dtype=float), np.asarray(FR, dtype=float))
+        total = F0 + FR
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return np.where(total == 0, 0.0, F0 / total)
+
+    def _population_sum_truncated(self, makeup_fraction, max_cycles, chunk_size=4096):
+        """
+        Somma dell'Equazione (11) sui primi max_cycles cicli, fermandosi al primo
+        rho_N < 1e-9 (comportamento storico del modello).
+        """
+        cycles = np.arange(1, max_cycles + 1)
+        XNK = self.equations.conversion_cycle_N_array(cycles, 'kinetic')
+        XND = self.equations.conversion_cycle_N_array(cycles, 'diffusion')
+
+        Xmax_ave_K = np.empty(len(makeup_fraction))
+        Xmax_ave_D = np.empty(len(makeup_fraction))
+        for start in range(0, len(makeup_fraction), chunk_size):
+            p = makeup_fraction[start:start + chunk_size, None]
+            rho = p * np.power(1 - p, cycles - 1)
+
+            # Le frazioni decrescono con N: si sommano i cicli fino al primo rho_N < 1e-9
+            rho = rho * np.logical_and.accumulate(rho >= 1e-9, axis=1)
+
+            Xmax_ave_K[start:start + chunk_size] = rho @ XNK
+            Xmax_ave_D[start:start + chunk_size] = rho @ XND
+            if self.instrumentation.enabled:
+                self.instrumentation.observe('cycles_reached', int(np.count_nonzero(rho, axis=1).max()))
+
+        return Xmax_ave_K, Xmax_ave_D
+
+    def _population_sum_exact(self, makeup_fraction, tol, samples=None):
+        """
+        Somma esatta dell'Equazione (11) per un array 1-D di frazioni di makeup
+        (vedi average_maximum_conversion_exact), eventualmente con parametri del
+        sorbente campionati (array 1-D della stessa lunghezza).
+
+        La serie in potenze di p è usata solo dove è numericamente stabile (p <= 0.5 e
+        p·a < 1 per entrambe le fasi) e se la sua maggiorazione, coda più arrotondamento,
+        non supera tol; negli altri punti si usa la somma diretta a blocchi.
+
+        Returns:
+            tuple: (Xmax_ave_K, Xmax_ave_D, error_bound); NaN (con error_bound infinito)
+                per frazioni fuori da [0, 1], per parametri del sorbente non ammissibili
+                (serve k > 0 e 0 <= Xr < X1) e per le somme che non raggiungono tol.
+        """
+        p = np.asarray(makeup_fraction, dtype=float)
+        phases = [tuple(np.broadcast_to(value, p.shape) for value in constants)
+                  for constants in self._sorbent_phases(samples)]
+        admissible = (p >= 0) & (p <= 1)
+        for k_deactivation, Xr, X1, _ in phases:
+            admissible &= np.isfinite(k_deactivation) & (k_deactivation > 0) & (Xr >= 0) & (Xr < X1)
+            admissible &= np.isfinite(X1)
+
+        Xmax_ave_K = np.where((p == 0) & admissible, 0.0, np.nan)
+        Xmax_ave_D = Xmax_ave_K.copy()
+        error_bound = np.where(np.isnan(Xmax_ave_K), np.inf, 0.0)
+
+        def masked_phases(mask):
+            return [tuple(value[mask] for value in constants) for constants in phases]
+
+        # 1. Serie in potenze di p dove i suoi termini non si cancellano
+        with np.errstate(divide='ignore', invalid='ignore'):
+            a_max = np.maximum(phases[0][3] / phases[0][0], phases[1][3] / phases[1][0])
+        series = admissible & (p > 0) & (p <= 0.5) & (p * a_max < 1)
+        if np.any(series):
+            index = np.flatnonzero(series)
+            K, D, bound = self._population_sum_series(p[series], tol, masked_phases(series))
+            accepted = bound <= tol
+            Xmax_ave_K[index[accepted]] = K[accepted]
+            Xmax_ave_D[index[accepted]] = D[accepted]
+            error_bound[index[accepted]] = bound[accepted]
+            series[index[~accepted]] = False
+
+        # 2. Somma diretta a blocchi per tutti gli altri punti
+        direct = admissible & (p > 0) & ~series
+        if np.any(direct):
+            Xmax_ave_K[direct], Xmax_ave_D[direct], error_bound[direct] = self._population_sum_direct(
+                p[direct], tol, masked_phases(direct))
+
+        return Xmax_ave_K, Xmax_ave_D, error_bound
+
+    def _sampled_value(self, name, samples):
+        """Valore del parametro `name`: l'array di campioni se presente, altrimenti quello di params"""
+        if samples and name in samples:
+            return samples[name]
+        return getattr(self.params, name)
+
+    def parameter_validity(self, samples=None):
+        """
+        Maschera dei valori ammissibili dei parametri (campionati o di params): per
+        entrambe le fasi k > 0 e 0 <= Xr < X1, inoltre t_kinetic > 0 e T0 > t_kinetic,
+        tutti finiti. Ha la forma del broadcast dei campioni (0-d senza campioni).
+        """
+        def value(name):
+            return np.asarray(self._sampled_value(name, samples), dtype=float)
+
+        valid = np.ones((), dtype=bool)
+        for phase in ('kinetic', 'diffusion'):
+            k_deactivation, Xr, X1 = (value(f'{name}_{phase}') for name in ('j', 'Xr', 'X1'))
+            valid = valid & np.isfinite(k_deactivation) & (k_deactivation > 0)
+            valid = valid & np.isfinite(X1) & (Xr >= 0) & (Xr < X1)
+        t_kinetic, T0 = value('t_kinetic'), value('T0')
+        return valid & np.isfinite(T0) & (t_kinetic > 0) & (T0 > t_kinetic)
+
+    def _sorbent_phases(self, samples=None):
+        """Costanti (k, Xr, X1, c) dell'Equazione (3) per le fasi cinetica e diffusiva"""
+        phases = []
+        for phase in ('kinetic', 'diffusion'):
+            k_deactivation, Xr, X1 = (self._sampled_value(f'{name}_{phase}', samples)
+                                      for name in ('j', 'Xr', 'X1'))
+            # X1 = 0 o Xr = X1 danno c non finito: i punti vengono esclusi da _population_sum_exact
+            with np.errstate(divide='ignore', invalid='ignore'):
+                c = 1 / (1 - np.divide(Xr, X1))
+            phases.append((k_deactivation, Xr, X1, c))
+        return phases
+
+    def _population_sum_series(self, p, tol, phases, max_terms=200):
+        """
+        S = Σ q^n/(kn + c) per 0 < p <= 0.5 e p·a < 1 tramite lo sviluppo logaritmico di
+        2F1(1, a; a+1; 1 - p) attorno a p = 0:
+            S = (1/k)·Σ[n>=0] (a)_n/n!·p^n·[ψ(n+1) - ψ(a+n) - ln p].
+        I coefficienti (a)_n/n!·p^n decrescono almeno con rapporto
+        r = p·max(1, (a+n)/(n+1)) < 1 e la parentesi è limitata da |ln p| + |ψ(n+1) - ψ(a+n)|,
+        da cui la maggiorazione geometrica della coda. Alla maggiorazione si somma quella
+        dell'arrotondamento, proporzionale alla somma dei valori assoluti dei termini
+        (grande quando termini grandi di segno opposto si cancellano).
+
+        Returns:
+            tuple: (Xmax_ave_K, Xmax_ave_D, error_bound); error_bound > tol nei punti da
+                calcolare in altro modo (convergenza non raggiunta in max_terms termini).
+        """
+        eps = np.finfo(float).eps
+        log_p = np.log(p)
+        results = []
+        bounds = []
+        for k_deactivation, Xr, X1, c in phases:
+            a = c / k_deactivation
+            scale = X1 * p / k_deactivation
+            coef = np.ones_like(p)
+            psi_difference = -np.euler_gamma - _digamma(a)    # ψ(1) - ψ(a)
+            term = coef * (psi_difference - log_p)
+            total = term
+            magnitude = np.abs(term)
+            for n in range(1, max_terms + 1):
+                coef = coef * (a + n - 1) / n * p
+                psi_difference = psi_difference + 1 / n - 1 / (a + n - 1)
+                term = coef * (psi_difference - log_p)
+                total = total + term
+                magnitude = magnitude + np.abs(term)
+
+                ratio = p * np.maximum(1, (a + n) / (n + 1))
+                tail = (coef * ratio * (np.abs(log_p) + np.abs(psi_difference))
+                        / (1 - ratio) * scale)
+                if np.all(tail <= tol):
+                    break
+            self.instrumentation.observe('cycles_reached', n + 1)
+
+            result = Xr + scale * total
+            rounding = 4 * eps * (n + 4) * magnitude * scale + eps * np.abs(result)
+            results.append(result)
+            # Coda non finita (es. parametri estremi): il punto viene rifiutato
+            bounds.append(np.where(np.isfinite(tail + rounding), tail + rounding, np.inf))
+
+        return results[0], results[1], np.maximum(bounds[0], bounds[1])
+
+    def _population_sum_direct(self, p, tol, phases, max_block=1024, max_terms=1 << 22):
+        """
+        S = Σ q^n/(kn + c) sommata per blocchi (adatta a q = 1 - p piccolo). La coda
+        oltre M termini è compresa tra X1·q^M / (k(M + q/p) + c) (disuguaglianza di
+        Jensen) e X1·q^M / (kM + c) e viene stimata con il punto medio. I termini sono
+        positivi: l'arrotondamento della somma è limitato da (blocchi + log2(blocco))·eps
+        volte la somma stessa.
+
+        I punti che dopo max_terms termini non rispettano tol restano NaN, con
+        maggiorazione infinita.
+        """
+        eps = np.finfo(float).eps
+        q = 1 - p
+        with np.errstate(divide='ignore'):
+            log_q = np.log1p(-p)    # -inf per p = 1
+        Xmax_ave_K = np.full_like(p, np.nan)
+        Xmax_ave_D = np.full_like(p, np.nan)
+        error_bound = np.full_like(p, np.inf)
+
+        active = np.arange(len(p))
+        partial_sums = np.zeros((2, len(p)))
+        n_terms = 0
+        n_blocks = 0
+        block = 64
+        while active.size and n_terms < max_terms:
+            n = np.arange(n_terms, n_terms + block)
+            # q^n = exp(n·ln(1 - p)): non risente dell'arrotondamento di 1 - p per p piccolo
+            with np.errstate(invalid='ignore'):
+                powers = np.where(n == 0, 1.0, np.exp(n * log_q[active, None]))
+            for i, (k_deactivation, _, _, c) in enumerate(phases):
+                partial_sums[i, active] += np.sum(
+                    powers / (k_deactivation[active, None] * n + c[active, None]), axis=1)
+            n_terms += block
+            n_blocks += 1
+            block = min(2 * block, max_block)
+
+            # Limiti della coda oltre n_terms termini e arrotondamento della somma parziale
+            pa, qa = p[active], q[active]
+            q_M = np.exp(n_terms * log_q[active])
+            rounding = (n_blocks + np.log2(max_block) + 2) * eps
+            tails, bounds = [], []
+            for i, (k_deactivation, _, X1, c) in enumerate(phases):
+                k_deactivation, X1, c = k_deactivation[active], X1[active], c[active]
+                upper = X1 * q_M / (k_deactivation * n_terms + c)
+                lower = X1 * q_M / (k_deactivation * (n_terms + qa / pa) + c)
+                tails.append(0.5 * (upper + lower))
+                bounds.append(0.5 * (upper - lower) + rounding * X1 * pa * partial_sums[i, active])
+            bound = np.maximum(bounds[0], bounds[1])
+
+            done = bound <= tol
+            index = active[done]
+            for i, (target, (_, Xr, X1, _)) in enumerate(zip((Xmax_ave_K, Xmax_ave_D), phases)):
+                target[index] = Xr[index] + X1[index] * pa[done] * partial_sums[i, index] + tails[i][done]
+            error_bound[index] = bound[done]
+            active = active[~done]
+
+        self.instrumentation.observe('cycles_reached', n_terms)
+        if active.size:
+            self.instrumentation.count('maximum_conversion.not_converged', active.size)
+
+        return Xmax_ave_K, Xmax_ave_D, error_bound
 
     def residence_time(self, Ws_per_MW, FR):
         """
@@ -382,6 +923,9 @@ class CarbonCaptureModel:
         Calcola la conversione media nella fase cinetica (Equazione 15)
         X|≤tK = ∫[0 to tK] rave,K * t * (1/τ) * e^(-t/τ) dt / (1 - e^(-tK/τ))
         """
+        if self.integration_method == 'analytic':
+            return float(self.average_conversion_kinetic_phase_array(tau_min, Xmax_ave_K))
+
         if tau_min <= 0 or Xmax_ave_K <= 0:
             return 0
             
@@ -393,6 +937,7 @@ class CarbonCaptureModel:
         
         # Integrazione numerica da 0 a tK
         integral_result, _ = integrate.quad(integrand, 0, tK)
+        self.instrumentation.count('quad_calls')
         
         # Normalizzazione (matematicamente corretta secondo il paper)
         fa = self.active_fraction(tau_min)
@@ -405,6 +950,9 @@ class CarbonCaptureModel:
         Calcola la conversione media nella fase diffusiva (Equazione 16)
         X|>tK = Xmax,ave,K + ∫[tK to τ] rave,D * t * (1/τ) * e^(-t/τ) dt / (1 - e^(-tK/τ))
         """
+        if self.integration_method == 'analytic':
+            return float(self.average_conversion_diffusion_phase_array(tau_min, Xmax_ave_K, Xmax_ave_D))
+
         if tau_min <= 0:
             return Xmax_ave_K
             
@@ -422,6 +970,7 @@ class CarbonCaptureModel:
         # Integrazione da tK fino al minimo tra τ e tempo massimo
         t_max = min(tau_min * 10, tK + max_diffusion_time)  # Limite pratico
         integral_result, _ = integrate.quad(integrand, tK, t_max)
+        self.instrumentation.count('quad_calls')
         
         # Normalizzazione (matematicamente corretta secondo il paper)
         fa = self.active_fraction(tau_min)
@@ -429,6 +978,413 @@ class CarbonCaptureModel:
             return Xmax_ave_K + integral_result / (1 - fa)
         return Xmax_ave_K
 
+    def active_fraction_array(self, tau_min, samples=None):
+        """
+        Versione vettoriale dell'Equazione (17) per un array di tempi di residenza.
+        """
+        tau = np.asarray(tau_min, dtype=float)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            fa = -np.expm1(-self._sampled_value('t_kinetic', samples) / tau)
+        return np.where(tau > 0, fa, 0.0)
+
+    def average_conversion_kinetic_phase_array(self, tau_min, Xmax_ave_K, samples=None):
+        """
+        Equazione (15) in forma chiusa e vettoriale. Con x = tK/τ:
+        ∫[0 to tK] rave,K * t * (1/τ) * e^(-t/τ) dt = rave,K * τ * (1 - e^(-x)·(1 + x))
+        """
+        tau = np.asarray(tau_min, dtype=float)
+        Xmax_ave_K = np.asarray(Xmax_ave_K, dtype=float)
+        tK = self._sampled_value('t_kinetic', samples)
+
+        fa = self.active_fraction_array(tau, samples)
+        with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+            rave_K = Xmax_ave_K / tK
+            integral_result = rave_K * tau * _lower_gamma2(tK / tau)
+            Xave_K = integral_result / fa
+
+        valid = (tau > 0) & (Xmax_ave_K > 0) & (fa > 0)
+        return np.where(valid, Xave_K, 0.0)
+
+    def average_conversion_diffusion_phase_array(self, tau_min, Xmax_ave_K, Xmax_ave_D, samples=None):
+        """
+        Equazione (16) in forma chiusa e vettoriale. L'integrale vale
+        rave,D * (e^(-tK/τ) - e^(-t_max/τ)) e, diviso per 1 - fa = e^(-tK/τ),
+        dà rave,D * (1 - e^(-(t_max - tK)/τ)).
+        """
+        tau = np.asarray(tau_min, dtype=float)
+        Xmax_ave_K = np.asarray(Xmax_ave_K, dtype=float)
+        tK = self._sampled_value('t_kinetic', samples)
+        max_diffusion_time = self._sampled_value('T0', samples) - tK
+
+        # Stesso limite pratico della versione con quad
+        t_max = np.minimum(tau * 10, tK + max_diffusion_time)
+        with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+            rave_D = np.asarray(Xmax_ave_D, dtype=float) / max_diffusion_time
+            contribution = rave_D * -np.expm1(-(t_max - tK) / tau)
+
+        fa = self.active_fraction_array(tau, samples)
+        valid = (tau > tK) & (fa < 1)
+        return np.where(valid, Xmax_ave_K + contribution, Xmax_ave_K)
+
+    def efficiency_from_conversions(self, tau_min, Xmax_ave_K, Xmax_ave_D, FCO2, FR, samples=None):
+        """
+        Equazioni (14)-(23) a partire dal tempo di residenza e dalle conversioni medie
+        massime (Eq. 11 o, nella simulazione dinamica, la distribuzione corrente).
+
+        Returns:
+            dict: Array 'fa', 'Xave_K', 'Xave_D', 'Xave', 'ECO2' (limitata a
+                MAX_EFFICIENCY), 'ECO2_K' e 'ECO2_D'.
+        """
+        stage = self.instrumentation.stage
+
+        # Frazione attiva (Equazione 17)
+        with stage('active_fraction'):
+            fa = self.active_fraction_array(tau_min, samples)
+
+        # Conversioni medie per le due fasi (Equazioni 15, 16)
+        with stage('phase_averages'):
+            Xave_K = self.average_conversion_kinetic_phase_array(tau_min, Xmax_ave_K, samples)
+            Xave_D = np.where(fa < 1,
+                              self.average_conversion_diffusion_phase_array(tau_min, Xmax_ave_K, Xmax_ave_D,
+                                                                            samples),
+                              0.0)
+
+        # Conversione media totale (Equazione 14)
+        Xave = fa * Xave_K + (1 - fa) * Xave_D
+
+        # Efficienza di cattura (Equazioni 21-23), limitata al massimo fisico
+        if FCO2 > 0:
+            ECO2 = np.minimum((FR * Xave) / FCO2, MAX_EFFICIENCY)
+            ECO2_K = (FR * Xave_K * fa) / FCO2
+            ECO2_D = (FR * Xave_D * (1 - fa)) / FCO2
+        else:
+            ECO2 = ECO2_K = ECO2_D = np.zeros_like(Xave)
+
+        return {'fa': fa, 'Xave_K': Xave_K, 'Xave_D': Xave_D, 'Xave': Xave,
+                'ECO2': ECO2, 'ECO2_K': ECO2_K, 'ECO2_D': ECO2_D}
+
+    def capture_efficiency_batch(self, Ws_per_MW, F0_FCO2_ratio, FR_FCO2_ratio, samples=None):
+        """
+        Versione vettoriale di capture_efficiency su array di condizioni operative.
+
+        Gli ingressi sono array della stessa lunghezza o compatibili in broadcasting
+        (es. Ws[:, None] e FR[None, :] per una griglia). Gli integrali delle Eq. (15)
+        e (16) sono sempre valutati in forma chiusa.
+
+        Args:
+            samples (dict): Facoltativo, {nome: array} con valori campionati dei parametri
+                in SAMPLED_PARAMETERS, in broadcasting con le condizioni operative
+                (es. Ws[:, None] e campioni[None, :]); sostituiscono quelli di params.
+
+        Returns:
+            dict: Le stesse chiavi di capture_efficiency, con array della forma del
+                broadcast al posto degli scalari, più 'valid': maschera dei punti con
+                ingressi finiti e non negativi e risultati finiti. I punti non validi
+                valgono 0 in tutte le uscite, come il risultato di errore scalare.
+        """
+        samples = {name: np.asarray(values, dtype=float) for name, values in (samples or {}).items()}
+        unknown = set(samples) - set(SAMPLED_PARAMETERS)
+        if unknown:
+            raise ValueError(f"Parametri non campionabili: {', '.join(sorted(unknown))} "
+                             f"(valori ammessi: {', '.join(SAMPLED_PARAMETERS)})")
+
+        Ws_per_MW, F0_FCO2_ratio, FR_FCO2_ratio, *_ = np.broadcast_arrays(
+            np.asarray(Ws_per_MW, dtype=float),
+            np.asarray(F0_FCO2_ratio, dtype=float),
+            np.asarray(FR_FCO2_ratio, dtype=float),
+            *samples.values())
+
+        valid = np.ones(Ws_per_MW.shape, dtype=bool)
+        for values in (Ws_per_MW, F0_FCO2_ratio, FR_FCO2_ratio):
+            valid &= np.isfinite(values) & (values >= 0)
+        # Parametri (campionati) non ammissibili, es. Xr >= X1: risultati esclusi
+        valid &= self.parameter_validity(samples)
+
+        stage = self.instrumentation.stage
+        self.instrumentation.count('capture_efficiency_batch.calls')
+        self.instrumentation.count('capture_efficiency_batch.points', Ws_per_MW.size)
+
+        # 1. Flussi molari effettivi
+        with stage('flows'):
+            FCO2, F0, FR = self.get_operating_flows(F0_FCO2_ratio, FR_FCO2_ratio)
+
+        # 2. Tempo di residenza medio (τ) in minuti, infinito se FR = 0
+        with stage('residence_time'):
+            with np.errstate(divide='ignore', invalid='ignore'):
+                tau_min = Ws_per_MW / (self.params.M_CaO_kg * FR) / 60.0
+            tau_min = np.where(FR == 0, np.inf, tau_min)
+
+        # 3. Conversioni medie massime (Equazione 11), sommate su infiniti cicli
+        with stage('maximum_conversion'):
+            Xmax_ave_K, Xmax_ave_D = self.average_maximum_conversion_array(F0, FR, samples=samples)
+
+        # 4-7. Frazione attiva, conversioni medie ed efficienze (Equazioni 14-23)
+        stages = self.efficiency_from_conversions(tau_min, Xmax_ave_K, Xmax_ave_D, FCO2, FR, samples)
+        fa, Xave_K, Xave_D, Xave = (stages[name] for name in ('fa', 'Xave_K', 'Xave_D', 'Xave'))
+        ECO2, ECO2_K, ECO2_D = (stages[name] for name in ('ECO2', 'ECO2_K', 'ECO2_D'))
+
+        for values in (ECO2, ECO2_K, ECO2_D, Xave):
+            valid &= np.isfinite(values)
+
+        def masked(values):
+            return np.where(valid, values, 0.0)
+
+        return {
+            'efficiency': masked(ECO2),
+            'efficiency_kinetic': masked(ECO2_K),
+            'efficiency_diffusion': masked(ECO2_D),
+            'residence_time_min': masked(tau_min),
+            'average_conversion': masked(Xave),
+            'average_conversion_kinetic': masked(Xave_K),
+            'average_conversion_diffusion': masked(Xave_D),
+            'active_fraction': masked(fa),
+            'flows': {'FCO2': masked(np.full(valid.shape, FCO2)), 'F0': masked(F0), 'FR': masked(FR)},
+            'valid': valid
+        }
+
+    def _build_stage_graph(self):
+        """Fasi di capture_efficiency_batch (senza samples) come grafo delle dipendenze"""
+        stage = self.instrumentation.stage
+        graph = DependencyGraph()
+
+        def flows(F0_FCO2_ratio, FR_FCO2_ratio, params):
+            with stage('flows'):
+                return self.get_operating_flows(F0_FCO2_ratio, FR_FCO2_ratio)
+
+        def residence_time(Ws_per_MW, FR, params):
+            with stage('residence_time'):
+                with np.errstate(divide='ignore', invalid='ignore'):
+                    tau_min = Ws_per_MW / (params.M_CaO_kg * FR) / 60.0
+                return (np.where(FR == 0, np.inf, tau_min),)
+
+        def maximum_conversion(F0, FR, params, conversion_tolerance):
+            with stage('maximum_conversion'):
+                return self.average_maximum_conversion_array(F0, FR)
+
+        def active_fraction(tau_min, params):
+            with stage('active_fraction'):
+                return (self.active_fraction_array(tau_min),)
+
+        def phase_averages(tau_min, Xmax_ave_K, Xmax_ave_D, fa, params):
+            with stage('phase_averages'):
+                Xave_K = self.average_conversion_kinetic_phase_array(tau_min, Xmax_ave_K)
+                Xave_D = np.where(fa < 1,
+                                  self.average_conversion_diffusion_phase_array(tau_min, Xmax_ave_K, Xmax_ave_D),
+                                  0.0)
+                return Xave_K, Xave_D
+
+        def average_conversion(fa, Xave_K, Xave_D):
+            return (fa * Xave_K + (1 - fa) * Xave_D,)
+
+        def efficiency(FCO2, FR, Xave, Xave_K, Xave_D, fa):
+            if FCO2 > 0:
+                return (np.minimum((FR * Xave) / FCO2, MAX_EFFICIENCY),
+                        (FR * Xave_K * fa) / FCO2,
+                        (FR * Xave_D * (1 - fa)) / FCO2)
+            zeros = np.zeros_like(Xave)
+            return zeros, zeros, zeros
+
+        def validity(Ws_per_MW, F0_FCO2_ratio, FR_FCO2_ratio, ECO2, ECO2_K, ECO2_D, Xave, params):
+            valid = np.ones(np.broadcast_shapes(Ws_per_MW.shape, F0_FCO2_ratio.shape, FR_FCO2_ratio.shape),
+                            dtype=bool)
+            valid &= self.parameter_validity()
+            for values in (Ws_per_MW, F0_FCO2_ratio, FR_FCO2_ratio):
+                valid &= np.isfinite(values) & (values >= 0)
+            for values in (ECO2, ECO2_K, ECO2_D, Xave):
+                valid &= np.isfinite(values)
+            return (valid,)
+
+        graph.add_stage('flows', ('F0_FCO2_ratio', 'FR_FCO2_ratio', 'params'), ('FCO2', 'F0', 'FR'), flows)
+        graph.add_stage('residence_time', ('Ws_per_MW', 'FR', 'params'), ('tau_min',), residence_time)
+        # La tolleranza dell'Eq. 11 è un ingresso come i parametri: cambiarla sul modello
+        # invalida le fasi che ne dipendono. integration_method non lo è: batch e
+        # incrementale usano sempre le Eq. 15-16 analitiche
+        graph.add_stage('maximum_conversion', ('F0', 'FR', 'params', 'conversion_tolerance'),
+                        ('Xmax_ave_K', 'Xmax_ave_D'), maximum_conversion)
+        graph.add_stage('active_fraction', ('tau_min', 'params'), ('fa',), active_fraction)
+        graph.add_stage('phase_averages', ('tau_min', 'Xmax_ave_K', 'Xmax_ave_D', 'fa', 'params'),
+                        ('Xave_K', 'Xave_D'), phase_averages)
+        graph.add_stage('average_conversion', ('fa', 'Xave_K', 'Xave_D'), ('Xave',), average_conversion)
+        graph.add_stage('efficiency', ('FCO2', 'FR', 'Xave', 'Xave_K', 'Xave_D', 'fa'),
+                        ('ECO2', 'ECO2_K', 'ECO2_D'), efficiency)
+        graph.add_stage('validity', ('Ws_per_MW', 'F0_FCO2_ratio', 'FR_FCO2_ratio', 'ECO2', 'ECO2_K', 'ECO2_D',
+                                     'Xave', 'params'), ('valid',), validity)
+        return graph
+
+    def capture_efficiency_incremental(self, Ws_per_MW, F0_FCO2_ratio, FR_FCO2_ratio):
+        """
+        Come capture_efficiency_batch (senza samples), con ricalcolo incrementale delle fasi.
+
+        Le fasi formano un grafo delle dipendenze (flussi da F0 e FR, τ da Ws e FR,
+        Eq. 11 da F0 e FR, fa da τ, ...): ognuna è valutata sulla forma del broadcast dei
+        soli suoi ingressi (es. l'Eq. 11 solo sull'asse FR di una griglia Ws × FR) e, tra
+        una chiamata e l'altra, solo se è cambiato uno dei suoi ingressi, i parametri,
+        o conversion_tolerance (es. variando solo Ws flussi ed Eq. 11 vengono riusati).
+        Il lavoro evitato è riportato da incremental_info().
+
+        Returns:
+            dict: Le stesse chiavi e gli stessi valori di capture_efficiency_batch.
+        """
+        graph = self._stage_graph
+        if graph is None:
+            graph = self._stage_graph = self._build_stage_graph()
+
+        inputs = {
+            'Ws_per_MW': np.asarray(Ws_per_MW, dtype=float),
+            'F0_FCO2_ratio': np.asarray(F0_FCO2_ratio, dtype=float),
+            'FR_FCO2_ratio': np.asarray(FR_FCO2_ratio, dtype=float),
+        }
+        shape = np.broadcast_shapes(*(values.shape for values in inputs.values()))
+        full_size = int(np.prod(shape))
+        self.instrumentation.count('capture_efficiency_incremental.calls')
+        self.instrumentation.count('capture_efficiency_incremental.points', full_size)
+
+        for name, values in inputs.items():
+            graph.set_input(name, values)
+        graph.set_input('params', self.params)
+        graph.set_input('conversion_tolerance', self.conversion_tolerance)
+        nodes = graph.evaluate(('FCO2', 'F0', 'FR', 'tau_min', 'fa', 'Xave', 'Xave_K', 'Xave_D',
+                                'ECO2', 'ECO2_K', 'ECO2_D', 'valid'), full_size)
+        graph.release(self.incremental_retain_points)
+
+        valid = nodes['valid']
+
+        def masked(values):
+            return np.where(valid, values, 0.0)
+
+        return {
+            'efficiency': masked(nodes['ECO2']),
+            'efficiency_kinetic': masked(nodes['ECO2_K']),
+            'efficiency_diffusion': masked(nodes['ECO2_D']),
+            'residence_time_min': masked(nodes['tau_min']),
+            'average_conversion': masked(nodes['Xave']),
+            'average_conversion_kinetic': masked(nodes['Xave_K']),
+            'average_conversion_diffusion': masked(nodes['Xave_D']),
+            'active_fraction': masked(nodes['fa']),
+            'flows': {'FCO2': masked(np.full(valid.shape, nodes['FCO2'])), 'F0': masked(nodes['F0']),
+                      'FR': masked(nodes['FR'])},
+            'valid': valid
+        }
+
+    def incremental_info(self):
+        """Fasi eseguite e riusate e punti calcolati e risparmiati da capture_efficiency_incremental"""
+        if self._stage_graph is None:
+            self._stage_graph = self._build_stage_graph()
+        return self._stage_graph.info()
+
+    def batch_result_at(self, batch, index):
+        """
+        Estrae da un risultato di capture_efficiency_batch il dizionario scalare
+        del punto `index`, nello stesso formato di capture_efficiency.
+        """
+        result = {key: float(batch[key][index]) for key in batch if key not in ('flows', 'valid')}
+        result['flows'] = {key: float(values[index]) for key, values in batch['flows'].items()}
+        if not batch['valid'][index]:
+            result['error'] = 'Condizioni operative non valide o risultato non finito'
+        return result
+
+    def required_operating_condition(self, target_efficiency, solve_for='Ws_per_MW', Ws_per_MW=None,
+                                     F0_FCO2_ratio=None, FR_FCO2_ratio=None, bounds=None,
+                                     n_scan=32, rtol=1e-9, max_iterations=100):
+        """
+        Problema inverso: valore minimo di una condizione operativa (Ws, FR/FCO2 o
+        F0/FCO2) per cui l'efficienza raggiunge target_efficiency, con le altre due fisse.
+
+        Per tutti i problemi insieme (target e condizioni fisse in broadcasting) valuta
+        n_scan punti log-spaziati in bounds e prende il primo con efficienza >= target;
+        l'intervallo con il punto precedente viene poi ristretto per bisezione in scala
+        logaritmica fino a un'ampiezza relativa rtol.
+
+        Args:
+            target_efficiency (array_like): Efficienze richieste, in (0, 0.99].
+            solve_for (str): Condizione incognita: 'Ws_per_MW', 'FR_FCO2_ratio' o 'F0_FCO2_ratio'.
+            Ws_per_MW, F0_FCO2_ratio, FR_FCO2_ratio (array_like): Le due condizioni fisse.
+            bounds (tuple): (min, max) positivi dell'incognita; default INVERSE_BOUNDS.
+            n_scan (int): Punti della scansione iniziale.
+            rtol (float): Ampiezza relativa finale dell'intervallo.
+            max_iterations (int): Numero massimo di bisezioni.
+
+        Returns:
+            dict: Array della forma del broadcast: 'value' (minimo valore trovato, NaN se
+                non ammissibile), 'efficiency' in quel punto, 'max_efficiency' (massimo
+                della scansione), 'feasible' e 'status': 'ok', 'at_lower_bound' (già
+                raggiunta al limite inferiore), 'above_cap' (target > 0.99), 'not_reached'
+                (mai raggiunta entro bounds), 'invalid' (target o condizioni non validi);
+                più 'evaluations' (punti valutati per problema).
+        """
+        fixed = {'Ws_per_MW': Ws_per_MW, 'F0_FCO2_ratio': F0_FCO2_ratio, 'FR_FCO2_ratio': FR_FCO2_ratio}
+        if solve_for not in fixed:
+            raise ValueError(f"Incognita non valida: {solve_for!r} (valori ammessi: {', '.join(fixed)})")
+        missing = [name for name, value in fixed.items() if name != solve_for and value is None]
+        if missing:
+            raise ValueError(f"Condizioni operative fisse mancanti: {', '.join(missing)}")
+        low, high = bounds if bounds is not None else INVERSE_BOUNDS[solve_for]
+        if not 0 < low < high:
+            raise ValueError("L'intervallo di ricerca deve essere (min, max) con 0 < min < max")
+
+        names = [name for name in fixed if name != solve_for]
+        arrays = np.broadcast_arrays(np.asarray(target_efficiency, dtype=float),
+                                     *(np.asarray(fixed[name], dtype=float) for name in names))
+        shape = arrays[0].shape
+        target, *columns = (values.ravel() for values in arrays)
+
+        def efficiency(x, rows=slice(None)):
+            # Efficienza dei problemi rows con l'incognita x (una riga di x per problema)
+            conditions = dict(zip(names, (column[rows].reshape((-1,) + (1,) * (x.ndim - 1))
+                                          for column in columns)))
+            conditions[solve_for] = x
+            return self.capture_efficiency_batch(conditions['Ws_per_MW'], conditions['F0_FCO2_ratio'],
+                                                 conditions['FR_FCO2_ratio'])['efficiency']
+
+        valid = np.isfinite(target) & (target > 0)
+        for column in columns:
+            valid &= np.isfinite(column) & (column >= 0)
+
+        # 1. Scansione: primo punto con efficienza >= target
+        grid = np.geomspace(low, high, max(2, int(n_scan)))
+        scan = efficiency(np.broadcast_to(grid, (len(target), len(grid))))
+        reached = scan >= target[:, None]
+        first = np.argmax(reached, axis=1)
+        found = reached.any(axis=1)
+
+        status = np.full(len(target), 'ok', dtype='<U14')
+        status[~found] = 'not_reached'
+        status[found & (first == 0)] = 'at_lower_bound'
+        status[target > MAX_EFFICIENCY] = 'above_cap'
+        status[~valid] = 'invalid'
+
+        # 2. Bisezione (in scala logaritmica) degli intervalli [x_(k-1), x_k] trovati
+        rows = np.flatnonzero(status == 'ok')
+        lower = grid[first[rows] - 1]
+        upper = grid[first[rows]]
+        upper_efficiency = scan[rows, first[rows]]
+        iterations = 0
+        while rows.size and iterations < max_iterations and np.any(upper > lower * (1 + rtol)):
+            middle = np.sqrt(lower * upper)
+            values = efficiency(middle, rows)
+            above = values >= target[rows]
+            upper = np.where(above, middle, upper)
+            upper_efficiency = np.where(above, values, upper_efficiency)
+            lower = np.where(above, lower, middle)
+            iterations += 1
+
+        value = np.full(len(target), np.nan)
+        achieved = np.full(len(target), np.nan)
+        value[rows] = upper
+        achieved[rows] = upper_efficiency
+        at_lower = status == 'at_lower_bound'
+        value[at_lower] = low
+        achieved[at_lower] = scan[at_lower, 0]
+
+        return {
+            'value': value.reshape(shape),
+            'efficiency': achieved.reshape(shape),
+            'max_efficiency': np.where(valid, scan.max(axis=1), np.nan).reshape(shape),
+            'feasible': np.isin(status, ('ok', 'at_lower_bound')).reshape(shape),
+            'status': status.reshape(shape),
+            'evaluations': len(grid) + iterations,
+        }
+
     def capture_efficiency(self, operating_conditions):
         """
         Calcola l'efficienza di cattura CO2 implementando le Eq. (8), (14), (21-23).
@@ -439,25 +1395,33 @@ class CarbonCaptureModel:
             F0_FCO2_ratio = operating_conditions['F0_FCO2_ratio']
             FR_FCO2_ratio = operating_conditions['FR_FCO2_ratio']
 
+            stage = self.instrumentation.stage
+            self.instrumentation.count('capture_efficiency.calls')
+
             # 1. Calcola flussi molari effettivi
-            FCO2, F0, FR = self.get_operating_flows(F0_FCO2_ratio, FR_FCO2_ratio)
+            with stage('flows'):
+                FCO2, F0, FR = self.get_operating_flows(F0_FCO2_ratio, FR_FCO2_ratio)
 
             # 2. Calcola tempo di residenza medio (τ) in minuti
-            tau_min = self.residence_time(Ws_per_MW, FR)
+            with stage('residence_time'):
+                tau_min = self.residence_time(Ws_per_MW, FR)
 
             # 3. Calcola le conversioni medie massime (Equazione 11)
-            Xmax_ave_K, Xmax_ave_D = self.average_maximum_conversion(F0, FR)
+            with stage('maximum_conversion'):
+                Xmax_ave_K, Xmax_ave_D = self.average_maximum_conversion(F0, FR)
 
             # 4. Calcola la frazione attiva (Equazione 17)
-            fa = self.active_fraction(tau_min)
+            with stage('active_fraction'):
+                fa = self.active_fraction(tau_min)
 
             # 5. Calcola le conversioni medie per le due fasi (Equazioni 15, 16)
-            Xave_K = self.average_conversion_kinetic_phase(tau_min, Xmax_ave_K)
-            
-            if fa < 1:
-                Xave_D = self.average_conversion_diffusion_phase(tau_min, Xmax_ave_K, Xmax_ave_D)
-            else:
-                Xave_D = 0
+            with stage('phase_averages'):
+                Xave_K = self.average_conversion_kinetic_phase(tau_min, Xmax_ave_K)
+
+                if fa < 1:
+                    Xave_D = self.average_conversion_diffusion_phase(tau_min, Xmax_ave_K, Xmax_ave_D)
+                else:
+                    Xave_D = 0
 
             # 6. Conversione media totale (Equazione 14)
             Xave = fa * Xave_K + (1 - fa) * Xave_D
@@ -471,7 +1435,7 @@ class CarbonCaptureModel:
                 ECO2 = ECO2_K = ECO2_D = 0
             
             # Limita l'efficienza al massimo fisico possibile
-            ECO2 = min(ECO2, 0.99)
+            ECO2 = min(ECO2, MAX_EFFICIENCY)
 
             return {
                 'efficiency': ECO2,
@@ -487,7 +1451,9 @@ class CarbonCaptureModel:
             
         except Exception as e:
             # Return a safe default result with proper keys in case of error
-            print(f"Errore nel calcolo dell'efficienza: {e}")
+            self.instrumentation.count('capture_efficiency.errors')
+            # L'errore è riportato anche nel risultato ('error'), come in batch_result_at
+            logger.warning("Errore nel calcolo dell'efficienza per %s: %s", operating_conditions, e)
             return {
                 'efficiency': 0.0,
                 'efficiency_kinetic': 0.0,
@@ -0,0 +1,133 @@
+"""
+Ricalcolo incrementale di una catena di fasi descritta come grafo delle dipendenze.
+
+Ogni fase ha ingressi e uscite con nome; i valori degli ingressi esterni vengono
+confrontati con quelli della valutazione precedente e ogni nodo ha una versione che
+cresce a ogni cambiamento. Una fase viene rieseguita solo se è cambiata la versione
+di almeno uno dei suoi ingressi, altrimenti le sue uscite vengono riusate.
+
+I contatori registrano per ogni fase le esecuzioni, i riusi e i punti (elementi delle
+uscite) calcolati e risparmiati; se la valutazione indica la dimensione del risultato
+completo, tra i punti risparmiati ci sono anche quelli non calcolati perché la fase
+dipende da ingressi con meno dimensioni (es. solo l'asse FR di una griglia Ws × FR).
+"""
+
+import numpy as np
+
+
+def _same_value(previous, value):
+    """Uguaglianza esatta di due valori di ingresso (array: forma, tipo e byte)"""
+    if isinstance(previous, np.ndarray) or isinstance(value, np.ndarray):
+        previous, value = np.asarray(previous), np.asarray(value)
+        return (previous.shape == value.shape and previous.dtype == value.dtype
+                and previous.tobytes() == value.tobytes())
+    return type(previous) is type(value) and previous == value
+
+
+class DependencyGraph:
+    """Fasi collegate dai nomi di ingressi e uscite, rieseguite solo se cambia un ingresso"""
+
+    def __init__(self):
+        self._stages = {}
+        self._producers = {}
+        self._values = {}
+        self._versions = {}
+        self._evaluated_versions = {}
+        self.counters = {}
+
+    def add_stage(self, name, inputs, outputs, function):
+        """
+        Aggiunge la fase name: function(*valori degli ingressi) restituisce una tupla
+        con i valori delle uscite, nell'ordine di outputs.
+        """
+        if name in self._stages:
+            raise ValueError(f"Fase già definita: {name!r}")
+        for output in outputs:
+            if output in self._producers:
+                raise ValueError(f"Uscita {output!r} già prodotta dalla fase {self._producers[output]!r}")
+            self._producers[output] = name
+        self._stages[name] = (tuple(inputs), tuple(outputs), function)
+        self.counters[name] = {'evaluated': 0, 'reused': 0, 'points_evaluated': 0, 'points_skipped': 0}
+
+    def set_input(self, name, value):
+        """Imposta un ingresso esterno; restituisce True se il valore è cambiato"""
+        if name in self._producers:
+            raise ValueError(f"{name!r} è un'uscita della fase {self._producers[name]!r}, non un ingresso")
+        if name in self._values and _same_value(self._values[name], value):
+            return False
+        # Copia degli array: una modifica sul posto del chiamante non deve passare inosservata
+        self._values[name] = np.array(value) if isinstance(value, np.ndarray) else value
+        self._versions[name] = self._versions.get(name, 0) + 1
+        return True
+
+    def evaluate(self, targets, full_size=None):
+        """
+        Valuta (o riusa) le fasi necessarie per i nodi targets.
+
+        Args:
+            targets (iterable): Nomi dei nodi richiesti.
+            full_size (int): Punti del risultato completo, per contare come risparmiati
+                anche quelli che una fase non calcola grazie al broadcasting.
+
+        Returns:
+            dict: {nome: valore} dei nodi richiesti.
+        """
+        visited = set()
+        for target in targets:
+            self._update(target, full_size, visited)
+        return {target: self._values[target] for target in targets}
+
+    def _update(self, node, full_size, visited):
+        stage = self._producers.get(node)
+        if stage is None:
+            if node not in self._values:
+                raise KeyError(f"Ingresso non impostato: {node!r}")
+            return
+        # Ogni fase è considerata una sola volta per valutazione
+        if stage in visited:
+            return
+        visited.add(stage)
+        inputs, outputs, function = self._stages[stage]
+        for name in inputs:
+            self._update(name, full_size, visited)
+        versions = tuple(self._versions[name] for name in inputs)
+        counters = self.counters[stage]
+        if self._evaluated_versions.get(stage) == versions:
+            counters['reused'] += 1
+            if full_size is None:
+                full_size = max(np.size(self._values[name]) for name in outputs)
+            counters['points_skipped'] += full_size
+            return
+        values = function(*(self._values[name] for name in inputs))
+        for name, value in zip(outputs, values):
+            self._values[name] = value
+            self._versions[name] = self._versions.get(name, 0) + 1
+        self._evaluated_versions[stage] = versions
+        size = max(np.size(value) for value in values)
+        counters['evaluated'] += 1
+        counters['points_evaluated'] += size
+        if full_size is not None:
+            counters['points_skipped'] += max(0, full_size - size)
+
+    def release(self, max_points):
+        """
+        Libera le uscite delle fasi con più di max_points elementi: quelle fasi verranno
+        rieseguite alla prossima valutazione che le richiede.
+        """
+        for stage, (_, outputs, _) in self._stages.items():
+            if any(np.size(self._values.get(name)) > max_points for name in outputs if name in self._values):
+                for name in outputs:
+                    self._values.pop(name, None)
+                self._evaluated_versions.pop(stage, None)
+
+    def clear(self):
+        """Dimentica valori e versioni (i contatori restano)"""
+        self._values.clear()
+        self._versions.clear()
+        self._evaluated_versions.clear()
+
+    def info(self):
+        """Contatori per fase e totali"""
+        totals = {key: sum(counters[key] for counters in self.counters.values())
+                  for key in ('evaluated', 'reused', 'points_evaluated', 'points_skipped')}
+        return {'stages': {name: dict(counters) for name, counters in self.counters.items()}, 'total': totals}
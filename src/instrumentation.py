@@ -0,0 +1,130 @@
+"""
+Strumentazione opzionale dei percorsi critici del modello: tempi per fase, contatori
+di chiamate e valori osservati (es. cicli sommati nell'Equazione 11).
+
+Disattivata, ogni punto di misura costa una chiamata di metodo che restituisce un
+context manager vuoto condiviso.
+"""
+
+import functools
+import json
+import time
+from contextlib import nullcontext
+
+_NULL_STAGE = nullcontext()
+
+
+class _Stage:
+    """Context manager che accumula il tempo di una fase nella strumentazione"""
+
+    __slots__ = ('_instrumentation', '_name', '_start')
+
+    def __init__(self, instrumentation, name):
+        self._instrumentation = instrumentation
+        self._name = name
+        self._start = 0.0
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        self._instrumentation._record_stage(self._name, time.perf_counter() - self._start)
+        return False
+
+
+class Instrumentation:
+    """Raccolta di tempi per fase, contatori e valori osservati, attivabile a runtime"""
+
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self.reset()
+
+    def reset(self):
+        """Azzera tutte le misure raccolte"""
+        self._stages = {}
+        self._counters = {}
+        self._values = {}
+
+    def stage(self, name):
+        """Context manager che misura il tempo di esecuzione della fase `name`"""
+        if not self.enabled:
+            return _NULL_STAGE
+        return _Stage(self, name)
+
+    def count(self, name, amount=1):
+        """Incrementa il contatore `name`"""
+        if self.enabled:
+            self._counters[name] = self._counters.get(name, 0) + amount
+
+    def observe(self, name, value):
+        """Registra un valore osservato (conteggio, totale, minimo, massimo, ultimo)"""
+        if not self.enabled:
+            return
+        stats = self._values.get(name)
+        if stats is None:
+            self._values[name] = {'count': 1, 'total': value, 'min': value, 'max': value, 'last': value}
+        else:
+            stats['count'] += 1
+            stats['total'] += value
+            stats['min'] = min(stats['min'], value)
+            stats['max'] = max(stats['max'], value)
+            stats['last'] = value
+
+    def _record_stage(self, name, elapsed):
+        stats = self._stages.get(name)
+        if stats is None:
+            self._stages[name] = {'calls': 1, 'total_s': elapsed, 'max_s': elapsed}
+        else:
+            stats['calls'] += 1
+            stats['total_s'] += elapsed
+            stats['max_s'] = max(stats['max_s'], elapsed)
+
+    def snapshot(self):
+        """
+        Fotografia strutturata delle misure.
+
+        Returns:
+            dict: {'enabled', 'stages': {nome: {calls, total_s, mean_s, max_s}},
+                'counters': {nome: valore}, 'values': {nome: {count, total, mean, min, max, last}}}
+        """
+        stages = {
+            name: {**stats, 'mean_s': stats['total_s'] / stats['calls']}
+            for name, stats in self._stages.items()
+        }
+        values = {
+            name: {**stats, 'mean': stats['total'] / stats['count']}
+            for name, stats in self._values.items()
+        }
+        return {
+            'enabled': self.enabled,
+            'stages': stages,
+            'counters': dict(self._counters),
+            'values': values,
+        }
+
+    def to_json(self, path=None):
+        """Serializza snapshot() in JSON; se `path` è dato lo scrive anche su file"""
+        text = json.dumps(self.snapshot(), indent=2, default=float)
+        if path is not None:
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(text)
+        return text
+
+
+def instrumented(stage_name):
+    """
+    Decoratore per metodi di oggetti con attributo `instrumentation`: misura l'intera
+    chiamata come fase `stage_name` e conta le chiamate.
+    """
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            instrumentation = self.instrumentation
+            if not instrumentation.enabled:
+                return method(self, *args, **kwargs)
+            instrumentation.count(f'{stage_name}.calls')
+            with instrumentation.stage(stage_name):
+                return method(self, *args, **kwargs)
+        return wrapper
+    return decorator
@@ -0,0 +1,32 @@
+"""
+Import differito dei moduli pesanti (matplotlib, scipy): il nucleo numerico del
+modello resta importabile con il solo numpy e le librerie opzionali vengono
+caricate al primo utilizzo.
+"""
+
+import importlib
+
+
+class LazyModule:
+    """Segnaposto di un modulo che viene importato al primo accesso a un attributo"""
+
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+
+    def _load(self):
+        if self._module is None:
+            self._module = importlib.import_module(self._name)
+        return self._module
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __repr__(self):
+        state = 'caricato' if self._module is not None else 'non caricato'
+        return f"<LazyModule {self._name!r} ({state})>"
+
+
+def lazy_module(name):
+    """Restituisce un LazyModule per il modulo `name` (es. 'matplotlib.pyplot')"""
+    return LazyModule(name)
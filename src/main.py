@@ -2,183 +2,402 @@
 """
 File principale per eseguire e testare il modello Calcium Looping.
 Aggiornato per funzionare con la logica di calcolo corretta e includere l'analisi dei tassi di reazione.
+
+Uso da riga di comando (tutte le opzioni sono facoltative):
+    python main.py                                # analisi completa con grafici a schermo
+    python main.py --phases 2,5,6 --headless      # solo alcune fasi, backend non interattivo
+    python main.py --no-plots --output-dir out --format csv   # batch notturno senza grafici
+    python main.py --no-plots --result-store data/results     # riusa gli studi già calcolati
+    python main.py --params sorbente.json         # parametri del modello da file JSON
+    python main.py --headless --figure-format svg --figure optimization_map=png@150   # grafici per report
 """
 
-from model import AdvancedAnalysis, CalciumLoopingModel
-import matplotlib.pyplot as plt
+from model import AdvancedAnalysis, CalciumLoopingModel, configure_plotting, render_figures, set_figure_renderer
+from parameters import ModelParameters
+from rendering import RENDER_FORMATS, FigureRenderer
+from result_store import ResultStore
 import numpy as np
+import argparse
+import csv
+import json
 import os
 
-def main():
-    """Funzione principale per eseguire l'analisi completa del modello"""
-    
+# Fasi dell'analisi nell'ordine di esecuzione
+PHASES = ('1', '1.1', '1.2', '2', '3', '4', '5', '6', '7')
+
+
+def main(phases=PHASES, make_plots=True, result_store=None, params=None, renderer=None):
+    """
+    Funzione principale per eseguire l'analisi completa del modello
+
+    Args:
+        phases (iterable): Fasi da eseguire (vedi PHASES).
+        make_plots (bool): Se False le fasi non generano né salvano grafici.
+        result_store (ResultStore): Archivio su disco degli studi parametrici già calcolati.
+        params (ModelParameters): Parametri del modello; default ModelParameters().
+        renderer (FigureRenderer): Salvataggio dei grafici; default FigureRenderer('data')
+            (PNG a 300 dpi, in parallelo, ridisegnando solo le figure cambiate).
+
+    Returns:
+        dict: Tabelle dei risultati per fase, come liste di righe (dizionari).
+    """
+    phases = set(phases)
+    tables = {}
+
     print("=== MODELLO CALCIUM LOOPING - ANALISI BASATA SU ORTIZ ET AL. (2015) ===")
-    
-    # Crea cartella per i grafici se non esiste
-    if not os.path.exists('data'):
-        os.makedirs('data')
-    
+
+    # I grafici vengono accodati durante le fasi e salvati tutti insieme alla fine
+    if make_plots:
+        renderer = renderer if renderer is not None else FigureRenderer('data')
+        previous_renderer = set_figure_renderer(renderer)
+
     # Inizializza i modelli
-    model = CalciumLoopingModel()
-    advanced_analysis = AdvancedAnalysis()
-    
+    model = CalciumLoopingModel(params)
+    advanced_analysis = AdvancedAnalysis(result_store=result_store, params=params)
+
     # ========== 1. ANALISI COMPORTAMENTO SORBENTE ==========
-    print("\n[FASE 1] Analisi del comportamento multi-ciclo del sorbente...")
-    model.multicycle_analysis(max_cycles=25)
-    model.plot_multicycle_behavior(save_fig=True)
-    print("--> Grafico 'conversion_vs_cycles.png' salvato in /data.")
-    
+    if '1' in phases:
+        print("\n[FASE 1] Analisi del comportamento multi-ciclo del sorbente...")
+        results = model.multicycle_analysis(max_cycles=25)
+        tables['1'] = [
+            {'N': int(N), 'X_NK': XNK, 'X_ND': XND}
+            for N, XNK, XND in zip(results['cycles'], results['conversion_kinetic'].tolist(),
+                                   results['conversion_diffusion'].tolist())
+        ]
+        model.plot_multicycle_behavior(save_fig=make_plots)
+
     # ========== 1.1 NUOVA ANALISI: TASSI DI REAZIONE VS CICLI ==========
-    print("\n[FASE 1.1] Analisi dei tassi di reazione vs numero di cicli (simile a Fig. 5)...")
-    model.plot_reaction_rates_vs_cycles(max_cycles=25, save_fig=True)
-    print("--> Grafico 'reaction_rates_vs_cycles.png' salvato in /data.")
-    
+    if '1.1' in phases:
+        print("\n[FASE 1.1] Analisi dei tassi di reazione vs numero di cicli (simile a Fig. 5)...")
+        rates = model.reaction_rate_analysis(max_cycles=25)
+        tables['1.1'] = [
+            {'N': int(N), 'r_NK': rNK, 'r_ND': rND}
+            for N, rNK, rND in zip(rates['cycles'], rates['rates_kinetic'].tolist(),
+                                   rates['rates_diffusion'].tolist())
+        ]
+        model.plot_reaction_rates_vs_cycles(max_cycles=25, save_fig=make_plots)
+
     # ========== 1.2 CONVERSIONE VS TEMPO PER CICLI MULTIPLI ==========
-    print("\n[FASE 1.2] Conversione nel tempo per cicli N=2, 10, 20 (confronto)...")
-    model.plot_multiple_cycles_conversion_vs_time([2, 10, 20], max_time_min=20, save_fig=True)
-    print("--> Grafico 'conversion_vs_time_multiple_cycles.png' salvato in /data.")
-    
+    if '1.2' in phases:
+        print("\n[FASE 1.2] Conversione nel tempo per cicli N=2, 10, 20 (confronto)...")
+        cycle_list = [2, 10, 20]
+        model.plot_multiple_cycles_conversion_vs_time(cycle_list, max_time_min=20, save_fig=make_plots)
+        cycles = np.array(cycle_list)
+        XNK = model.equations.conversion_cycle_N_array(cycles, 'kinetic')
+        XND = model.equations.conversion_cycle_N_array(cycles, 'diffusion')
+        X_at_tK = model.equations.conversion_at_time_t_array(cycles, model.params.t_kinetic)
+        tables['1.2'] = [
+            {'N': N, 'X_NK': xk, 'X_ND': xd, 'X_totale': xk + xd, 'X_at_tK': xt}
+            for N, xk, xd, xt in zip(cycle_list, XNK.tolist(), XND.tolist(), X_at_tK.tolist())
+        ]
+
     # ========== 2. TEST DI EFFICIENZA SU SINGOLO PUNTO ==========
-    print("\n[FASE 2] Test di efficienza di cattura su un singolo punto operativo...")
-    conditions = {
-        'Ws_per_MW': 200,      # kg/MW
-        'F0_FCO2_ratio': 0.01, # Adimensionale
-        'FR_FCO2_ratio': 5     # Adimensionale
-    }
-    
-    # MODIFICA: Chiamata e gestione dei nuovi risultati
-    result = advanced_analysis.capture_model.capture_efficiency(conditions)
-    
-    print(f"   Condizioni operative:")
-    print(f"     - Inventario solidi (Ws): {conditions['Ws_per_MW']} kg/MW")
-    print(f"     - Rapporto makeup (F0/FCO2): {conditions['F0_FCO2_ratio']}")
-    print(f"     - Rapporto ricircolo (FR/FCO2): {conditions['FR_FCO2_ratio']}")
-    print(f"   Risultati Calcolati:")
-    print(f"     - Efficienza di cattura: {result['efficiency']:.3f}")
-    print(f"     - Efficienza fase cinetica: {result['efficiency_kinetic']:.3f}")
-    print(f"     - Efficienza fase diffusiva: {result['efficiency_diffusion']:.3f}")
-    print(f"     - Tempo di residenza (τ): {result['residence_time_min']:.2f} min")
-    print(f"     - Conversione media particelle (X_ave): {result['average_conversion']:.4f}")
-    print(f"     - Frazione attiva (fa): {result['active_fraction']:.4f}")
-    
+    if '2' in phases:
+        print("\n[FASE 2] Test di efficienza di cattura su un singolo punto operativo...")
+        conditions = {
+            'Ws_per_MW': 200,      # kg/MW
+            'F0_FCO2_ratio': 0.01, # Adimensionale
+            'FR_FCO2_ratio': 5     # Adimensionale
+        }
+
+        # MODIFICA: Chiamata e gestione dei nuovi risultati
+        result = advanced_analysis.capture_model.capture_efficiency(conditions)
+
+        print(f"   Condizioni operative:")
+        print(f"     - Inventario solidi (Ws): {conditions['Ws_per_MW']} kg/MW")
+        print(f"     - Rapporto makeup (F0/FCO2): {conditions['F0_FCO2_ratio']}")
+        print(f"     - Rapporto ricircolo (FR/FCO2): {conditions['FR_FCO2_ratio']}")
+        print(f"   Risultati Calcolati:")
+        print(f"     - Efficienza di cattura: {result['efficiency']:.3f}")
+        print(f"     - Efficienza fase cinetica: {result['efficiency_kinetic']:.3f}")
+        print(f"     - Efficienza fase diffusiva: {result['efficiency_diffusion']:.3f}")
+        print(f"     - Tempo di residenza (τ): {result['residence_time_min']:.2f} min")
+        print(f"     - Conversione media particelle (X_ave): {result['average_conversion']:.4f}")
+        print(f"     - Frazione attiva (fa): {result['active_fraction']:.4f}")
+        tables['2'] = [_result_row(conditions, result)]
+
     # ========== 3. STUDIO PARAMETRICO: EFFICIENZA VS INVENTARIO ==========
-    print("\n[FASE 3] Studio parametrico: Efficienza vs Inventario Solidi (simula Fig. 7)...")
     Ws_range = np.linspace(1, 400, 25)
-    FR_values = [5, 10, 20]
-    F0_FCO2_ratio = 0.01
-    advanced_analysis.plot_efficiency_vs_inventory(Ws_range, FR_values, F0_FCO2_ratio)
-    
+    if '3' in phases:
+        print("\n[FASE 3] Studio parametrico: Efficienza vs Inventario Solidi (simula Fig. 7)...")
+        FR_values = [5, 10, 20]
+        F0_FCO2_ratio = 0.01
+        tables['3'] = []
+        studies = []
+        for FR_FCO2_ratio in FR_values:
+            study = advanced_analysis.parametric_study(Ws_range, FR_FCO2_ratio, F0_FCO2_ratio)
+            studies.append(study)
+            print(f"   FR/FCO2 = {FR_FCO2_ratio}, F0/FCO2 = {F0_FCO2_ratio}:")
+            _print_study(study)
+            tables['3'] += _study_rows(study, FR_FCO2_ratio, F0_FCO2_ratio)
+        advanced_analysis.plot_efficiency_vs_inventory(Ws_range, FR_values, F0_FCO2_ratio, save_fig=make_plots,
+                                                       studies=studies)
+
     # ========== 4. STUDIO PARAMETRICO: EFFICIENZA VS TEMPO DI RESIDENZA ==========
-    print("\n[FASE 4] Analisi: Efficienza vs Tempo di Residenza (simula Fig. 9)...")
-    FR_FCO2_ratio_fixed = 5
-    F0_FCO2_ratio_fixed = 0.01
-    advanced_analysis.plot_efficiency_vs_residence_time(Ws_range, FR_FCO2_ratio_fixed, F0_FCO2_ratio_fixed)
-    
+    if '4' in phases:
+        print("\n[FASE 4] Analisi: Efficienza vs Tempo di Residenza (simula Fig. 9)...")
+        FR_FCO2_ratio_fixed = 5
+        F0_FCO2_ratio_fixed = 0.01
+        study = advanced_analysis.parametric_study(Ws_range, FR_FCO2_ratio_fixed, F0_FCO2_ratio_fixed)
+        print(f"   FR/FCO2 = {FR_FCO2_ratio_fixed}, F0/FCO2 = {F0_FCO2_ratio_fixed}:")
+        _print_study(study)
+        tables['4'] = _study_rows(study, FR_FCO2_ratio_fixed, F0_FCO2_ratio_fixed)
+        advanced_analysis.plot_efficiency_vs_residence_time(Ws_range, FR_FCO2_ratio_fixed, F0_FCO2_ratio_fixed,
+                                                            save_fig=make_plots, study=study)
+
     # ========== 5. OTTIMIZZAZIONE PARAMETRI OPERATIVI ==========
-    print("\n[FASE 5] Ottimizzazione parametri operativi tramite heatmap...")
-    Ws_opt_range = np.linspace(100, 500, 15)
-    FR_opt_range = np.linspace(3, 15, 15)
-    
-    # MODIFICA: Gestione dei nuovi risultati di ottimizzazione
-    best_conditions, _ = advanced_analysis.optimization_study(
-        Ws_opt_range, FR_opt_range, 0.01
-    )
-    
-    if best_conditions:
-        print("\n   Condizioni ottimali trovate:")
-        print(f"     - Ws ottimale: {best_conditions['Ws_per_MW']:.0f} kg/MW")
-        print(f"     - FR/FCO2 ottimale: {best_conditions['FR_FCO2_ratio']:.2f}")
-        print(f"     - F0/FCO2: {best_conditions['F0_FCO2_ratio']}")
-        print(f"     - Efficienza massima: {best_conditions['results']['efficiency']:.3f}")
-        print(f"     - Tempo residenza ottimale: {best_conditions['results']['residence_time_min']:.2f} min")
-        print(f"     - Frazione attiva ottimale: {best_conditions['results']['active_fraction']:.4f}")
-    
+    best_conditions = None
+    if '5' in phases:
+        print("\n[FASE 5] Ottimizzazione parametri operativi tramite heatmap...")
+        Ws_opt_range = np.linspace(100, 500, 15)
+        FR_opt_range = np.linspace(3, 15, 15)
+
+        # MODIFICA: Gestione dei nuovi risultati di ottimizzazione
+        best_conditions, _ = advanced_analysis.optimization_study(
+            Ws_opt_range, FR_opt_range, 0.01, save_fig=make_plots
+        )
+
+        if best_conditions:
+            print("\n   Condizioni ottimali trovate:")
+            print(f"     - Ws ottimale: {best_conditions['Ws_per_MW']:.0f} kg/MW")
+            print(f"     - FR/FCO2 ottimale: {best_conditions['FR_FCO2_ratio']:.2f}")
+            print(f"     - F0/FCO2: {best_conditions['F0_FCO2_ratio']}")
+            print(f"     - Efficienza massima: {best_conditions['results']['efficiency']:.3f}")
+            print(f"     - Tempo residenza ottimale: {best_conditions['results']['residence_time_min']:.2f} min")
+            print(f"     - Frazione attiva ottimale: {best_conditions['results']['active_fraction']:.4f}")
+            tables['5'] = [_result_row(best_conditions, best_conditions['results'])]
+        else:
+            tables['5'] = []
+
     # ========== 6. SUMMARY FINALE E CONFRONTO SCENARI ==========
-    print("\n[FASE 6] Summary finale e confronto scenari...")
-    
-    scenarios = [
-        {'name': 'Basso Inv.', 'Ws': 150, 'FR': 7, 'F0': 0.05},
-        {'name': 'Alto Inv.', 'Ws': 400, 'FR': 10, 'F0': 0.01},
-    ]
-    if best_conditions:
-         scenarios.append({
-             'name': 'Ottimale', 
-             'Ws': best_conditions['Ws_per_MW'], 
-             'FR': best_conditions['FR_FCO2_ratio'], 
-             'F0': 0.01
-         })
-
-    print(f"\n{'Scenario':<12} {'Ws':<8} {'FR/F_CO2':<10} {'F0/F_CO2':<10} {'Efficienza':<12} {'τ (min)':<8} {'fa':<8}")
-    print("-" * 75)
-    
-    for scenario in scenarios:
-        conditions = {
-            'Ws_per_MW': scenario['Ws'],
-            'F0_FCO2_ratio': scenario['F0'],
-            'FR_FCO2_ratio': scenario['FR']
-        }
-        
-        # MODIFICA: Calcolo e stampa con le nuove chiavi
-        result = advanced_analysis.capture_model.capture_efficiency(conditions)
-        
-        print(f"{scenario['name']:<12} {scenario['Ws']:<8.0f} {scenario['FR']:<10.2f} {scenario['F0']:<10.3f} "
-              f"{result['efficiency']:<12.3f} {result['residence_time_min']:<8.2f} {result['active_fraction']:<8.4f}")
-    
+    if '6' in phases:
+        print("\n[FASE 6] Summary finale e confronto scenari...")
+
+        scenarios = [
+            {'name': 'Basso Inv.', 'Ws': 150, 'FR': 7, 'F0': 0.05},
+            {'name': 'Alto Inv.', 'Ws': 400, 'FR': 10, 'F0': 0.01},
+        ]
+        if best_conditions:
+             scenarios.append({
+                 'name': 'Ottimale',
+                 'Ws': best_conditions['Ws_per_MW'],
+                 'FR': best_conditions['FR_FCO2_ratio'],
+                 'F0': 0.01
+             })
+
+        print(f"\n{'Scenario':<12} {'Ws':<8} {'FR/F_CO2':<10} {'F0/F_CO2':<10} {'Efficienza':<12} {'τ (min)':<8} {'fa':<8}")
+        print("-" * 75)
+
+        tables['6'] = []
+        for scenario in scenarios:
+            conditions = {
+                'Ws_per_MW': scenario['Ws'],
+                'F0_FCO2_ratio': scenario['F0'],
+                'FR_FCO2_ratio': scenario['FR']
+            }
+
+            # MODIFICA: Calcolo e stampa con le nuove chiavi
+            result = advanced_analysis.capture_model.capture_efficiency(conditions)
+
+            print(f"{scenario['name']:<12} {scenario['Ws']:<8.0f} {scenario['FR']:<10.2f} {scenario['F0']:<10.3f} "
+                  f"{result['efficiency']:<12.3f} {result['residence_time_min']:<8.2f} {result['active_fraction']:<8.4f}")
+            tables['6'].append({'scenario': scenario['name'], **_result_row(conditions, result)})
+
     # ========== 7. ANALISI DETTAGLIATA DELL'EFFICIENZA PER FASI ==========
-    print("\n[FASE 7] Analisi dettagliata del contributo delle fasi cinetica e diffusiva...")
-    
-    # Analizza come varia il contributo delle due fasi al variare del tempo di residenza
-    test_conditions = [
-        {'Ws': 100, 'FR': 20, 'F0': 0.01, 'name': 'Basso τ'},
-        {'Ws': 200, 'FR': 10, 'F0': 0.01, 'name': 'Medio τ'},
-        {'Ws': 400, 'FR': 5, 'F0': 0.01, 'name': 'Alto τ'}
-    ]
-    
-    print(f"\n{'Condizione':<12} {'τ (min)':<10} {'E_totale':<12} {'E_cinetica':<12} {'E_diffusiva':<12} {'% Diffusiva':<12}")
-    print("-" * 85)
-    
-    for test in test_conditions:
-        conditions = {
-            'Ws_per_MW': test['Ws'],
-            'F0_FCO2_ratio': test['F0'],
-            'FR_FCO2_ratio': test['FR']
-        }
-        
-        result = advanced_analysis.capture_model.capture_efficiency(conditions)
-        
-        # Calcola la percentuale di contributo della fase diffusiva
-        total_efficiency = result['efficiency']
-        diffusion_efficiency = result['efficiency_diffusion']
-        diffusion_percentage = (diffusion_efficiency / total_efficiency * 100) if total_efficiency > 0 else 0
-        
-        print(f"{test['name']:<12} {result['residence_time_min']:<10.2f} {result['efficiency']:<12.3f} "
-              f"{result['efficiency_kinetic']:<12.3f} {result['efficiency_diffusion']:<12.3f} {diffusion_percentage:<12.1f}")
-    
+    if '7' in phases:
+        print("\n[FASE 7] Analisi dettagliata del contributo delle fasi cinetica e diffusiva...")
+
+        # Analizza come varia il contributo delle due fasi al variare del tempo di residenza
+        test_conditions = [
+            {'Ws': 100, 'FR': 20, 'F0': 0.01, 'name': 'Basso τ'},
+            {'Ws': 200, 'FR': 10, 'F0': 0.01, 'name': 'Medio τ'},
+            {'Ws': 400, 'FR': 5, 'F0': 0.01, 'name': 'Alto τ'}
+        ]
+
+        print(f"\n{'Condizione':<12} {'τ (min)':<10} {'E_totale':<12} {'E_cinetica':<12} {'E_diffusiva':<12} {'% Diffusiva':<12}")
+        print("-" * 85)
+
+        tables['7'] = []
+        for test in test_conditions:
+            conditions = {
+                'Ws_per_MW': test['Ws'],
+                'F0_FCO2_ratio': test['F0'],
+                'FR_FCO2_ratio': test['FR']
+            }
+
+            result = advanced_analysis.capture_model.capture_efficiency(conditions)
+
+            # Calcola la percentuale di contributo della fase diffusiva
+            total_efficiency = result['efficiency']
+            diffusion_efficiency = result['efficiency_diffusion']
+            diffusion_percentage = (diffusion_efficiency / total_efficiency * 100) if total_efficiency > 0 else 0
+
+            print(f"{test['name']:<12} {result['residence_time_min']:<10.2f} {result['efficiency']:<12.3f} "
+                  f"{result['efficiency_kinetic']:<12.3f} {result['efficiency_diffusion']:<12.3f} {diffusion_percentage:<12.1f}")
+            tables['7'].append({'condition': test['name'], **_result_row(conditions, result),
+                                'diffusion_percentage': float(diffusion_percentage)})
+
     print("\n=== CONCLUSIONI CHIAVE ===")
     print("1. I tassi di reazione diminuiscono con il numero di cicli a causa della disattivazione del sorbente")
     print("2. Tempi di residenza più lunghi favoriscono la fase diffusiva, aumentando l'efficienza totale")
     print("3. La fase diffusiva diventa sempre più importante per tempi di residenza elevati")
     print("4. L'ottimizzazione deve bilanciare inventario solidi, flussi di ricircolo e efficienza desiderata")
-    
+
     print("\n=== ANALISI COMPLETATA ===")
-    print("I grafici sono stati generati e mostrati a schermo.")
-    print("File salvati in /data:")
-    print("  - conversion_vs_cycles.png")
-    print("  - reaction_rates_vs_cycles.png")
+    if make_plots:
+        figures = render_figures()
+        set_figure_renderer(previous_renderer)
+        print("I grafici sono stati generati.")
+        print(f"File salvati in {renderer.output_dir}:")
+        for figure in figures:
+            status = f"{figure['seconds']:.1f} s" if figure['rendered'] else "già aggiornato"
+            print(f"  - {os.path.basename(figure['path'])} ({status})")
+
+    return tables
+
+
+def _result_row(conditions, result):
+    """Riga di tabella piatta da condizioni operative e risultato di capture_efficiency"""
+    row = {
+        'Ws_per_MW': float(conditions['Ws_per_MW']),
+        'F0_FCO2_ratio': float(conditions['F0_FCO2_ratio']),
+        'FR_FCO2_ratio': float(conditions['FR_FCO2_ratio'])
+    }
+    row.update({key: float(value) for key, value in result.items() if key not in ('flows', 'error')})
+    return row
+
+
+def _study_rows(study, FR_FCO2_ratio, F0_FCO2_ratio):
+    """Righe di tabella dai risultati di parametric_study"""
+    return [
+        {'Ws_per_MW': Ws, 'FR_FCO2_ratio': float(FR_FCO2_ratio), 'F0_FCO2_ratio': float(F0_FCO2_ratio),
+         'residence_time_min': tau, 'efficiency': efficiency, 'average_conversion': X}
+        for Ws, tau, efficiency, X in zip(study['Ws_per_MW'], study['residence_time_min'],
+                                          study['efficiency'], study['average_conversion'])
+    ]
+
+
+def _print_study(study, rows=5):
+    """Stampa alcune righe equispaziate dei risultati di parametric_study"""
+    n = len(study['Ws_per_MW'])
+    print(f"     {'Ws [kg/MW]':>10} {'τ [min]':>9} {'Efficienza':>10} {'X_ave':>8}")
+    for i in sorted(set(np.linspace(0, n - 1, min(rows, n)).round().astype(int).tolist())):
+        print(f"     {study['Ws_per_MW'][i]:>10.1f} {study['residence_time_min'][i]:>9.2f} "
+              f"{study['efficiency'][i]:>10.3f} {study['average_conversion'][i]:>8.4f}")
+
+
+def write_tables(tables, output_dir, output_format='json'):
+    """
+    Salva le tabelle delle fasi in output_dir: un unico 'results.json' oppure un
+    file 'phase_<id>.csv' per fase.
+
+    Returns:
+        list: Percorsi dei file scritti.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    if output_format == 'json':
+        path = os.path.join(output_dir, 'results.json')
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(tables, f, indent=2, ensure_ascii=False)
+        return [path]
+
+    paths = []
+    for phase, rows in tables.items():
+        path = os.path.join(output_dir, f"phase_{phase.replace('.', '_')}.csv")
+        fieldnames = list(dict.fromkeys(key for row in rows for key in row))
+        with open(path, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.DictWriter(f, fieldnames=fieldnames)
+            writer.writeheader()
+            writer.writerows(rows)
+        paths.append(path)
+    return paths
+
+
+def parse_args(argv=None):
+    """Argomenti da riga di comando per l'esecuzione batch di main()"""
+    parser = argparse.ArgumentParser(description="Modello Calcium Looping - analisi completa")
+    parser.add_argument('--phases', default=','.join(PHASES),
+                        help=f"fasi da eseguire separate da virgola (default: {','.join(PHASES)})")
+    parser.add_argument('--headless', action='store_true',
+                        help="usa il backend non interattivo Agg: i grafici vengono salvati ma non mostrati")
+    parser.add_argument('--no-plots', action='store_true',
+                        help="non genera né salva alcun grafico (implica --headless)")
+    parser.add_argument('--output-dir', default=None,
+                        help="cartella in cui scrivere le tabelle dei risultati delle fasi")
+    parser.add_argument('--format', choices=('json', 'csv'), default='json',
+                        help="formato delle tabelle scritte in --output-dir (default: json)")
+    parser.add_argument('--result-store', default=None, metavar='DIR',
+                        help="cartella in cui salvare e da cui rileggere i risultati degli studi")
+    parser.add_argument('--result-store-max-mb', type=float, default=2048,
+                        help="dimensione massima dell'archivio dei risultati in MB (default: 2048)")
+    parser.add_argument('--params', default=None, metavar='FILE',
+                        help="file JSON con i parametri del modello (i campi assenti prendono il default)")
+    parser.add_argument('--figure-format', choices=RENDER_FORMATS, default='png',
+                        help="formato dei grafici salvati (default: png)")
+    parser.add_argument('--figure-dpi', type=int, default=300,
+                        help="risoluzione dei grafici salvati (default: 300)")
+    parser.add_argument('--figure', action='append', default=[], metavar='NOME=FORMATO[@DPI]',
+                        help="formato e risoluzione di un singolo grafico, es. optimization_map=png@150 "
+                             "(ripetibile)")
+    parser.add_argument('--render-workers', type=int, default=None,
+                        help="processi per il salvataggio dei grafici (default: tutti i core)")
+    parser.add_argument('--force-render', action='store_true',
+                        help="ridisegna tutti i grafici anche se già aggiornati")
+    args = parser.parse_args(argv)
+
+    args.phases = [phase.strip() for phase in args.phases.split(',') if phase.strip()]
+    unknown = [phase for phase in args.phases if phase not in PHASES]
+    if unknown:
+        parser.error(f"fasi sconosciute: {', '.join(unknown)} (valori ammessi: {', '.join(PHASES)})")
+
+    args.figure_options = {}
+    for option in args.figure:
+        name, _, spec = option.partition('=')
+        output_format, _, dpi = spec.partition('@')
+        if not name or output_format not in RENDER_FORMATS or (dpi and not dpi.isdigit()):
+            parser.error(f"opzione --figure non valida: {option!r} (atteso NOME=FORMATO[@DPI], "
+                         f"formati: {', '.join(RENDER_FORMATS)})")
+        args.figure_options[name] = {'format': output_format, **({'dpi': int(dpi)} if dpi else {})}
+    return args
+
+
+def run_cli(argv=None):
+    """Esegue main() con le opzioni da riga di comando"""
+    args = parse_args(argv)
+    if args.headless or args.no_plots:
+        configure_plotting(enabled=not args.no_plots, show=False, backend='Agg')
+
+    result_store = None
+    if args.result_store:
+        result_store = ResultStore(args.result_store, max_bytes=int(args.result_store_max_mb * 1024 ** 2))
+
+    params = ModelParameters.from_json(path=args.params) if args.params else None
+
+    renderer = FigureRenderer('data', dpi=args.figure_dpi, output_format=args.figure_format,
+                              figure_options=args.figure_options, n_workers=args.render_workers,
+                              force=args.force_render)
+
+    tables = main(args.phases, make_plots=not args.no_plots, result_store=result_store, params=params,
+                  renderer=renderer)
+
+    if args.output_dir:
+        for path in write_tables(tables, args.output_dir, args.format):
+            print(f"--> Tabella salvata in {path}")
+    return tables
 
 def run_quick_test():
     """Funzione per test rapidi durante lo sviluppo"""
     print("=== TEST RAPIDO ===")
-    
+
     model = CalciumLoopingModel()
-    
+
     # Test solo della nuova funzionalità
     print("Testando plot dei tassi di reazione...")
     model.plot_reaction_rates_vs_cycles(max_cycles=10)
-    
+
     print("Test completato!")
 
 if __name__ == "__main__":
     # Decommentare la linea desiderata:
-    main()  # Analisi completa
-    # run_quick_test()  # Solo test rapido
\ No newline at end of file
+    run_cli()  # Analisi completa (vedi --help per le opzioni)
+    # run_quick_test()  # Solo test rapido
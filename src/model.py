@@ -4,19 +4,301 @@ Modello principale per il processo Calcium Looping.
 Adattato per funzionare con le equazioni corrette.
 """
 
+import os
+
 import numpy as np
-import matplotlib.pyplot as plt
-import pandas as pd
 from equations import CarbonCaptureModel, CineticModelEquation
-from parameters import ModelParameters
+from instrumentation import Instrumentation, instrumented
+from lazy_import import lazy_module
+
+# matplotlib viene importato solo alla prima figura (o a configure_plotting con backend)
+plt = lazy_module('matplotlib.pyplot')
+mcollections = lazy_module('matplotlib.collections')
+
+# Impostazioni grafiche condivise da tutti i metodi di plot (vedi configure_plotting)
+_plot_settings = {'enabled': True, 'show': True, 'renderer': None}
+
+# Oltre questo numero di cicli le curve della conversione nel tempo usano una barra dei colori
+MAX_LEGEND_CYCLES = 12
+
+
+def configure_plotting(enabled=True, show=True, backend=None):
+    """
+    Configura la generazione dei grafici.
+
+    Args:
+        enabled (bool): Se False i metodi di plot non creano alcuna figura
+            (le analisi e le stampe vengono comunque eseguite).
+        show (bool): Se False le figure vengono salvate (se richiesto) e chiuse
+            senza chiamare plt.show(), che blocca con i backend interattivi.
+        backend (str): Backend matplotlib da attivare (es. 'Agg' per l'uso headless).
+    """
+    if backend is not None:
+        plt.switch_backend(backend)
+    _plot_settings['enabled'] = enabled
+    _plot_settings['show'] = show
+
+
+def _show_figure():
+    """Mostra la figura corrente oppure, in modalità non interattiva, la chiude"""
+    if _plot_settings['show']:
+        plt.show()
+    else:
+        plt.close()
+
+
+def set_figure_renderer(renderer):
+    """
+    Affida i grafici con save_fig=True a un rendering.FigureRenderer, che li salva
+    in parallelo e solo se cambiati (None: salvataggio immediato in data/ a 300 dpi).
+
+    Returns:
+        FigureRenderer: Il renderer configurato in precedenza.
+    """
+    previous = _plot_settings['renderer']
+    _plot_settings['renderer'] = renderer
+    return previous
+
+
+def render_figures():
+    """Salva le figure accodate nel renderer configurato (vedi FigureRenderer.render)"""
+    renderer = _plot_settings['renderer']
+    return renderer.render() if renderer is not None else []
+
+
+def _output_figure(name, draw, data, save_fig):
+    """
+    Disegna la figura con draw(data) e la mostra; se save_fig la salva come
+    data/<name>.png oppure la accoda al renderer configurato, senza disegnarla qui
+    se non va mostrata.
+    """
+    renderer = _plot_settings['renderer']
+    if save_fig and renderer is not None:
+        renderer.submit(name, draw, data)
+        if not _plot_settings['show']:
+            return
+        save_fig = False
+    figure = draw(data)
+    if save_fig:
+        figure.savefig(f'data/{name}.png', dpi=300, bbox_inches='tight')
+    _show_figure()
+
+
+# Funzioni di disegno delle figure salvabili: a livello di modulo perché il renderer
+# le esegue nei processi worker; ognuna crea e restituisce la propria figura.
+
+def _draw_multicycle_behavior(data):
+    """Conversione massima vs numero di cicli (Fig. 3)"""
+    figure = plt.figure(figsize=(10, 6))
+    
+    plt.plot(data['cycles'], data['conversion_kinetic'], 
+             'o-', color='red', linewidth=2, markersize=6, 
+             label='Fase Cinetica (X$_{NK}$)')
+    
+    plt.plot(data['cycles'], data['conversion_diffusion'], 
+             's-', color='blue', linewidth=2, markersize=6,
+             label='Fase Diffusiva (X$_{ND}$)')
+
+    plt.plot(data['cycles'], data['conversion_kinetic'] + data['conversion_diffusion'],
+             '^-', color='black', linewidth=2, markersize=6, linestyle='--',
+             label='Conversione Totale Massima (X$_{N,max}$)')
+    
+    plt.xlabel('Numero di Cicli (N)', fontsize=12)
+    plt.ylabel('Conversione CaO', fontsize=12)
+    plt.title('Conversione Massima CaO vs Numero di Cicli', fontsize=14)
+    plt.legend(fontsize=11)
+    plt.grid(True, alpha=0.3)
+    plt.tight_layout()
+    return figure
+
+
+def _draw_reaction_rates(data):
+    """Tassi di reazione cinetica e diffusiva vs numero di cicli (Fig. 5)"""
+    figure = plt.figure(figsize=(12, 8))
+
+    # Plot tasso di reazione cinetica
+    plt.plot(data['cycles'], data['rates_kinetic'], 
+             'o-', color='red', linewidth=2.5, markersize=8, 
+             label='Tasso Reazione Cinetica (r$_{NK}$)', markerfacecolor='white', markeredgewidth=2)
+
+    # Plot tasso di reazione diffusiva
+    plt.plot(data['cycles'], data['rates_diffusion'], 
+             's-', color='blue', linewidth=2.5, markersize=8,
+             label='Tasso Reazione Diffusiva (r$_{ND}$)', markerfacecolor='white', markeredgewidth=2)
+
+    plt.xlabel('Numero di Cicli (N)', fontsize=14)
+    plt.ylabel('Tasso di Reazione (min$^{-1}$)', fontsize=14)
+    plt.title('Tassi di Reazione Cinetica e Diffusiva vs Numero di Cicli', fontsize=16)
+    plt.legend(fontsize=12, loc='upper right')
+    plt.grid(True, alpha=0.3, linestyle='--')
+    plt.xlim(1, data['max_cycles'])
+    plt.ylim(bottom=0)
+
+    # Aggiungi annotazioni per evidenziare il comportamento
+    if len(data['rates_kinetic']) > 1:
+        # Trova il punto dove il tasso cinetico si stabilizza
+        kinetic_final = data['rates_kinetic'][-1]
+        plt.axhline(y=kinetic_final, color='red', linestyle=':', alpha=0.7, 
+                   label=f'r$_{{NK}}$ residuale ≈ {kinetic_final:.4f}')
+
+    if len(data['rates_diffusion']) > 1:
+        # Trova il punto dove il tasso diffusivo si stabilizza
+        diffusion_final = data['rates_diffusion'][-1]
+        plt.axhline(y=diffusion_final, color='blue', linestyle=':', alpha=0.7,
+                   label=f'r$_{{ND}}$ residuale ≈ {diffusion_final:.4f}')
+
+    plt.legend(fontsize=11, loc='upper right')
+    plt.tight_layout()
+    return figure
+
+
+def _draw_multiple_cycles_conversion(data):
+    """Conversione nel tempo per più cicli, dalla superficie cicli × tempi"""
+    figure = plt.figure(figsize=(12, 8))
+
+    colors = ['blue', 'red', 'green', 'orange', 'purple', 'brown']
+    cycle_list = data['cycles']
+    time_array = data['time']
+    conversion = data['conversion']
+    t_kinetic = data['t_kinetic']
+    max_time_min = data['max_time_min']
+    max_conversion = max(0, conversion.max()) if conversion.size else 0
+
+    if len(cycle_list) <= MAX_LEGEND_CYCLES:
+        # Plot delle curve per ogni ciclo
+        for i, (N, conversions) in enumerate(zip(cycle_list, conversion)):
+            color = colors[i % len(colors)]
+        
+            plt.plot(time_array, conversions, '-', color=color, linewidth=3, 
+                    label=f'Ciclo N={N}', markersize=6)
+    else:
+        # Molti cicli: un'unica collezione di linee colorata per ciclo, con barra dei colori
+        segments = np.stack(np.broadcast_arrays(time_array[None, :], conversion), axis=-1)
+        lines = mcollections.LineCollection(segments, cmap='viridis', linewidths=1)
+        lines.set_array(np.asarray(cycle_list, dtype=float))
+        plt.gca().add_collection(lines)
+        plt.colorbar(lines, ax=plt.gca(), label='Ciclo N')
+
+    # Aggiungi linea verticale per il tempo di transizione cinetica-diffusiva
+    plt.axvline(x=t_kinetic, color='black', linestyle='--', alpha=0.8, linewidth=2,
+               label=f'Fine fase cinetica (t = {t_kinetic} min)')
+
+    # Aggiungi regioni per evidenziare le fasi
+    plt.axvspan(0, t_kinetic, alpha=0.1, color='red', label='Fase Cinetica')
+    plt.axvspan(t_kinetic, max_time_min, alpha=0.1, color='blue', label='Fase Diffusiva')
+
+    plt.xlabel('Tempo di Residenza (min)', fontsize=14)
+    plt.ylabel('Conversione CaO', fontsize=14)
+    plt.title('Evoluzione della Conversione nel Tempo per Diversi Cicli', fontsize=16)
+
+    # Legenda ordinata per importanza
+    handles, labels = plt.gca().get_legend_handles_labels()
+    # Riordina per mettere prima i cicli, poi le fasi
+    cycle_handles = [h for h, l in zip(handles, labels) if 'Ciclo N=' in l]
+    cycle_labels = [l for l in labels if 'Ciclo N=' in l]
+    other_handles = [h for h, l in zip(handles, labels) if 'Ciclo N=' not in l]
+    other_labels = [l for l in labels if 'Ciclo N=' not in l]
+
+    plt.legend(cycle_handles + other_handles, cycle_labels + other_labels, 
+              fontsize=12, loc='lower right')
+
+    plt.grid(True, alpha=0.3, linestyle='-', linewidth=0.5)
+    plt.xlim(0, max_time_min)
+    plt.ylim(0, max_conversion * 1.1)
+    plt.tight_layout()
+    return figure
+
+
+def _draw_efficiency_vs_inventory(data):
+    """Efficienza vs inventario solidi per più rapporti FR/FCO2 (Fig. 7 e 8)"""
+    figure = plt.figure(figsize=(12, 8))
+    colors = ['red', 'blue', 'green']
+
+    for i, curve in enumerate(data['curves']):
+        plt.plot(curve['Ws_per_MW'], curve['efficiency'], 
+                 'o-', color=colors[i % len(colors)], linewidth=2.5, markersize=7,
+                 label=f"FR/FCO2 = {curve['FR_FCO2_ratio']}")
+
+    plt.xlabel('Inventario Solidi Ws (kg/MW)', fontsize=12)
+    plt.ylabel('Efficienza di Cattura CO2', fontsize=12)
+    plt.title(f"Efficienza di Cattura vs Inventario Solidi\n(F0/FCO2 = {data['F0_FCO2_ratio']})", fontsize=14)
+    plt.legend()
+    plt.grid(True, which='both', linestyle='--', linewidth=0.5)
+    plt.ylim(0, 1)
+    plt.xlim(left=0)
+    plt.tight_layout()
+    return figure
+
+
+def _draw_efficiency_vs_residence_time(data):
+    """Efficienza e conversione media vs tempo di residenza (Fig. 9)"""
+    fig, ax1 = plt.subplots(figsize=(12, 7))
+    
+    color = 'tab:blue'
+    ax1.set_xlabel('Tempo di Residenza τ (min)', fontsize=12)
+    ax1.set_ylabel('Efficienza di Cattura CO2', fontsize=12, color=color)
+    ax1.plot(data['residence_time_min'], data['efficiency'], 'o-', color=color, linewidth=2.5)
+    ax1.tick_params(axis='y', labelcolor=color)
+    ax1.set_ylim(0, 1)
+    ax1.grid(True, linestyle='--', linewidth=0.5)
+
+    # Aggiungo un secondo asse y per mostrare la conversione media
+    ax2 = ax1.twinx()
+    color = 'tab:red'
+    ax2.set_ylabel('Conversione Media Particelle (X_ave)', fontsize=12, color=color)
+    ax2.plot(data['residence_time_min'], data['average_conversion'], 's--', color=color, linewidth=2)
+    ax2.tick_params(axis='y', labelcolor=color)
+    ax2.set_ylim(bottom=0)
+
+    plt.title(f"Efficienza vs Tempo di Residenza\n(FR/FCO2={data['FR_FCO2_ratio']}, "
+              f"F0/FCO2={data['F0_FCO2_ratio']})", fontsize=14)
+    fig.tight_layout()
+    return fig
+
+
+def _draw_optimization_map(data):
+    """Heatmap dell'efficienza sulla griglia Ws × FR con il punto di ottimo"""
+    Ws_range = data['Ws_range']
+    FR_range = data['FR_range']
+    figure = plt.figure(figsize=(10, 8))
+    im = plt.imshow(data['results_matrix'], cmap='viridis', aspect='auto', origin='lower',
+                    extent=[FR_range.min(), FR_range.max(), Ws_range.min(), Ws_range.max()])
+
+    plt.colorbar(im, label='Efficienza di Cattura CO2')
+    plt.xlabel('Rapporto Ricircolo (FR/FCO2)')
+    plt.ylabel('Inventario Solidi Ws (kg/MW)')
+    plt.title('Mappa di Ottimizzazione Efficienza di Cattura')
+
+    # Aggiungi punto di ottimo
+    if data['best_point'] is not None:
+        FR_best, Ws_best = data['best_point']
+        plt.plot(FR_best, Ws_best, 'r*',
+                 markersize=15, label=f"Ottimo ({data['best_efficiency']:.3f})")
+        plt.legend()
+
+    plt.tight_layout()
+    return figure
+
 
 class CalciumLoopingModel:
     """Modello completo del processo Calcium Looping"""
     
-    def __init__(self):
-        self.equations = CineticModelEquation()
-        self.params = ModelParameters()
+    def __init__(self, params=None):
+        """
+        Args:
+            params (ModelParameters): Parametri del modello; default ModelParameters().
+        """
+        self.equations = CineticModelEquation(params)
         self.results = {}
+
+    @property
+    def params(self):
+        """Parametri del modello (gli stessi delle equazioni cinetiche)"""
+        return self.equations.params
+
+    @params.setter
+    def params(self, params):
+        self.equations.params = params
     
     def multicycle_analysis(self, max_cycles=20):
         """
@@ -25,17 +307,14 @@ class CalciumLoopingModel:
         """
         cycles = np.arange(1, max_cycles + 1)
         
-        conversions_kinetic = [self.equations.conversion_cycle_N(N, 'kinetic') for N in cycles]
-        conversions_diffusion = [self.equations.conversion_cycle_N(N, 'diffusion') for N in cycles]
+        conversions_kinetic = self.equations.conversion_cycle_N_array(cycles, 'kinetic')
+        conversions_diffusion = self.equations.conversion_cycle_N_array(cycles, 'diffusion')
         
         # Salva risultati
         self.results['cycles'] = cycles
-        self.results['conversion_kinetic'] = np.array(conversions_kinetic)
-        self.results['conversion_diffusion'] = np.array(conversions_diffusion)
+        self.results['conversion_kinetic'] = conversions_kinetic
+        self.results['conversion_diffusion'] = conversions_diffusion
 
-        print("HERE:")
-        print(self.results['conversion_kinetic'])
-        
         return self.results
     
     def reaction_rate_analysis(self, max_cycles=20):
@@ -45,21 +324,22 @@ class CalciumLoopingModel:
         """
         cycles = np.arange(1, max_cycles + 1)
         
-        # Calcola i tassi di reazione per ogni ciclo
-        rates_kinetic = []
-        rates_diffusion = []
+        # Calcola i tassi di reazione per tutti i cicli in un'unica espressione
+        XNK = self.equations.conversion_cycle_N_array(cycles, 'kinetic')
+        XND = self.equations.conversion_cycle_N_array(cycles, 'diffusion')
         
-        for N in cycles:
-            # Tasso di reazione cinetica: rNK = XNK / tK
-            XNK = self.equations.conversion_cycle_N(N, 'kinetic')
-            rNK = XNK / self.params.t_kinetic if self.params.t_kinetic > 0 else 0
-            rates_kinetic.append(rNK)
-            
-            # Tasso di reazione diffusiva: rND = XND / (T0 - tK)
-            XND = self.equations.conversion_cycle_N(N, 'diffusion')
-            diffusion_time = self.params.T0 - self.params.t_kinetic
-            rND = XND / diffusion_time if diffusion_time > 0 else 0
-            rates_diffusion.append(rND)
+        # Tasso di reazione cinetica: rNK = XNK / tK
+        if self.params.t_kinetic > 0:
+            rates_kinetic = XNK / self.params.t_kinetic
+        else:
+            rates_kinetic = np.zeros_like(XNK)
+        
+        # Tasso di reazione diffusiva: rND = XND / (T0 - tK)
+        diffusion_time = self.params.T0 - self.params.t_kinetic
+        if diffusion_time > 0:
+            rates_diffusion = XND / diffusion_time
+        else:
+            rates_diffusion = np.zeros_like(XND)
         
         # Salva risultati
         self.results['reaction_rate_cycles'] = cycles
@@ -82,46 +362,14 @@ class CalciumLoopingModel:
         if 'reaction_rate_cycles' not in self.results:
             self.reaction_rate_analysis(max_cycles)
         
-        plt.figure(figsize=(12, 8))
-        
-        # Plot tasso di reazione cinetica
-        plt.plot(self.results['reaction_rate_cycles'], self.results['reaction_rate_kinetic'], 
-                 'o-', color='red', linewidth=2.5, markersize=8, 
-                 label='Tasso Reazione Cinetica (r$_{NK}$)', markerfacecolor='white', markeredgewidth=2)
-        
-        # Plot tasso di reazione diffusiva
-        plt.plot(self.results['reaction_rate_cycles'], self.results['reaction_rate_diffusion'], 
-                 's-', color='blue', linewidth=2.5, markersize=8,
-                 label='Tasso Reazione Diffusiva (r$_{ND}$)', markerfacecolor='white', markeredgewidth=2)
-        
-        plt.xlabel('Numero di Cicli (N)', fontsize=14)
-        plt.ylabel('Tasso di Reazione (min$^{-1}$)', fontsize=14)
-        plt.title('Tassi di Reazione Cinetica e Diffusiva vs Numero di Cicli', fontsize=16)
-        plt.legend(fontsize=12, loc='upper right')
-        plt.grid(True, alpha=0.3, linestyle='--')
-        plt.xlim(1, max_cycles)
-        plt.ylim(bottom=0)
-        
-        # Aggiungi annotazioni per evidenziare il comportamento
-        if len(self.results['reaction_rate_kinetic']) > 1:
-            # Trova il punto dove il tasso cinetico si stabilizza
-            kinetic_final = self.results['reaction_rate_kinetic'][-1]
-            plt.axhline(y=kinetic_final, color='red', linestyle=':', alpha=0.7, 
-                       label=f'r$_{{NK}}$ residuale ≈ {kinetic_final:.4f}')
-        
-        if len(self.results['reaction_rate_diffusion']) > 1:
-            # Trova il punto dove il tasso diffusivo si stabilizza
-            diffusion_final = self.results['reaction_rate_diffusion'][-1]
-            plt.axhline(y=diffusion_final, color='blue', linestyle=':', alpha=0.7,
-                       label=f'r$_{{ND}}$ residuale ≈ {diffusion_final:.4f}')
-        
-        plt.legend(fontsize=11, loc='upper right')
-        plt.tight_layout()
-        
-        if save_fig:
-            plt.savefig('data/reaction_rates_vs_cycles.png', dpi=300, bbox_inches='tight')
-        
-        plt.show()
+        if _plot_settings['enabled']:
+            data = {
+                'cycles': self.results['reaction_rate_cycles'],
+                'rates_kinetic': self.results['reaction_rate_kinetic'],
+                'rates_diffusion': self.results['reaction_rate_diffusion'],
+                'max_cycles': max_cycles,
+            }
+            _output_figure('reaction_rates_vs_cycles', _draw_reaction_rates, data, save_fig)
         
         # Stampa statistiche
         print("\n=== ANALISI TASSI DI REAZIONE ===")
@@ -140,40 +388,36 @@ class CalciumLoopingModel:
         if 'cycles' not in self.results:
             self.multicycle_analysis()
         
-        plt.figure(figsize=(10, 6))
-        
-        plt.plot(self.results['cycles'], self.results['conversion_kinetic'], 
-                 'o-', color='red', linewidth=2, markersize=6, 
-                 label='Fase Cinetica (X$_{NK}$)')
-        
-        plt.plot(self.results['cycles'], self.results['conversion_diffusion'], 
-                 's-', color='blue', linewidth=2, markersize=6,
-                 label='Fase Diffusiva (X$_{ND}$)')
+        if not _plot_settings['enabled']:
+            return
 
-        plt.plot(self.results['cycles'], self.results['conversion_kinetic'] + self.results['conversion_diffusion'],
-                 '^-', color='black', linewidth=2, markersize=6, linestyle='--',
-                 label='Conversione Totale Massima (X$_{N,max}$)')
-        
-        plt.xlabel('Numero di Cicli (N)', fontsize=12)
-        plt.ylabel('Conversione CaO', fontsize=12)
-        plt.title('Conversione Massima CaO vs Numero di Cicli', fontsize=14)
-        plt.legend(fontsize=11)
-        plt.grid(True, alpha=0.3)
-        plt.tight_layout()
-        
-        if save_fig:
-            plt.savefig('data/conversion_vs_cycles.png', dpi=300, bbox_inches='tight')
-        
-        plt.show()
+        data = {key: self.results[key] for key in ('cycles', 'conversion_kinetic', 'conversion_diffusion')}
+        _output_figure('conversion_vs_cycles', _draw_multicycle_behavior, data, save_fig)
+
+    def conversion_surface(self, cycle_list, max_time_min=30, time_points=100):
+        """
+        Conversione nel tempo per più cicli come un'unica superficie cicli × tempi
+        (vedi CineticModelEquation.conversion_surface), su time_points tempi tra 0 e
+        max_time_min. Alimenta i grafici della conversione nel tempo e il loro riepilogo.
+
+        Returns:
+            dict: 'cycles', 'time', 'XNK', 'XND' e 'conversion' (cicli × tempi).
+        """
+        time_array = np.linspace(0, max_time_min, time_points)
+        return self.equations.conversion_surface(cycle_list, time_array)
 
     def conversion_vs_time_for_cycle_N(self, N, max_time_min=30, time_points=100):
         """
         Mostra l'evoluzione della conversione nel tempo per un ciclo specifico N.
         Utile per visualizzare le fasi cinetiche e diffusive.
         """
-        time_array = np.linspace(0, max_time_min, time_points)
-        conversions = [self.equations.conversion_at_time_t(N, t) for t in time_array]
+        surface = self.conversion_surface([N], max_time_min, time_points)
+        time_array = surface['time']
+        conversions = surface['conversion'][0]
         
+        if not _plot_settings['enabled']:
+            return
+
         plt.figure(figsize=(10, 6))
         plt.plot(time_array, conversions, 'b-', linewidth=2.5, label=f'Ciclo N={N}')
         
@@ -182,8 +426,8 @@ class CalciumLoopingModel:
                    label=f'Fine fase cinetica (t = {self.params.t_kinetic} min)')
         
         # Aggiungi linee orizzontali per le conversioni massime
-        XNK = self.equations.conversion_cycle_N(N, 'kinetic')
-        XND = self.equations.conversion_cycle_N(N, 'diffusion')
+        XNK = float(surface['XNK'][0])
+        XND = float(surface['XND'][0])
         plt.axhline(y=XNK, color='orange', linestyle=':', alpha=0.7,
                    label=f'X$_{{NK}}$ = {XNK:.3f}')
         plt.axhline(y=XNK+XND, color='green', linestyle=':', alpha=0.7,
@@ -197,7 +441,7 @@ class CalciumLoopingModel:
         plt.xlim(0, max_time_min)
         plt.ylim(0, max(conversions)*1.1)
         plt.tight_layout()
-        plt.show()
+        _show_figure()
 
     def plot_multiple_cycles_conversion_vs_time(self, cycle_list, max_time_min=30, time_points=100, save_fig=False):
         """
@@ -209,201 +453,483 @@ class CalciumLoopingModel:
             time_points (int): Numero di punti per la discretizzazione temporale
             save_fig (bool): Se salvare il grafico
         """
-        plt.figure(figsize=(12, 8))
-        
-        colors = ['blue', 'red', 'green', 'orange', 'purple', 'brown']
-        time_array = np.linspace(0, max_time_min, time_points)
-        
-        max_conversion = 0
-        
-        # Plot delle curve per ogni ciclo
-        for i, N in enumerate(cycle_list):
-            conversions = [self.equations.conversion_at_time_t(N, t) for t in time_array]
-            color = colors[i % len(colors)]
-            
-            plt.plot(time_array, conversions, '-', color=color, linewidth=3, 
-                    label=f'Ciclo N={N}', markersize=6)
-            
-            max_conversion = max(max_conversion, max(conversions))
-        
-        # Aggiungi linea verticale per il tempo di transizione cinetica-diffusiva
-        plt.axvline(x=self.params.t_kinetic, color='black', linestyle='--', alpha=0.8, linewidth=2,
-                   label=f'Fine fase cinetica (t = {self.params.t_kinetic} min)')
-        
-        # Aggiungi regioni per evidenziare le fasi
-        plt.axvspan(0, self.params.t_kinetic, alpha=0.1, color='red', label='Fase Cinetica')
-        plt.axvspan(self.params.t_kinetic, max_time_min, alpha=0.1, color='blue', label='Fase Diffusiva')
-        
-        plt.xlabel('Tempo di Residenza (min)', fontsize=14)
-        plt.ylabel('Conversione CaO', fontsize=14)
-        plt.title('Evoluzione della Conversione nel Tempo per Diversi Cicli', fontsize=16)
-        
-        # Legenda ordinata per importanza
-        handles, labels = plt.gca().get_legend_handles_labels()
-        # Riordina per mettere prima i cicli, poi le fasi
-        cycle_handles = [h for h, l in zip(handles, labels) if 'Ciclo N=' in l]
-        cycle_labels = [l for l in labels if 'Ciclo N=' in l]
-        other_handles = [h for h, l in zip(handles, labels) if 'Ciclo N=' not in l]
-        other_labels = [l for l in labels if 'Ciclo N=' not in l]
-        
-        plt.legend(cycle_handles + other_handles, cycle_labels + other_labels, 
-                  fontsize=12, loc='lower right')
-        
-        plt.grid(True, alpha=0.3, linestyle='-', linewidth=0.5)
-        plt.xlim(0, max_time_min)
-        plt.ylim(0, max_conversion * 1.1)
-        plt.tight_layout()
-        
-        if save_fig:
-            plt.savefig('data/conversion_vs_time_multiple_cycles.png', dpi=300, bbox_inches='tight')
-        
-        plt.show()
+        # Tutte le curve in un'unica valutazione (cicli × tempi), usata anche per il riepilogo
+        surface = self.conversion_surface(cycle_list, max_time_min, time_points)
+
+        if _plot_settings['enabled']:
+            data = {
+                'cycles': list(cycle_list),
+                'time': surface['time'],
+                'conversion': surface['conversion'],
+                't_kinetic': self.params.t_kinetic,
+                'max_time_min': max_time_min,
+            }
+            _output_figure('conversion_vs_time_multiple_cycles', _draw_multiple_cycles_conversion, data, save_fig)
         
         # Print summary statistics for each cycle
         print("\n   Summary delle curve mostrate:")
         print(f"   {'Ciclo':<8} {'X_NK':<10} {'X_ND':<10} {'X_totale':<12} {'X@t_K':<12}")
         print("   " + "-" * 55)
         
-        for N in cycle_list:
-            XNK = self.equations.conversion_cycle_N(N, 'kinetic')
-            XND = self.equations.conversion_cycle_N(N, 'diffusion')
+        # A t = tK la fase cinetica è completa: X(tK) = X_NK
+        X_at_tK_all = surface['XNK'] * self.equations._phase_weights(self.params.t_kinetic)[0]
+        
+        for N, XNK, XND, X_at_tK in zip(cycle_list, surface['XNK'], surface['XND'], X_at_tK_all):
             X_total = XNK + XND
-            X_at_tK = self.equations.conversion_at_time_t(N, self.params.t_kinetic)
             
             print(f"   N={N:<6} {XNK:<10.4f} {XND:<10.4f} {X_total:<12.4f} {X_at_tK:<12.4f}")
 
+def _batch_to_arrays(batch):
+    """Appiattisce il risultato di capture_efficiency_batch in {nome: array} ('flows.F0', ...)"""
+    arrays = {name: values for name, values in batch.items() if name != 'flows'}
+    arrays.update({f'flows.{name}': values for name, values in batch['flows'].items()})
+    return arrays
+
+
+def _batch_from_arrays(arrays):
+    """Inverso di _batch_to_arrays"""
+    batch = {name: values for name, values in arrays.items() if not name.startswith('flows.')}
+    batch['flows'] = {name[len('flows.'):]: values
+                      for name, values in arrays.items() if name.startswith('flows.')}
+    return batch
+
+
 class AdvancedAnalysis:
     """Analisi avanzate del sistema di cattura"""
     
-    def __init__(self):
-        self.capture_model = CarbonCaptureModel()
-        self.params = ModelParameters()
+    def __init__(self, instrumentation=None, result_store=None, params=None):
+        """
+        Args:
+            instrumentation (Instrumentation): Raccolta di tempi e contatori condivisa con
+                il modello di cattura; di default disattivata (vedi enable_instrumentation).
+            result_store (ResultStore): Archivio su disco in cui salvare e da cui rileggere
+                le griglie valutate dagli studi; None per ricalcolare sempre.
+            params (ModelParameters): Parametri del modello; default ModelParameters().
+        """
+        self.instrumentation = instrumentation if instrumentation is not None else Instrumentation()
+        self.capture_model = CarbonCaptureModel(instrumentation=self.instrumentation, params=params)
+        self.result_store = result_store
+
+    @property
+    def params(self):
+        """Parametri del modello di cattura"""
+        return self.capture_model.params
+
+    @params.setter
+    def params(self, params):
+        self.capture_model.params = params
+
+    def enable_instrumentation(self, enabled=True):
+        """
+        Attiva (o disattiva) la strumentazione di studi, grafici e modello di cattura.
+        Le fasi sono inclusive: 'plotting' comprende anche gli studi che il grafico esegue.
+        """
+        self.instrumentation.enabled = enabled
+        return self.instrumentation
     
-    def parametric_study(self, Ws_range, FR_FCO2_ratio, F0_FCO2_ratio):
+    def _evaluate_grid(self, study, Ws_per_MW, F0_FCO2_ratio, FR_FCO2_ratio,
+                       n_workers=1, chunk_size=65536, progress=None):
+        """
+        Valuta il modello di cattura su una griglia di condizioni operative, nel
+        processo corrente (n_workers=1) o su un pool di processi.
+
+        Con un result_store la griglia viene cercata nell'archivio (chiave: parametri
+        del modello, tolleranza dell'Eq. 11, nome dello studio e griglia) e, se assente,
+        calcolata e salvata; i risultati riletti sono array memory-mapped in sola lettura.
+        Il metodo di integrazione non entra nella chiave: la valutazione vettoriale usa
+        sempre le Eq. 15-16 analitiche.
+        """
+        store = self.result_store
+        if store is not None:
+            from result_store import result_key
+
+            inputs = {
+                'Ws_per_MW': np.asarray(Ws_per_MW, dtype=float),
+                'F0_FCO2_ratio': np.asarray(F0_FCO2_ratio, dtype=float),
+                'FR_FCO2_ratio': np.asarray(FR_FCO2_ratio, dtype=float),
+            }
+            model = self.capture_model
+            key = result_key(study, (model.params, model.conversion_tolerance), inputs)
+            arrays = store.get(key)
+            if arrays is not None:
+                self.instrumentation.count('result_store.hits')
+                return _batch_from_arrays(arrays)
+            self.instrumentation.count('result_store.misses')
+
+        if n_workers == 1:
+            # Le fasi che non dipendono dagli assi variati vengono riusate o valutate sul solo asse
+            batch = self.capture_model.capture_efficiency_incremental(Ws_per_MW, F0_FCO2_ratio, FR_FCO2_ratio)
+        else:
+            from parallel import capture_efficiency_parallel
+
+            batch = capture_efficiency_parallel(self.capture_model, Ws_per_MW, F0_FCO2_ratio, FR_FCO2_ratio,
+                                                n_workers=n_workers, chunk_size=chunk_size, progress=progress)
+
+        if store is not None:
+            store.put(key, _batch_to_arrays(batch), study=study)
+        return batch
+
+    @instrumented('parametric_study')
+    def parametric_study(self, Ws_range, FR_FCO2_ratio, F0_FCO2_ratio,
+                         n_workers=1, chunk_size=65536, progress=None):
         """
         MODIFICATO: Studio parametrico che utilizza la nuova funzione di efficienza.
+
+        Args:
+            n_workers (int): 1 per l'esecuzione seriale, altrimenti numero di processi
+                del pool (None = tutti i core).
+            chunk_size (int): Punti valutati da ogni task del pool.
+            progress (callable o bool): Callback progress(completed, total), True per stamparlo.
         """
+        Ws_range = np.asarray(Ws_range, dtype=float)
+        batch = self._evaluate_grid('parametric_study', Ws_range, F0_FCO2_ratio, FR_FCO2_ratio,
+                                    n_workers, chunk_size, progress)
+        
         results = {
-            'Ws_per_MW': [],
-            'residence_time_min': [],
-            'efficiency': [],
-            'average_conversion': []
+            'Ws_per_MW': Ws_range.tolist(),
+            'residence_time_min': batch['residence_time_min'].tolist(),
+            'efficiency': batch['efficiency'].tolist(),
+            'average_conversion': batch['average_conversion'].tolist()
         }
         
-        for Ws in Ws_range:
-            conditions = {
-                'Ws_per_MW': Ws,
-                'F0_FCO2_ratio': F0_FCO2_ratio,
-                'FR_FCO2_ratio': FR_FCO2_ratio
-            }
-            
-            result = self.capture_model.capture_efficiency(conditions)
-            
-            results['Ws_per_MW'].append(Ws)
-            results['residence_time_min'].append(result['residence_time_min'])
-            results['efficiency'].append(result['efficiency'])
-            results['average_conversion'].append(result['average_conversion'])
-        
         return results
     
-    def plot_efficiency_vs_inventory(self, Ws_range, FR_values, F0_FCO2_ratio):
+    def parametric_study_chunks(self, Ws_range, FR_FCO2_ratio, F0_FCO2_ratio, chunk_size=65536, start=0):
+        """
+        Variante in streaming di parametric_study: produce i risultati a blocchi di
+        chunk_size punti man mano che vengono calcolati, con memoria costante.
+
+        Args:
+            Ws_range (sequence): Inventari da valutare; basta che supporti len() e lo
+                slicing (array, np.memmap o sinks.LinearGrid per griglie molto grandi).
+            chunk_size (int): Punti per blocco.
+            start (int): Primo punto da valutare (es. sink.offset per riprendere).
+
+        Yields:
+            dict: 'offset' del primo punto del blocco e array per le colonne di
+                parametric_study ('Ws_per_MW', 'residence_time_min', 'efficiency',
+                'average_conversion').
+        """
+        from sinks import STUDY_FIELDS
+
+        chunk_size = max(1, int(chunk_size))
+        for offset in range(start, len(Ws_range), chunk_size):
+            Ws = np.asarray(Ws_range[offset:offset + chunk_size], dtype=float)
+            # Tra un blocco e l'altro cambia solo Ws: flussi ed Eq. (11) vengono riusati
+            batch = self.capture_model.capture_efficiency_incremental(Ws, F0_FCO2_ratio, FR_FCO2_ratio)
+            self.instrumentation.count('parametric_study_chunks.points', len(Ws))
+            chunk = {'offset': offset, 'Ws_per_MW': Ws}
+            chunk.update({field: batch[field] for field in STUDY_FIELDS[1:]})
+            yield chunk
+
+    @instrumented('parametric_study')
+    def stream_parametric_study(self, Ws_range, FR_FCO2_ratio, F0_FCO2_ratio, sink, chunk_size=65536):
+        """
+        Studio parametrico scritto a blocchi su un sink (vedi sinks.open_sink), ripartendo
+        dall'ultimo blocco completato se il sink contiene già dei risultati.
+
+        Returns:
+            int: Punti scritti in totale (offset finale del sink).
+
+        Raises:
+            ValueError: Se i risultati già nel sink sono di un altro studio (griglia,
+                parametri o condizioni operative diverse).
+        """
+        # Estremi della griglia letti con lo slicing, che basta anche per sinks.LinearGrid
+        n_points = len(Ws_range)
+        ends = np.concatenate([np.asarray(Ws_range[0:1], dtype=float),
+                               np.asarray(Ws_range[max(n_points - 1, 0):n_points], dtype=float)])
+        sink.bind({
+            'study': 'parametric_study',
+            'grid_shape': [n_points],
+            'grid_bounds': ends.tolist(),
+            'FR_FCO2_ratio': float(FR_FCO2_ratio),
+            'F0_FCO2_ratio': float(F0_FCO2_ratio),
+            'params': self.params.fingerprint(),
+        })
+        for chunk in self.parametric_study_chunks(Ws_range, FR_FCO2_ratio, F0_FCO2_ratio,
+                                                  chunk_size, start=sink.offset):
+            sink.write(chunk)
+        return sink.offset
+
+    @instrumented('plotting')
+    def plot_efficiency_vs_inventory(self, Ws_range, FR_values, F0_FCO2_ratio, save_fig=False, studies=None):
         """
         MODIFICATO: Grafico efficienza vs inventario solidi (come Fig. 7 e 8).
         Utilizza i nuovi risultati.
+
+        Args:
+            studies (list): Risultati di parametric_study già calcolati, uno per valore di
+                FR_values; se None vengono calcolati qui.
         """
-        plt.figure(figsize=(12, 8))
-        colors = ['red', 'blue', 'green']
-        
-        for i, FR_FCO2_ratio in enumerate(FR_values):
-            # USA LA NUOVA FUNZIONE DI STUDIO PARAMETRICO
-            results = self.parametric_study(Ws_range, FR_FCO2_ratio, F0_FCO2_ratio)
-            
-            plt.plot(results['Ws_per_MW'], results['efficiency'], 
-                     'o-', color=colors[i % len(colors)], linewidth=2.5, markersize=7,
-                     label=f'FR/FCO2 = {FR_FCO2_ratio}')
-        
-        plt.xlabel('Inventario Solidi Ws (kg/MW)', fontsize=12)
-        plt.ylabel('Efficienza di Cattura CO2', fontsize=12)
-        plt.title(f'Efficienza di Cattura vs Inventario Solidi\n(F0/FCO2 = {F0_FCO2_ratio})', fontsize=14)
-        plt.legend()
-        plt.grid(True, which='both', linestyle='--', linewidth=0.5)
-        plt.ylim(0, 1)
-        plt.xlim(left=0)
-        plt.tight_layout()
-        plt.show()
+        if not _plot_settings['enabled']:
+            return
+
+        if studies is None:
+            studies = [self.parametric_study(Ws_range, FR_FCO2_ratio, F0_FCO2_ratio)
+                       for FR_FCO2_ratio in FR_values]
+        curves = []
+        for FR_FCO2_ratio, results in zip(FR_values, studies):
+            curves.append({'FR_FCO2_ratio': FR_FCO2_ratio, 'Ws_per_MW': results['Ws_per_MW'],
+                           'efficiency': results['efficiency']})
 
-    def plot_efficiency_vs_residence_time(self, Ws_range, FR_FCO2_ratio, F0_FCO2_ratio):
+        data = {'curves': curves, 'F0_FCO2_ratio': F0_FCO2_ratio}
+        _output_figure('efficiency_vs_inventory', _draw_efficiency_vs_inventory, data, save_fig)
+
+    @instrumented('plotting')
+    def plot_efficiency_vs_residence_time(self, Ws_range, FR_FCO2_ratio, F0_FCO2_ratio, save_fig=False,
+                                          study=None):
         """
         MODIFICATO: Grafico efficienza vs tempo di residenza (come Fig. 9).
         Ora mostra solo l'efficienza totale, che è il risultato robusto del modello.
+
+        Args:
+            study (dict): Risultato di parametric_study già calcolato; se None viene
+                calcolato qui.
         """
-        results = self.parametric_study(Ws_range, FR_FCO2_ratio, F0_FCO2_ratio)
-        
-        fig, ax1 = plt.subplots(figsize=(12, 7))
-        
-        color = 'tab:blue'
-        ax1.set_xlabel('Tempo di Residenza τ (min)', fontsize=12)
-        ax1.set_ylabel('Efficienza di Cattura CO2', fontsize=12, color=color)
-        ax1.plot(results['residence_time_min'], results['efficiency'], 'o-', color=color, linewidth=2.5)
-        ax1.tick_params(axis='y', labelcolor=color)
-        ax1.set_ylim(0, 1)
-        ax1.grid(True, linestyle='--', linewidth=0.5)
-
-        # Aggiungo un secondo asse y per mostrare la conversione media
-        ax2 = ax1.twinx()
-        color = 'tab:red'
-        ax2.set_ylabel('Conversione Media Particelle (X_ave)', fontsize=12, color=color)
-        ax2.plot(results['residence_time_min'], results['average_conversion'], 's--', color=color, linewidth=2)
-        ax2.tick_params(axis='y', labelcolor=color)
-        ax2.set_ylim(bottom=0)
-
-        plt.title(f'Efficienza vs Tempo di Residenza\n(FR/FCO2={FR_FCO2_ratio}, F0/FCO2={F0_FCO2_ratio})', fontsize=14)
-        fig.tight_layout()
-        plt.show()
+        if not _plot_settings['enabled']:
+            return
+
+        results = study if study is not None else self.parametric_study(Ws_range, FR_FCO2_ratio, F0_FCO2_ratio)
 
-    def optimization_study(self, Ws_range, FR_range, F0_FCO2_ratio):
+        data = {key: results[key] for key in ('residence_time_min', 'efficiency', 'average_conversion')}
+        data.update(FR_FCO2_ratio=FR_FCO2_ratio, F0_FCO2_ratio=F0_FCO2_ratio)
+        _output_figure('efficiency_vs_residence_time', _draw_efficiency_vs_residence_time, data, save_fig)
+
+    @instrumented('optimization_study')
+    def optimization_study(self, Ws_range, FR_range, F0_FCO2_ratio,
+                           n_workers=1, chunk_size=65536, progress=None, save_fig=False):
         """
         MODIFICATO: Trova condizioni operative ottimali usando i nuovi risultati.
+
+        Con n_workers diverso da 1 la griglia Ws × FR è suddivisa in blocchi da
+        chunk_size punti valutati su un pool di processi; ordine dei risultati e
+        scelta del punto ottimo restano identici all'esecuzione seriale.
         """
-        best_efficiency = 0
-        best_conditions = None
+        Ws_range = np.asarray(Ws_range, dtype=float)
+        FR_range = np.asarray(FR_range, dtype=float)
         
-        results_matrix = np.zeros((len(Ws_range), len(FR_range)))
+        # Tutta la griglia Ws × FR in un'unica valutazione vettoriale
+        batch = self._evaluate_grid('optimization_study', Ws_range[:, None], F0_FCO2_ratio,
+                                    FR_range[None, :], n_workers, chunk_size, progress)
+        results_matrix = batch['efficiency']
         
-        for i, Ws in enumerate(Ws_range):
-            for j, FR in enumerate(FR_range):
-                conditions = {
-                    'Ws_per_MW': Ws,
+        # Primo punto (in ordine di riga) con efficienza massima e strettamente positiva
+        best_efficiency = 0
+        best_conditions = None
+        if results_matrix.size:
+            i, j = np.unravel_index(np.argmax(results_matrix), results_matrix.shape)
+            if results_matrix[i, j] > best_efficiency:
+                best_efficiency = results_matrix[i, j]
+                best_conditions = {
+                    'Ws_per_MW': Ws_range[i],
                     'F0_FCO2_ratio': F0_FCO2_ratio,
-                    'FR_FCO2_ratio': FR
+                    'FR_FCO2_ratio': FR_range[j],
+                    # Salva tutti i risultati del punto ottimale
+                    'results': self.capture_model.batch_result_at(batch, (i, j))
                 }
-                
-                result = self.capture_model.capture_efficiency(conditions)
-                efficiency = result['efficiency']
-                results_matrix[i, j] = efficiency
-                
-                if efficiency > best_efficiency:
-                    best_efficiency = efficiency
-                    best_conditions = conditions.copy()
-                    best_conditions['results'] = result # Salva tutti i risultati del punto ottimale
         
         # Plot heatmap
-        plt.figure(figsize=(10, 8))
-        im = plt.imshow(results_matrix, cmap='viridis', aspect='auto', origin='lower',
-                        extent=[FR_range.min(), FR_range.max(), Ws_range.min(), Ws_range.max()])
-        
-        plt.colorbar(im, label='Efficienza di Cattura CO2')
-        plt.xlabel('Rapporto Ricircolo (FR/FCO2)')
-        plt.ylabel('Inventario Solidi Ws (kg/MW)')
-        plt.title('Mappa di Ottimizzazione Efficienza di Cattura')
-        
-        # Aggiungi punto di ottimo
-        if best_conditions:
-            plt.plot(best_conditions['FR_FCO2_ratio'], best_conditions['Ws_per_MW'], 'r*', 
-                     markersize=15, label=f'Ottimo ({best_efficiency:.3f})')
-            plt.legend()
-            
-        plt.tight_layout()
-        plt.show()
+        if _plot_settings['enabled']:
+            self._plot_optimization_map(results_matrix, Ws_range, FR_range, best_conditions, best_efficiency,
+                                        save_fig)
         
-        return best_conditions, results_matrix
\ No newline at end of file
+        return best_conditions, results_matrix
+
+    @instrumented('plotting')
+    def _plot_optimization_map(self, results_matrix, Ws_range, FR_range, best_conditions, best_efficiency,
+                               save_fig=False):
+        """Heatmap dell'efficienza sulla griglia Ws × FR con il punto di ottimo"""
+        data = {
+            'results_matrix': results_matrix,
+            'Ws_range': Ws_range,
+            'FR_range': FR_range,
+            'best_point': ((best_conditions['FR_FCO2_ratio'], best_conditions['Ws_per_MW'])
+                           if best_conditions else None),
+            'best_efficiency': best_efficiency,
+        }
+        _output_figure('optimization_map', _draw_optimization_map, data, save_fig)
+
+    @instrumented('uncertainty_study')
+    def uncertainty_study(self, operating_conditions, distributions, n_samples=100_000,
+                          batch_size=10_000, seed=None, n_workers=1, **options):
+        """
+        Propagazione Monte Carlo dell'incertezza dei parametri del sorbente
+        (vedi uncertainty.propagate_uncertainty) sui punti operativi indicati.
+        """
+        from uncertainty import propagate_uncertainty
+
+        return propagate_uncertainty(self.capture_model, operating_conditions, distributions,
+                                     n_samples=n_samples, batch_size=batch_size, seed=seed,
+                                     n_workers=n_workers, **options)
+
+    @instrumented('sensitivity_study')
+    def sensitivity_study(self, bounds, n_base=10_000, operating_conditions=None, seed=None,
+                          n_workers=1, **options):
+        """
+        Indici di Sobol del primo ordine e totali delle efficienze di cattura rispetto
+        ai fattori in bounds (vedi sensitivity.sobol_analysis).
+        """
+        from sensitivity import sobol_analysis
+
+        return sobol_analysis(self.capture_model, bounds, n_base=n_base,
+                              operating_conditions=operating_conditions, seed=seed,
+                              n_workers=n_workers, **options)
+
+    def transient_study(self, t_end, conditions, steps=(), n_classes=2000, **options):
+        """
+        Evoluzione nel tempo della distribuzione dei cicli e dell'efficienza dopo
+        l'avviamento o variazioni a gradino di F0, FR o Ws (vedi
+        dynamics.PopulationBalanceSimulator.simulate). Restituisce un generatore di istantanee.
+        """
+        from dynamics import PopulationBalanceSimulator
+
+        simulator = PopulationBalanceSimulator(self.capture_model, n_classes=n_classes)
+        return simulator.simulate(t_end, conditions, steps=steps, **options)
+
+    @instrumented('particle_study')
+    def particle_study(self, conditions, t_end, n_replicas=4, seed=None, n_workers=1, **options):
+        """
+        Verifica a particelle delle ipotesi del modello (Eq. 9 e 17) nelle condizioni
+        operative date, con repliche indipendenti (vedi particles.run_replicas).
+        """
+        from particles import run_replicas
+
+        return run_replicas(conditions, t_end, n_replicas=n_replicas, seed=seed, n_workers=n_workers,
+                            capture_model=self.capture_model, **options)
+
+    @instrumented('surrogate_model')
+    def surrogate_model(self, path=None, **options):
+        """
+        Surrogato tabulato del modello di cattura (vedi surrogate.SurrogateModel.build).
+        Se path esiste e la tabella ha gli stessi parametri viene riletta, altrimenti
+        viene costruita e, se path è dato, salvata.
+        """
+        from surrogate import SurrogateModel
+
+        if path is not None and os.path.exists(path):
+            try:
+                return SurrogateModel.load(path, self.params)
+            except ValueError:
+                pass
+        surrogate = SurrogateModel.build(self.capture_model, **options)
+        if path is not None:
+            surrogate.save(path)
+        return surrogate
+
+    @instrumented('inverse_design_study')
+    def inverse_design_study(self, target_efficiency, solve_for='Ws_per_MW', **conditions):
+        """
+        Valore minimo dell'inventario solidi, del ricircolo o del makeup che garantisce
+        l'efficienza richiesta, con le altre condizioni fisse
+        (vedi CarbonCaptureModel.required_operating_condition).
+        """
+        return self.capture_model.required_operating_condition(target_efficiency, solve_for=solve_for,
+                                                               **conditions)
+
+    @instrumented('pareto_study')
+    def pareto_study(self, bounds, **options):
+        """
+        Fronte di Pareto tra efficienza, inventario solidi, ricircolo e makeup, con
+        campionamento adattivo vicino al fronte (vedi pareto.pareto_front).
+        """
+        from pareto import pareto_front
+
+        return pareto_front(self.capture_model, bounds, **options)
+
+    @instrumented('adaptive_optimization_study')
+    def adaptive_optimization_study(self, Ws_bounds, FR_bounds, F0_FCO2_ratio,
+                                    Ws_max=None, FR_max=None, constraint=None,
+                                    points_per_axis=5, rel_tol=1e-4, max_iterations=60):
+        """
+        Ricerca adattiva (coarse-to-fine) delle condizioni operative ottimali.
+
+        A ogni iterazione valuta una griglia points_per_axis × points_per_axis nel box
+        corrente, aggiorna il punto migliore (solo se strettamente migliore, come in
+        optimization_study) e restringe il box a un passo di griglia attorno ad esso,
+        finché la sua ampiezza non scende sotto rel_tol volte quella iniziale.
+
+        Args:
+            Ws_bounds (tuple): (min, max) dell'inventario solidi (kg/MW).
+            FR_bounds (tuple): (min, max) del rapporto FR/FCO2.
+            F0_FCO2_ratio (float): Rapporto di makeup fissato.
+            Ws_max, FR_max (float): Vincoli Ws <= Ws_max e FR/FCO2 <= FR_max.
+            constraint (callable): Vincolo aggiuntivo constraint(batch) -> maschera
+                booleana dei punti ammissibili, sul risultato di capture_efficiency_batch.
+            points_per_axis (int): Punti per asse della griglia locale (>= 3).
+            rel_tol (float): Ampiezza finale del box relativa a quella iniziale.
+            max_iterations (int): Numero massimo di raffinamenti.
+
+        Returns:
+            tuple: (best_conditions, search) dove best_conditions ha lo stesso formato di
+                optimization_study (None se nessun punto ammissibile ha efficienza > 0) e
+                search contiene 'evaluations', 'iterations', 'converged' e 'trace'.
+        """
+        lower = np.array([Ws_bounds[0], FR_bounds[0]], dtype=float)
+        upper = np.array([Ws_bounds[1], FR_bounds[1]], dtype=float)
+        if Ws_max is not None:
+            upper[0] = min(upper[0], Ws_max)
+        if FR_max is not None:
+            upper[1] = min(upper[1], FR_max)
+        if np.any(upper < lower):
+            raise ValueError("Vincoli incompatibili con i limiti di ricerca di Ws e FR/FCO2")
+        points_per_axis = max(3, int(points_per_axis))
+
+        target_width = rel_tol * (upper - lower)
+        box_lower, box_upper = lower.copy(), upper.copy()
+
+        best_efficiency = 0
+        best_conditions = None
+        evaluations = 0
+        converged = False
+        trace = []
+
+        for iteration in range(1, max_iterations + 1):
+            Ws_grid = np.linspace(box_lower[0], box_upper[0], points_per_axis)
+            FR_grid = np.linspace(box_lower[1], box_upper[1], points_per_axis)
+            batch = self.capture_model.capture_efficiency_batch(
+                Ws_grid[:, None], F0_FCO2_ratio, FR_grid[None, :])
+            evaluations += batch['efficiency'].size
+
+            feasible = batch['valid'].copy()
+            if constraint is not None:
+                feasible &= np.asarray(constraint(batch), dtype=bool)
+            efficiency = np.where(feasible, batch['efficiency'], -np.inf)
+
+            i, j = np.unravel_index(np.argmax(efficiency), efficiency.shape)
+            if efficiency[i, j] > best_efficiency:
+                best_efficiency = efficiency[i, j]
+                best_conditions = {
+                    'Ws_per_MW': Ws_grid[i],
+                    'F0_FCO2_ratio': F0_FCO2_ratio,
+                    'FR_FCO2_ratio': FR_grid[j],
+                    'results': self.capture_model.batch_result_at(batch, (i, j))
+                }
+
+            trace.append({
+                'iteration': iteration,
+                'Ws_bounds': (box_lower[0], box_upper[0]),
+                'FR_bounds': (box_lower[1], box_upper[1]),
+                'best_Ws_per_MW': best_conditions['Ws_per_MW'] if best_conditions else None,
+                'best_FR_FCO2_ratio': best_conditions['FR_FCO2_ratio'] if best_conditions else None,
+                'best_efficiency': best_efficiency,
+                'evaluations': evaluations
+            })
+
+            if best_conditions is None or np.all(box_upper - box_lower <= target_width):
+                converged = best_conditions is not None
+                break
+
+            # Nuovo box: un passo di griglia attorno al punto migliore, entro i limiti
+            center = np.array([best_conditions['Ws_per_MW'], best_conditions['FR_FCO2_ratio']])
+            step = (box_upper - box_lower) / (points_per_axis - 1)
+            box_lower = np.maximum(lower, center - step)
+            box_upper = np.minimum(upper, center + step)
+
+        search = {
+            'evaluations': evaluations,
+            'iterations': len(trace),
+            'converged': converged,
+            'trace': trace
+        }
+        return best_conditions, search
@@ -0,0 +1,93 @@
+"""
+Esecuzione parallela su più processi delle valutazioni vettoriali del modello di cattura.
+La griglia di condizioni operative viene suddivisa in blocchi contigui, valutati da un
+pool di processi, e ricomposta nello stesso ordine dell'esecuzione seriale.
+"""
+
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+# Modello di cattura del processo worker, inizializzato una sola volta per processo
+_worker_model = None
+
+
+def _init_worker(model):
+    global _worker_model
+    _worker_model = model
+
+
+def _evaluate_slice(Ws_per_MW, F0_FCO2_ratio, FR_FCO2_ratio):
+    return _worker_model.capture_efficiency_batch(Ws_per_MW, F0_FCO2_ratio, FR_FCO2_ratio)
+
+
+def print_progress(completed, total):
+    """Callback di avanzamento predefinita: stampa punti completati e percentuale"""
+    print(f"   Avanzamento: {completed}/{total} punti ({completed / total * 100:.1f}%)")
+
+
+def split_ranges(total, chunk_size):
+    """Suddivide [0, total) in intervalli contigui (start, stop) di al più chunk_size elementi"""
+    chunk_size = max(1, int(chunk_size))
+    return [(start, min(start + chunk_size, total)) for start in range(0, total, chunk_size)]
+
+
+def capture_efficiency_parallel(model, Ws_per_MW, F0_FCO2_ratio, FR_FCO2_ratio,
+                                n_workers=None, chunk_size=65536, progress=None):
+    """
+    Equivalente di model.capture_efficiency_batch con la griglia distribuita su un
+    pool di processi.
+
+    Args:
+        model (CarbonCaptureModel): Modello da replicare in ogni processo worker.
+        Ws_per_MW, F0_FCO2_ratio, FR_FCO2_ratio (array_like): Condizioni operative
+            in broadcasting, come per capture_efficiency_batch.
+        n_workers (int): Numero di processi (None = tutti i core disponibili).
+        chunk_size (int): Numero di punti valutati da ogni task.
+        progress (callable o bool): Funzione progress(completed, total) chiamata al
+            termine di ogni blocco; True usa print_progress.
+
+    Returns:
+        dict: Lo stesso formato di capture_efficiency_batch, nell'ordine della griglia.
+    """
+    arrays = np.broadcast_arrays(np.asarray(Ws_per_MW, dtype=float),
+                                 np.asarray(F0_FCO2_ratio, dtype=float),
+                                 np.asarray(FR_FCO2_ratio, dtype=float))
+    shape = arrays[0].shape
+    flat = [array.ravel() for array in arrays]
+    total = flat[0].size
+    if progress is True:
+        progress = print_progress
+
+    ranges = split_ranges(total, chunk_size)
+    if len(ranges) <= 1:
+        result = model.capture_efficiency_batch(*arrays)
+        if progress and total:
+            progress(total, total)
+        return result
+
+    chunks = [None] * len(ranges)
+    with ProcessPoolExecutor(max_workers=n_workers, initializer=_init_worker,
+                             initargs=(model,)) as executor:
+        futures = {executor.submit(_evaluate_slice, *(array[start:stop] for array in flat)): i
+                   for i, (start, stop) in enumerate(ranges)}
+        completed = 0
+        for future in as_completed(futures):
+            i = futures[future]
+            chunks[i] = future.result()
+            completed += ranges[i][1] - ranges[i][0]
+            if progress:
+                progress(completed, total)
+
+    return _concatenate_batches(chunks, shape)
+
+
+def _concatenate_batches(chunks, shape):
+    """Ricompone i risultati dei blocchi (nell'ordine dato) nella forma della griglia"""
+    def join(values):
+        return np.concatenate(values).reshape(shape)
+
+    result = {key: join([chunk[key] for chunk in chunks]) for key in chunks[0] if key != 'flows'}
+    result['flows'] = {key: join([chunk['flows'][key] for chunk in chunks])
+                       for key in chunks[0]['flows']}
+    return result
@@ -2,51 +2,142 @@
 Parametri del modello Calcium Looping basati sul paper
 """
 
+import hashlib
+import json
+
+# Valori di default dei parametri, nell'ordine dei campi di ModelParameters
+_DEFAULTS = {
+    # Parametri deattivazione da Tabella 1
+    # Fase cinetica
+    'j_kinetic': 0.676,          # costante deattivazione
+    'Xr_kinetic': 0.0296,        # conversione residua
+    'X1_kinetic': 0.218,         # conversione 1° ciclo
+
+    # Fase diffusiva
+    'j_diffusion': 0.871,        # costante deattivazione
+    'Xr_diffusion': 0.0408,      # conversione residua
+    'X1_diffusion': 0.263,       # conversione 1° ciclo
+
+    # Costanti cinetiche
+    'ks': 6.7e-10,               # costante cinetica (m⁴/mol·s)
+    'Deff': 6.5e-5,              # costante diffusione (m³/mol·s)
+
+    # Parametri operativi da Tabella 2
+    'f0': 0.15,                  # frazione molare CO2 ingresso
+    'T_carbonator': 650,         # temperatura carbonatore (°C)
+    'T_calciner': 950,           # temperatura calcinatore (°C)
+    'P': 1.0,                    # pressione (bar)
+    'h': 50e-9,                  # spessore strato prodotto (m)
+
+    # Parametri per test
+    't_kinetic': 0.3,            # tempo fase cinetica (0.3 min = 18 sec)
+    'T0': 5,                     # tempo totale test TGA (5 min = 300 s)
+
+    # Parametri per modello di cattura (da Tabella 2 del paper)
+    'mCO2_per_MW': 0.1,          # kg/s per MW
+    'Vgas_per_MW': 1.15,         # m³/s per MW di gas di combustione
+    'MCaO': 56.08,               # massa molare CaO (g/mol)
+    'MCaCO3': 100.09,            # massa molare CaCO3 (g/mol)
+    'VM_CaCO3': 36.9e-6,         # volume molare CaCO3 (m³/mol)
+    'rho_CaO': 3340,             # densità CaO (kg/m³)
+    'rho_gas': 1.2,              # densità gas (kg/m³)
+
+    # Parametri di equilibrio
+    'f_equilibrium': 0.10,       # frazione CO2 equilibrio a 650°C
+
+    # Parametri reattore
+    'reactor_area': 100,         # area sezione reattore (m²)
+
+    # Masse molari in kg/mol per coerenza
+    'M_CO2_kg': 0.04401,         # kg/mol
+    'M_CaO_kg': 0.05608,         # kg/mol
+}
+
+
+def _restore_parameters(cls, values):
+    """Ricostruisce un ModelParameters durante l'unpickling"""
+    return cls(**values)
+
+
 class ModelParameters:
-    """Parametri del modello estratti dal paper di Ortiz et al."""
-    
-    def __init__(self):
-        # Parametri deattivazione da Tabella 1
-        # Fase cinetica
-        self.j_kinetic = 0.676          # costante deattivazione
-        self.Xr_kinetic = 0.0296        # conversione residua
-        self.X1_kinetic = 0.218        # conversione 1° ciclo
-        
-        # Fase diffusiva
-        self.j_diffusion = 0.871        # costante deattivazione
-        self.Xr_diffusion = 0.0408      # conversione residua
-        self.X1_diffusion = 0.263       # conversione 1° ciclo
-        
-        # Costanti cinetiche
-        self.ks = 6.7e-10              # costante cinetica (m⁴/mol·s)
-        self.Deff = 6.5e-5             # costante diffusione (m³/mol·s)
-        
-        # Parametri operativi da Tabella 2
-        self.f0 = 0.15                 # frazione molare CO2 ingresso
-        self.T_carbonator = 650        # temperatura carbonatore (°C)
-        self.T_calciner = 950          # temperatura calcinatore (°C)
-        self.P = 1.0                   # pressione (bar)
-        self.h = 50e-9                 # spessore strato prodotto (m)
-        
-        # Parametri per test
-        self.t_kinetic = 0.3           # tempo fase cinetica (0.3 min = 18 sec)
-        self.T0 = 5                    # tempo totale test TGA (5 min = 300 s)
-        
-        # Parametri per modello di cattura (da Tabella 2 del paper)
-        self.mCO2_per_MW = 0.1                # kg/s per MW
-        self.Vgas_per_MW = 1.15               # m³/s per MW di gas di combustione
-        self.MCaO = 56.08                     # massa molare CaO (g/mol)
-        self.MCaCO3 = 100.09                  # massa molare CaCO3 (g/mol)
-        self.VM_CaCO3 = 36.9e-6               # volume molare CaCO3 (m³/mol)
-        self.rho_CaO = 3340                   # densità CaO (kg/m³)
-        self.rho_gas = 1.2                    # densità gas (kg/m³)
-        
-        # Parametri di equilibrio
-        self.f_equilibrium = 0.10             # frazione CO2 equilibrio a 650°C
-        
-        # Parametri reattore
-        self.reactor_area = 100               # area sezione reattore (m²)
-
-        # NUOVE COSTANTI - Masse molari in kg/mol per coerenza
-        self.M_CO2_kg = 0.04401               # kg/mol
-        self.M_CaO_kg = 0.05608               # kg/mol
\ No newline at end of file
+    """
+    Parametri del modello estratti dal paper di Ortiz et al.
+
+    Record immutabile e hashable: i valori si fissano alla costruzione
+    (ModelParameters(T0=10)) e le varianti si derivano con replace(), quindi la
+    stessa istanza può essere condivisa tra modelli, cache e processi worker.
+    """
+
+    FIELDS = tuple(_DEFAULTS)
+    __slots__ = FIELDS + ('_hash',)
+
+    def __init__(self, **values):
+        unknown = set(values) - set(_DEFAULTS)
+        if unknown:
+            raise TypeError(f"Parametri sconosciuti: {', '.join(sorted(unknown))}")
+        for name, default in _DEFAULTS.items():
+            object.__setattr__(self, name, values.get(name, default))
+        object.__setattr__(self, '_hash', None)
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"ModelParameters è immutabile: usare replace({name}=...)")
+
+    def __delattr__(self, name):
+        raise AttributeError("ModelParameters è immutabile")
+
+    def _values(self):
+        return tuple(getattr(self, name) for name in self.FIELDS)
+
+    def __eq__(self, other):
+        if not isinstance(other, ModelParameters):
+            return NotImplemented
+        return self._values() == other._values()
+
+    def __hash__(self):
+        if self._hash is None:
+            object.__setattr__(self, '_hash', hash(self._values()))
+        return self._hash
+
+    def __repr__(self):
+        changes = ', '.join(f'{name}={getattr(self, name)!r}' for name in self.FIELDS
+                            if getattr(self, name) != _DEFAULTS[name])
+        return f'ModelParameters({changes})'
+
+    def __reduce__(self):
+        return _restore_parameters, (type(self), self.to_dict())
+
+    def replace(self, **changes):
+        """Nuova istanza con i valori indicati modificati e gli altri invariati"""
+        values = self.to_dict()
+        values.update(changes)
+        return type(self)(**values)
+
+    def to_dict(self):
+        """Valori dei parametri come dizionario {nome: valore}"""
+        return {name: getattr(self, name) for name in self.FIELDS}
+
+    @classmethod
+    def from_dict(cls, values):
+        """Costruisce i parametri da un dizionario; i campi mancanti prendono il default"""
+        return cls(**values)
+
+    def to_json(self, path=None):
+        """Serializza i parametri in JSON; se `path` è dato li scrive anche su file"""
+        text = json.dumps(self.to_dict(), indent=2)
+        if path is not None:
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(text)
+        return text
+
+    @classmethod
+    def from_json(cls, text=None, path=None):
+        """Legge i parametri da una stringa JSON o da un file"""
+        if path is not None:
+            with open(path, encoding='utf-8') as f:
+                text = f.read()
+        return cls.from_dict(json.loads(text))
+
+    def fingerprint(self):
+        """Hash SHA-256 stabile dei valori dei parametri (es. per chiavi di risultati salvati su disco)"""
+        payload = json.dumps(self.to_dict(), sort_keys=True, default=repr)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
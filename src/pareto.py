@@ -0,0 +1,213 @@
+"""
+Fronte di Pareto tra efficienza di cattura e consumo di risorse.
+
+Obiettivi: massimizzare l'efficienza e minimizzare inventario solidi (Ws_per_MW),
+ricircolo (FR_FCO2_ratio, legato al carico del calcinatore) e makeup di calcare
+(F0_FCO2_ratio). Il fronte si ottiene con un ordinamento non dominato a blocchi sulle
+valutazioni di capture_efficiency_batch: i punti, ordinati lessicograficamente sugli
+obiettivi, possono essere dominati solo da punti che li precedono, quindi basta
+confrontare ogni blocco con sé stesso e con il fronte dei blocchi precedenti.
+
+Il campionamento parte da una griglia log-spaziata e poi si concentra vicino al
+fronte: a ogni iterazione genera nuovi punti attorno a punti del fronte corrente, in
+un intorno (in scala logaritmica) che si restringe di un fattore shrink.
+"""
+
+import numpy as np
+
+from sensitivity import OPERATING_FACTORS
+
+# Obiettivi e verso dell'ottimizzazione
+OBJECTIVES = {
+    'efficiency': 'max',
+    'Ws_per_MW': 'min',
+    'FR_FCO2_ratio': 'min',
+    'F0_FCO2_ratio': 'min',
+}
+
+# Colonne del fronte restituito da pareto_front
+FRONT_FIELDS = OPERATING_FACTORS + ('efficiency', 'efficiency_kinetic', 'efficiency_diffusion',
+                                    'residence_time_min', 'average_conversion')
+
+
+def _dominated_by(costs, reference, block_size=2048):
+    """Maschera delle righe di costs dominate da almeno una riga di reference (minimizzazione)"""
+    dominated = np.zeros(len(costs), dtype=bool)
+    if not len(reference):
+        return dominated
+    # Blocchi di righe per limitare la memoria dei confronti a coppie
+    step = max(1, (block_size * block_size) // len(reference))
+    for start in range(0, len(costs), step):
+        block = costs[start:start + step]
+        weakly_better = reference[None, :, 0] <= block[:, None, 0]
+        for j in range(1, costs.shape[1]):
+            weakly_better &= reference[None, :, j] <= block[:, None, j]
+        # La disuguaglianza stretta si verifica solo sulle (poche) coppie che la possono dare
+        rows, cols = np.nonzero(weakly_better)
+        strictly_better = np.any(reference[cols] < block[rows], axis=1)
+        dominated[start + rows[strictly_better]] = True
+    return dominated
+
+
+def pareto_mask(costs, block_size=2048):
+    """
+    Maschera dei punti non dominati.
+
+    Args:
+        costs (ndarray): Obiettivi da minimizzare, forma (punti, obiettivi).
+        block_size (int): Punti per blocco.
+
+    Returns:
+        ndarray: Maschera booleana, True per i punti del fronte (i duplicati esatti
+            di un punto del fronte restano tutti nel fronte).
+    """
+    costs = np.asarray(costs, dtype=float)
+    # Ordine lessicografico: chi domina un punto lo precede sempre
+    order = np.lexsort(costs.T[::-1])
+    front = np.empty(0, dtype=int)
+    for start in range(0, len(order), block_size):
+        block = order[start:start + block_size]
+        block = block[~_dominated_by(costs[block], costs[front], block_size)]
+        block = block[~_dominated_by(costs[block], costs[block], block_size)]
+        front = np.concatenate([front, block])
+    mask = np.zeros(len(costs), dtype=bool)
+    mask[front] = True
+    return mask
+
+
+def non_dominated_sort(costs, block_size=2048):
+    """Rango di Pareto di ogni punto: 0 per il fronte, 1 per il fronte dei rimanenti e così via"""
+    costs = np.asarray(costs, dtype=float)
+    ranks = np.full(len(costs), -1)
+    remaining = np.arange(len(costs))
+    rank = 0
+    while remaining.size:
+        mask = pareto_mask(costs[remaining], block_size)
+        ranks[remaining[mask]] = rank
+        remaining = remaining[~mask]
+        rank += 1
+    return ranks
+
+
+def crowding_distance(costs):
+    """Distanza di affollamento (NSGA-II) dei punti di un fronte; infinita agli estremi"""
+    costs = np.asarray(costs, dtype=float)
+    distance = np.zeros(len(costs))
+    if len(costs) <= 2:
+        return np.full(len(costs), np.inf)
+    for column in costs.T:
+        order = np.argsort(column, kind='stable')
+        values = column[order]
+        span = values[-1] - values[0]
+        distance[order[[0, -1]]] = np.inf
+        if span > 0:
+            distance[order[1:-1]] += (values[2:] - values[:-2]) / span
+    return distance
+
+
+def _parse_bounds(bounds):
+    """Separa i fattori liberi ({nome: (min, max)}) da quelli fissi ({nome: valore})"""
+    unknown = set(bounds) - set(OPERATING_FACTORS)
+    if unknown:
+        raise ValueError(f"Fattori non validi: {', '.join(sorted(unknown))} "
+                         f"(valori ammessi: {', '.join(OPERATING_FACTORS)})")
+    missing = set(OPERATING_FACTORS) - set(bounds)
+    if missing:
+        raise ValueError(f"Intervallo o valore mancante per: {', '.join(sorted(missing))}")
+    free, fixed = {}, {}
+    for name in OPERATING_FACTORS:
+        value = bounds[name]
+        if np.ndim(value) == 0:
+            fixed[name] = float(value)
+            continue
+        low, high = (float(v) for v in value)
+        if not 0 < low < high:
+            raise ValueError(f"Intervallo di {name} non valido: serve (min, max) con 0 < min < max")
+        free[name] = (low, high)
+    if not free:
+        raise ValueError("Serve almeno un fattore con un intervallo (min, max)")
+    return free, fixed
+
+
+def pareto_front(capture_model, bounds, min_efficiency=0.0, initial_points=9, iterations=10,
+                 samples_per_iteration=4096, shrink=0.5, max_front_size=5000, seed=None):
+    """
+    Fronte di Pareto efficienza / Ws / FR / F0 con campionamento adattivo.
+
+    Args:
+        capture_model (CarbonCaptureModel): Modello da valutare.
+        bounds (dict): Per ogni fattore di OPERATING_FACTORS un intervallo (min, max),
+            esplorato in scala logaritmica, oppure un valore fisso (che non è più un obiettivo).
+        min_efficiency (float): Efficienza minima dei punti considerati.
+        initial_points (int): Punti per asse della griglia iniziale.
+        iterations (int): Iterazioni di campionamento vicino al fronte.
+        samples_per_iteration (int): Nuovi punti per iterazione.
+        shrink (float): Fattore di riduzione dell'intorno di campionamento per iterazione;
+            l'intorno iniziale è un passo della griglia iniziale.
+        max_front_size (int): Punti massimi conservati; oltre, il fronte viene sfoltito
+            tenendo i punti con distanza di affollamento maggiore.
+        seed (int): Seed del generatore.
+
+    Returns:
+        dict: Un array per ogni campo di FRONT_FIELDS con i punti del fronte ordinati per
+            efficienza crescente, più 'objectives' (obiettivi usati), 'evaluations'
+            (punti valutati) e 'front_sizes' (dimensione del fronte dopo ogni passo).
+    """
+    free, fixed = _parse_bounds(bounds)
+    names = list(free)
+    objectives = ['efficiency'] + names
+    signs = np.array([-1.0 if OBJECTIVES[name] == 'max' else 1.0 for name in objectives])
+    log_low = np.log([free[name][0] for name in names])
+    log_high = np.log([free[name][1] for name in names])
+    initial_points = max(2, int(initial_points))
+    rng = np.random.default_rng(seed)
+
+    def evaluate(log_x):
+        columns = dict(fixed, **dict(zip(names, np.exp(log_x).T)))
+        batch = capture_model.capture_efficiency_batch(*(columns[name] for name in OPERATING_FACTORS))
+        keep = batch['valid'] & (batch['efficiency'] >= min_efficiency)
+        points = {name: np.broadcast_to(columns[name], keep.shape)[keep] for name in OPERATING_FACTORS}
+        points.update({name: batch[name][keep] for name in FRONT_FIELDS if name not in points})
+        return log_x[keep], points
+
+    def select(log_x, points):
+        costs = signs * np.column_stack([points[name] for name in objectives])
+        mask = pareto_mask(costs)
+        if mask.sum() > max_front_size:
+            front = np.flatnonzero(mask)
+            best = np.argsort(-crowding_distance(costs[front]), kind='stable')[:max_front_size]
+            mask[:] = False
+            mask[front[best]] = True
+        return log_x[mask], {name: values[mask] for name, values in points.items()}
+
+    # 1. Griglia iniziale log-spaziata
+    axes = np.linspace(log_low, log_high, initial_points).T
+    grid = np.stack([values.ravel() for values in np.meshgrid(*axes, indexing='ij')], axis=1)
+    log_x, points = select(*evaluate(grid))
+    evaluations = len(grid)
+    front_sizes = [len(log_x)]
+
+    # 2. Nuovi punti attorno al fronte, in un intorno via via più stretto
+    radius = (log_high - log_low) / (initial_points - 1)
+    for _ in range(iterations):
+        if not len(log_x):
+            break
+        parents = log_x[rng.integers(len(log_x), size=samples_per_iteration)]
+        children = np.clip(parents + radius * rng.uniform(-1, 1, parents.shape), log_low, log_high)
+        new_log_x, new_points = evaluate(children)
+        evaluations += len(children)
+        log_x, points = select(np.concatenate([log_x, new_log_x]),
+                               {name: np.concatenate([points[name], new_points[name]]) for name in points})
+        front_sizes.append(len(log_x))
+        radius = radius * shrink
+
+    order = np.argsort(points['efficiency'], kind='stable')
+    front = {name: points[name][order] for name in FRONT_FIELDS}
+    front.update({'objectives': objectives, 'evaluations': evaluations, 'front_sizes': front_sizes})
+    return front
+
+
+def save_front(path, front):
+    """Salva le colonne del fronte (FRONT_FIELDS) in un file .npz"""
+    with open(path, 'wb') as f:
+        np.savez(f, **{name: front[name] for name in FRONT_FIELDS})
@@ -0,0 +1,207 @@
+"""
+Simulazione Monte Carlo a particelle del calcium looping, per verificare le ipotesi
+analitiche del modello (frazioni dell'Equazione 9, tempi di residenza esponenziali
+dell'Equazione 17) e studiare casi non ideali.
+
+Lo stato della popolazione è tenuto in array numpy contigui (nessun oggetto per
+particella): numero di ciclo, tempo di residenza del passaggio corrente e tempo
+residuo, conversione dell'ultimo passaggio e CO2 catturata dall'ingresso nel sistema.
+A ogni passo le particelle che escono dal carbonatore raggiungono la conversione
+dell'Eq. (4) (conversion_at_time_t_array) per il loro ciclo e tempo di residenza;
+una frazione F0/(F0 + FR) viene spurgata e sostituita da sorbente fresco, le altre
+tornano dal calcinatore al ciclo successivo.
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from equations import MAX_EFFICIENCY, CarbonCaptureModel
+
+
+class ParticleSimulator:
+    """Popolazione di particelle del carbonatore con stato in array numpy"""
+
+    def __init__(self, capture_model=None, n_particles=1_000_000, n_tanks=1, seed=None):
+        """
+        Args:
+            capture_model (CarbonCaptureModel): Modello da cui prendere parametri ed
+                equazioni; default CarbonCaptureModel().
+            n_particles (int): Particelle simulate (ognuna rappresenta W/n_particles mol di CaO).
+            n_tanks (int): Reattori in serie equivalenti per la distribuzione dei tempi di
+                residenza: 1 è il reattore a miscelazione perfetta del modello (esponenziale),
+                valori maggiori danno distribuzioni Gamma sempre più strette (caso non ideale).
+            seed (int o SeedSequence): Seed del generatore.
+        """
+        self.capture_model = capture_model if capture_model is not None else CarbonCaptureModel()
+        self.n_particles = n_particles
+        self.n_tanks = n_tanks
+        self.rng = np.random.default_rng(seed)
+
+        self.cycle = np.ones(n_particles, dtype=np.int32)
+        self.residence = np.zeros(n_particles)      # durata del passaggio corrente (s)
+        self.remaining = np.zeros(n_particles)      # tempo residuo nel carbonatore (s)
+        self.conversion = np.zeros(n_particles)     # conversione raggiunta nell'ultimo passaggio
+        self.captured = np.zeros(n_particles)       # mol CO2/mol CaO catturate dall'ingresso
+
+    def _flows(self, conditions):
+        """(FCO2, F0, FR, W, τ) in mol/s, mol di CaO e secondi"""
+        # Con FR = 0 o Ws = 0 il tempo di residenza τ = W/FR non è definito o è nullo
+        for name in ('Ws_per_MW', 'FR_FCO2_ratio'):
+            if not conditions[name] > 0:
+                raise ValueError(f"{name} deve essere > 0 per la simulazione a particelle, "
+                                 f"non {conditions[name]!r}")
+        model = self.capture_model
+        FCO2, F0, FR = model.get_operating_flows(conditions['F0_FCO2_ratio'], conditions['FR_FCO2_ratio'])
+        W = conditions['Ws_per_MW'] / model.params.M_CaO_kg
+        return FCO2, F0, FR, W, W / FR
+
+    def _sample_residence(self, size, tau):
+        """Tempi di residenza con media tau: esponenziali (n_tanks=1) o Gamma(n_tanks, tau/n_tanks)"""
+        if self.n_tanks == 1:
+            return self.rng.exponential(tau, size)
+        return self.rng.gamma(self.n_tanks, tau / self.n_tanks, size)
+
+    def initialize(self, conditions, initial='steady'):
+        """
+        Inizializza la popolazione: 'steady' con cicli distribuiti secondo l'Eq. (9),
+        'fresh' con tutto sorbente fresco. Ogni particella parte in un punto casuale
+        del suo passaggio nel carbonatore.
+        """
+        FCO2, F0, FR, W, tau = self._flows(conditions)
+        n = self.n_particles
+        if initial == 'steady':
+            self.cycle[:] = self.rng.geometric(F0 / (F0 + FR), n)
+        elif initial == 'fresh':
+            self.cycle[:] = 1
+        else:
+            raise ValueError(f"Stato iniziale non valido: {initial!r} (valori ammessi: steady, fresh)")
+        self.residence[:] = self._sample_residence(n, tau)
+        self.remaining[:] = self.residence * self.rng.random(n)
+        self.conversion[:] = 0.0
+        self.captured[:] = 0.0
+
+    def step(self, dt, conditions):
+        """
+        Avanza la popolazione di dt secondi.
+
+        Returns:
+            tuple: (uscite, somma delle conversioni all'uscita, uscite con residenza <= tK).
+        """
+        FCO2, F0, FR, W, tau = self._flows(conditions)
+        purge_probability = F0 / (F0 + FR)
+        tK_seconds = self.capture_model.params.t_kinetic * 60
+
+        self.remaining -= dt
+        exits = conversion_sum = kinetic_exits = 0
+        index = np.flatnonzero(self.remaining <= 0)
+        # Una particella con residenza molto breve può uscire più volte nello stesso passo
+        while index.size:
+            residence = self.residence[index]
+            conversion = self.capture_model.equations.conversion_at_time_t_array(
+                self.cycle[index], residence / 60)
+            self.conversion[index] = conversion
+            self.captured[index] += conversion
+            exits += index.size
+            conversion_sum += float(conversion.sum())
+            kinetic_exits += int(np.count_nonzero(residence <= tK_seconds))
+
+            purged = self.rng.random(index.size) < purge_probability
+            self.cycle[index] = np.where(purged, 1, self.cycle[index] + 1)
+            self.captured[index[purged]] = 0.0
+
+            new_residence = self._sample_residence(index.size, tau)
+            self.residence[index] = new_residence
+            self.remaining[index] += new_residence
+            index = index[self.remaining[index] <= 0]
+
+        return exits, conversion_sum, kinetic_exits
+
+    def cycle_fractions(self, max_cycle=50):
+        """Frazioni di particelle ai cicli 1..max_cycle (l'ultima include i cicli successivi)"""
+        counts = np.bincount(np.minimum(self.cycle, max_cycle), minlength=max_cycle + 1)[1:]
+        return counts / self.n_particles
+
+    def run(self, conditions, t_end, dt=1.0, warmup=None, initial='steady', max_cycle=50):
+        """
+        Simula t_end secondi (dopo un riscaldamento di warmup secondi, default 5τ) e
+        confronta i risultati con il modello analitico.
+
+        Returns:
+            dict: 'efficiency' (limitata a MAX_EFFICIENCY come nel modello) e 'efficiency_uncapped',
+                'average_conversion' media delle particelle in uscita, 'active_fraction'
+                (uscite con residenza <= tK, da confrontare con l'Eq. 17),
+                'cycle_fractions' e 'cycle_fractions_eq9', 'exits', e 'model' con il
+                risultato di capture_efficiency nelle stesse condizioni.
+        """
+        FCO2, F0, FR, W, tau = self._flows(conditions)
+        if warmup is None:
+            warmup = 5 * tau
+        self.initialize(conditions, initial)
+
+        for _ in range(int(np.ceil(warmup / dt))):
+            self.step(dt, conditions)
+
+        exits = kinetic_exits = 0
+        conversion_sum = 0.0
+        n_steps = int(np.ceil(t_end / dt))
+        for _ in range(n_steps):
+            step_exits, step_conversion, step_kinetic = self.step(dt, conditions)
+            exits += step_exits
+            conversion_sum += step_conversion
+            kinetic_exits += step_kinetic
+
+        # Ogni particella rappresenta W/n_particles mol di CaO
+        captured_rate = conversion_sum * W / self.n_particles / (n_steps * dt)
+        efficiency = captured_rate / FCO2 if FCO2 > 0 else 0.0
+        p = F0 / (F0 + FR)
+        eq9 = p * np.power(1 - p, np.arange(max_cycle))
+        eq9[-1] = np.power(1 - p, max_cycle - 1)
+
+        return {
+            'efficiency': min(efficiency, MAX_EFFICIENCY),
+            'efficiency_uncapped': efficiency,
+            'average_conversion': conversion_sum / exits if exits else 0.0,
+            'active_fraction': kinetic_exits / exits if exits else 0.0,
+            'residence_time_min': tau / 60,
+            'exits': exits,
+            'cycle_fractions': self.cycle_fractions(max_cycle),
+            'cycle_fractions_eq9': eq9,
+            'model': self.capture_model.capture_efficiency(conditions),
+        }
+
+
+def _run_replica(args):
+    capture_model, seed, simulator_options, run_options = args
+    simulator = ParticleSimulator(capture_model, seed=seed, **simulator_options)
+    return simulator.run(**run_options)
+
+
+def run_replicas(conditions, t_end, n_replicas=4, seed=None, n_workers=1, capture_model=None,
+                 n_particles=1_000_000, n_tanks=1, **run_options):
+    """
+    Esegue n_replicas simulazioni indipendenti (generatori figli di SeedSequence(seed)),
+    nel processo corrente o su un pool di processi.
+
+    Returns:
+        dict: 'replicas' (risultati di ParticleSimulator.run) e, per 'efficiency',
+            'average_conversion' e 'active_fraction', media e errore standard tra le repliche.
+    """
+    capture_model = capture_model if capture_model is not None else CarbonCaptureModel()
+    seeds = np.random.SeedSequence(seed).spawn(n_replicas)
+    simulator_options = {'n_particles': n_particles, 'n_tanks': n_tanks}
+    run_options = dict(run_options, conditions=conditions, t_end=t_end)
+    tasks = [(capture_model, child, simulator_options, run_options) for child in seeds]
+
+    if n_workers == 1 or n_replicas <= 1:
+        replicas = [_run_replica(task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=n_workers) as executor:
+            replicas = list(executor.map(_run_replica, tasks))
+
+    summary = {'replicas': replicas}
+    for key in ('efficiency', 'average_conversion', 'active_fraction'):
+        values = np.array([replica[key] for replica in replicas])
+        summary[key] = float(values.mean())
+        summary[f'{key}_stderr'] = float(values.std(ddof=1) / np.sqrt(len(values))) if len(values) > 1 else 0.0
+    return summary
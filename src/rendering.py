@@ -0,0 +1,167 @@
+"""
+Salvataggio dei grafici su file in parallelo, con cache per contenuto.
+
+Ogni figura è descritta da un nome, da una funzione di disegno draw(data) -> Figure
+(definita a livello di modulo, per poterla eseguire in un processo worker) e dai
+dati da disegnare. Le figure vengono disegnate e salvate su un pool di processi con
+backend Agg; un manifest 'figures.json' nella cartella di uscita conserva per ogni
+file l'hash SHA-256 di dati, codice della funzione di disegno, risoluzione e formato,
+e le figure il cui hash coincide con quello del file esistente non vengono ridisegnate.
+"""
+
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from lazy_import import lazy_module
+from result_store import result_key
+
+# matplotlib viene importato solo al primo salvataggio
+matplotlib = lazy_module('matplotlib')
+plt = lazy_module('matplotlib.pyplot')
+
+# Formati di file supportati
+RENDER_FORMATS = ('png', 'svg')
+
+MANIFEST_FILE = 'figures.json'
+
+
+def _code_fingerprint(code):
+    """Bytecode e costanti di un oggetto codice, incluse le funzioni annidate (es. comprehension)"""
+    constants = [_code_fingerprint(const) if hasattr(const, 'co_code') else repr(const)
+                 for const in code.co_consts]
+    return [code.co_code, constants]
+
+
+def _draw_fingerprint(draw):
+    """Identità della funzione di disegno: nome qualificato e codice (cambia se cambia il grafico)"""
+    return [f'{draw.__module__}.{draw.__qualname__}', _code_fingerprint(draw.__code__)]
+
+
+class FigureJob:
+    """Figura da salvare: nome del file (senza estensione), funzione di disegno, dati e opzioni"""
+
+    def __init__(self, name, draw, data, dpi=300, output_format='png'):
+        if output_format not in RENDER_FORMATS:
+            raise ValueError(f"Formato non valido: {output_format!r} (valori ammessi: {', '.join(RENDER_FORMATS)})")
+        self.name = name
+        self.draw = draw
+        self.data = data
+        self.dpi = dpi
+        self.output_format = output_format
+
+    @property
+    def filename(self):
+        return f'{self.name}.{self.output_format}'
+
+    def key(self):
+        """Hash del contenuto della figura: dati, funzione di disegno, risoluzione e formato"""
+        return result_key(f'figure:{self.name}', _draw_fingerprint(self.draw),
+                          {'data': self.data, 'dpi': self.dpi, 'format': self.output_format})
+
+
+def _init_worker():
+    # Nei processi worker le figure vengono solo salvate: backend non interattivo
+    matplotlib.use('Agg', force=True)
+
+
+def _render_job(job, path):
+    """Disegna e salva una figura (scrittura atomica); restituisce la durata in secondi"""
+    start = time.perf_counter()
+    figure = job.draw(job.data)
+    tmp_path = f'{path}.tmp'
+    try:
+        figure.savefig(tmp_path, dpi=job.dpi, format=job.output_format, bbox_inches='tight')
+    finally:
+        plt.close(figure)
+    os.replace(tmp_path, path)
+    return time.perf_counter() - start
+
+
+class FigureRenderer:
+    """Coda di figure da salvare in output_dir, disegnate insieme da render()"""
+
+    def __init__(self, output_dir='data', dpi=300, output_format='png', figure_options=None,
+                 n_workers=None, force=False):
+        """
+        Args:
+            output_dir (str): Cartella dei file (creata se non esiste).
+            dpi (int): Risoluzione di default.
+            output_format (str): Formato di default, 'png' o 'svg'.
+            figure_options (dict): Opzioni per figura, {nome: {'dpi': ..., 'format': ...}}.
+            n_workers (int): Processi del pool (None = tutti i core, 1 = nel processo corrente).
+            force (bool): Ridisegna anche le figure già aggiornate.
+        """
+        if output_format not in RENDER_FORMATS:
+            raise ValueError(f"Formato non valido: {output_format!r} (valori ammessi: {', '.join(RENDER_FORMATS)})")
+        self.output_dir = output_dir
+        self.dpi = dpi
+        self.output_format = output_format
+        self.figure_options = dict(figure_options or {})
+        self.n_workers = n_workers
+        self.force = force
+        self.jobs = []
+
+    def submit(self, name, draw, data):
+        """Accoda una figura; con lo stesso nome sostituisce quella accodata in precedenza"""
+        options = self.figure_options.get(name, {})
+        job = FigureJob(name, draw, data, dpi=options.get('dpi', self.dpi),
+                        output_format=options.get('format', self.output_format))
+        self.jobs = [queued for queued in self.jobs if queued.name != name] + [job]
+        return job
+
+    def _manifest_path(self):
+        return os.path.join(self.output_dir, MANIFEST_FILE)
+
+    def _load_manifest(self):
+        try:
+            with open(self._manifest_path(), encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save_manifest(self, manifest):
+        tmp_path = f'{self._manifest_path()}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, self._manifest_path())
+
+    def render(self):
+        """
+        Salva le figure accodate e svuota la coda.
+
+        Returns:
+            list: Un dizionario per figura con 'name', 'path', 'rendered' (False se il
+                file era già aggiornato) e 'seconds' (durata del disegno).
+        """
+        jobs, self.jobs = self.jobs, []
+        if not jobs:
+            return []
+        os.makedirs(self.output_dir, exist_ok=True)
+        manifest = self._load_manifest()
+
+        results = []
+        pending = []
+        for job in jobs:
+            path = os.path.join(self.output_dir, job.filename)
+            key = job.key()
+            result = {'name': job.name, 'path': path, 'rendered': False, 'seconds': 0.0}
+            if self.force or manifest.get(job.filename) != key or not os.path.exists(path):
+                pending.append((job, path, key, result))
+            results.append(result)
+
+        if self.n_workers == 1 or len(pending) <= 1:
+            durations = [_render_job(job, path) for job, path, _, _ in pending]
+        else:
+            n_workers = min(self.n_workers or os.cpu_count() or 1, len(pending))
+            with ProcessPoolExecutor(max_workers=n_workers, initializer=_init_worker) as executor:
+                durations = list(executor.map(_render_job, *zip(*[(job, path) for job, path, _, _ in pending])))
+
+        for (job, _, key, result), seconds in zip(pending, durations):
+            manifest[job.filename] = key
+            result['rendered'] = True
+            result['seconds'] = seconds
+        if pending:
+            self._save_manifest(manifest)
+        return results
@@ -0,0 +1,199 @@
+"""
+Archivio persistente su disco dei risultati degli studi parametrici.
+
+Ogni voce è una cartella <chiave>/ con un file .npy per array e un 'meta.json';
+la chiave è l'hash SHA-256 dei parametri del modello, del nome dello studio e
+della griglia di ingresso. Gli array vengono riletti in memory-map, quindi anche
+griglie molto grandi si ricaricano senza copiarle in memoria. Quando la dimensione
+totale supera max_bytes si eliminano le voci usate meno di recente.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import time
+
+import numpy as np
+
+_META_FILE = 'meta.json'
+
+
+def _hash_value(digest, value):
+    """Aggiunge al digest una rappresentazione stabile di value (array, scalari, dict, sequenze)"""
+    if isinstance(value, dict):
+        digest.update(b'{')
+        for key in sorted(value):
+            digest.update(repr(key).encode('utf-8'))
+            _hash_value(digest, value[key])
+        digest.update(b'}')
+    elif isinstance(value, (list, tuple)):
+        digest.update(b'[')
+        for item in value:
+            _hash_value(digest, item)
+        digest.update(b']')
+    elif isinstance(value, np.ndarray) or np.isscalar(value) and not isinstance(value, str):
+        array = np.ascontiguousarray(value)
+        digest.update(f'{array.dtype.str}{array.shape}'.encode('utf-8'))
+        digest.update(array.tobytes())
+    else:
+        digest.update(repr(value).encode('utf-8'))
+
+
+def result_key(study, params, inputs):
+    """
+    Chiave stabile di un risultato.
+
+    Args:
+        study (str): Nome dello studio o della funzione che produce il risultato.
+        params (iterable): Oggetti con metodo fingerprint() (es. ModelParameters) o
+            valori qualsiasi da cui dipende il risultato.
+        inputs (dict): Griglia e argomenti dello studio (array o scalari).
+
+    Returns:
+        str: Hash esadecimale SHA-256.
+    """
+    digest = hashlib.sha256(study.encode('utf-8'))
+    for item in params:
+        fingerprint = getattr(item, 'fingerprint', None)
+        _hash_value(digest, fingerprint() if callable(fingerprint) else item)
+    _hash_value(digest, inputs)
+    return digest.hexdigest()
+
+
+class ResultStore:
+    """Archivio su disco di dizionari di array numpy, con espulsione per dimensione"""
+
+    def __init__(self, directory, max_bytes=2 * 1024 ** 3):
+        """
+        Args:
+            directory (str): Cartella dell'archivio (creata se non esiste).
+            max_bytes (int): Dimensione massima complessiva delle voci salvate.
+        """
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.rejected = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def _entry_path(self, key):
+        return os.path.join(self.directory, key)
+
+    def __contains__(self, key):
+        return os.path.isfile(os.path.join(self._entry_path(key), _META_FILE))
+
+    def get(self, key, mmap_mode='r'):
+        """
+        Rilegge una voce salvata.
+
+        Returns:
+            dict: {nome: array} (in sola lettura e memory-mapped con mmap_mode='r'),
+                oppure None se la voce non esiste.
+        """
+        path = self._entry_path(key)
+        meta_path = os.path.join(path, _META_FILE)
+        try:
+            with open(meta_path, encoding='utf-8') as f:
+                meta = json.load(f)
+            arrays = {name: np.load(os.path.join(path, f'{name}.npy'), mmap_mode=mmap_mode)
+                      for name in meta['arrays']}
+        except (OSError, ValueError, KeyError):
+            self.misses += 1
+            return None
+
+        # L'mtime di meta.json segna l'ultimo utilizzo per l'espulsione LRU
+        os.utime(meta_path)
+        self.hits += 1
+        return arrays
+
+    def put(self, key, arrays, study=None):
+        """
+        Salva un dizionario {nome: array} sotto key (scrittura atomica tramite cartella
+        temporanea) e applica il limite di dimensione, senza mai espellere la voce appena
+        salvata. Una voce che da sola supera max_bytes non viene salvata.
+
+        Returns:
+            str: Percorso della voce, oppure None se la voce supera max_bytes.
+        """
+        path = self._entry_path(key)
+        tmp_path = f'{path}.tmp-{os.getpid()}'
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        os.makedirs(tmp_path)
+
+        size = 0
+        for name, values in arrays.items():
+            file_path = os.path.join(tmp_path, f'{name}.npy')
+            np.save(file_path, np.asarray(values))
+            size += os.path.getsize(file_path)
+
+        if size > self.max_bytes:
+            shutil.rmtree(tmp_path, ignore_errors=True)
+            self.rejected += 1
+            return None
+
+        meta = {'study': study, 'arrays': list(arrays), 'bytes': size, 'created': time.time()}
+        with open(os.path.join(tmp_path, _META_FILE), 'w', encoding='utf-8') as f:
+            json.dump(meta, f)
+
+        try:
+            os.replace(tmp_path, path)
+        except OSError:
+            # Voce già scritta da un altro processo con la stessa chiave
+            shutil.rmtree(tmp_path, ignore_errors=True)
+
+        self.evict(keep=key)
+        return path
+
+    def _entries(self):
+        """Voci presenti come (ultimo utilizzo, byte, chiave)"""
+        entries = []
+        for key in os.listdir(self.directory):
+            meta_path = os.path.join(self._entry_path(key), _META_FILE)
+            try:
+                with open(meta_path, encoding='utf-8') as f:
+                    size = json.load(f)['bytes']
+                entries.append((os.path.getmtime(meta_path), size, key))
+            except (OSError, ValueError, KeyError):
+                continue
+        return entries
+
+    def evict(self, max_bytes=None, keep=None):
+        """
+        Elimina le voci usate meno di recente finché il totale non rientra in max_bytes;
+        la voce con chiave keep non viene mai eliminata.
+        """
+        if max_bytes is None:
+            max_bytes = self.max_bytes
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        for _, size, key in entries:
+            if total <= max_bytes:
+                break
+            if key == keep:
+                continue
+            shutil.rmtree(self._entry_path(key), ignore_errors=True)
+            total -= size
+            removed += 1
+        self.evictions += removed
+        return removed
+
+    def clear(self):
+        """Elimina tutte le voci dell'archivio"""
+        return self.evict(max_bytes=0)
+
+    def info(self):
+        """Statistiche dell'archivio"""
+        entries = self._entries()
+        return {
+            'directory': self.directory,
+            'entries': len(entries),
+            'bytes': sum(size for _, size, _ in entries),
+            'max_bytes': self.max_bytes,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'rejected': self.rejected,
+        }
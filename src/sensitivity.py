@@ -0,0 +1,254 @@
+"""
+Analisi di sensitività globale (indici di Sobol) dell'efficienza di cattura rispetto
+alle condizioni operative e ai parametri del sorbente.
+
+Schema di campionamento di Saltelli: due matrici base A e B (N × d) e le d matrici
+AB_i (A con la colonna i presa da B), per N·(d + 2) valutazioni del modello eseguite
+a blocchi con capture_efficiency_batch, nel processo corrente o su un pool di processi.
+Indici del primo ordine con lo stimatore di Saltelli (2010) e totali con quello di
+Jansen; intervalli di confidenza per bootstrap vettoriale sulle N righe.
+"""
+
+import functools
+import itertools
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from equations import SAMPLED_PARAMETERS
+from lazy_import import lazy_module
+from parallel import split_ranges
+
+# scipy serve solo per il campionamento quasi-casuale (sampler='sobol')
+qmc = lazy_module('scipy.stats.qmc')
+
+# Fattori che corrispondono alle condizioni operative di capture_efficiency_batch
+OPERATING_FACTORS = ('Ws_per_MW', 'F0_FCO2_ratio', 'FR_FCO2_ratio')
+
+# Uscite analizzate per default
+OUTPUTS = ('efficiency', 'efficiency_kinetic', 'efficiency_diffusion')
+
+# Valori massimi delle uscite ricampionate per blocco di repliche bootstrap (~128 MB)
+BOOTSTRAP_BLOCK_VALUES = 1 << 24
+
+
+def saltelli_design(bounds, n_base, seed=None, sampler='random'):
+    """
+    Matrici del disegno di Saltelli.
+
+    Args:
+        bounds (dict): {fattore: (min, max)}, campionamento uniforme.
+        n_base (int): Righe N delle matrici base.
+        seed (int): Seed del generatore.
+        sampler (str): 'random' (numpy) oppure 'sobol' (sequenza di Sobol scramblata, scipy;
+            conviene un n_base potenza di 2).
+
+    Returns:
+        tuple: (A, B, AB) con A e B di forma (N, d) e AB di forma (d, N, d).
+    """
+    names = list(bounds)
+    d = len(names)
+    if sampler == 'sobol':
+        unit = qmc.Sobol(2 * d, scramble=True, seed=seed).random(n_base)
+    elif sampler == 'random':
+        unit = np.random.default_rng(seed).random((n_base, 2 * d))
+    else:
+        raise ValueError(f"Campionatore non valido: {sampler!r} (valori ammessi: random, sobol)")
+
+    low = np.array([bounds[name][0] for name in names], dtype=float)
+    high = np.array([bounds[name][1] for name in names], dtype=float)
+    A = low + unit[:, :d] * (high - low)
+    B = low + unit[:, d:] * (high - low)
+
+    AB = np.repeat(A[None, :, :], d, axis=0)
+    for i in range(d):
+        AB[i, :, i] = B[:, i]
+    return A, B, AB
+
+
+# Modello e fattori del processo worker, inizializzati una sola volta per processo
+_worker_state = None
+
+
+def _init_worker(state):
+    global _worker_state
+    _worker_state = state
+
+
+def _evaluate_rows(X):
+    """_evaluate_rows_with_state con lo stato del processo worker"""
+    return _evaluate_rows_with_state(_worker_state, X)
+
+
+def _evaluate_rows_with_state(state, X):
+    """Valuta le righe di X (campioni × fattori) e restituisce le uscite richieste"""
+    model, names, defaults, outputs = state
+    columns = dict(zip(names, X.T))
+    operating = [columns.pop(name) if name in columns else defaults[name] for name in OPERATING_FACTORS]
+    batch = model.capture_efficiency_batch(*operating, samples=columns)
+    return np.stack([batch[output] for output in outputs]), batch['valid']
+
+
+def evaluate_design(model, names, X, defaults, outputs=OUTPUTS, n_workers=1, chunk_size=65536):
+    """
+    Valuta il modello sulle righe di X a blocchi di chunk_size.
+
+    Returns:
+        tuple: (Y, valid) con Y di forma (len(outputs), righe) e valid booleano per riga.
+    """
+    state = (model, list(names), defaults, tuple(outputs))
+    ranges = split_ranges(len(X), chunk_size)
+    blocks = [X[start:stop] for start, stop in ranges]
+
+    if n_workers == 1 or len(blocks) <= 1:
+        # Lo stato globale serve solo ai processi del pool: in serie si passa esplicitamente
+        results = list(map(functools.partial(_evaluate_rows_with_state, state), blocks))
+    else:
+        with ProcessPoolExecutor(max_workers=n_workers, initializer=_init_worker,
+                                 initargs=(state,)) as executor:
+            results = list(executor.map(_evaluate_rows, blocks))
+
+    if not results:
+        return np.empty((len(outputs), 0)), np.empty(0, dtype=bool)
+    return (np.concatenate([Y for Y, _ in results], axis=1),
+            np.concatenate([valid for _, valid in results]))
+
+
+def check_bounds(model, bounds):
+    """
+    Verifica che ogni punto del box dei fattori sia ammissibile: condizioni operative
+    non negative e parametri validi secondo model.parameter_validity (k > 0,
+    0 <= Xr < X1, t_kinetic > 0, T0 > t_kinetic). I vincoli sono lineari, quindi
+    basta controllare i vertici del box.
+    """
+    for name, (low, high) in bounds.items():
+        if not low <= high:
+            raise ValueError(f"Intervallo di {name} non valido: ({low}, {high})")
+        if name in OPERATING_FACTORS and low < 0:
+            raise ValueError(f"Intervallo di {name} non valido: la condizione operativa deve essere >= 0")
+
+    names = [name for name in bounds if name in SAMPLED_PARAMETERS]
+    if not names:
+        return
+    corners = np.array(list(itertools.product((0, 1), repeat=len(names))), dtype=bool)
+    samples = {name: np.where(corners[:, i], bounds[name][1], bounds[name][0])
+               for i, name in enumerate(names)}
+    valid = np.broadcast_to(model.parameter_validity(samples), (len(corners),))
+    if not valid.all():
+        corner = {name: float(values[np.argmin(valid)]) for name, values in samples.items()}
+        raise ValueError(f"Intervalli dei parametri non ammissibili, ad es. nel vertice {corner} "
+                         f"(servono k > 0, 0 <= Xr < X1, t_kinetic > 0, T0 > t_kinetic)")
+
+
+def sobol_indices(fA, fB, fAB):
+    """
+    Indici di Sobol del primo ordine (Saltelli 2010) e totali (Jansen 1999).
+
+    Args:
+        fA, fB (np.ndarray): Uscite sulle matrici base, forma (..., N).
+        fAB (np.ndarray): Uscite sulle matrici AB_i, forma (d, ..., N).
+
+    Returns:
+        tuple: (S1, ST) di forma (d, ...).
+    """
+    variance = np.var(np.concatenate([fA, fB], axis=-1), axis=-1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        S1 = np.mean(fB * (fAB - fA), axis=-1) / variance
+        ST = 0.5 * np.mean((fA - fAB) ** 2, axis=-1) / variance
+    return S1, ST
+
+
+def sobol_analysis(model, bounds, n_base=10_000, outputs=OUTPUTS, operating_conditions=None,
+                   n_bootstrap=200, confidence=0.95, seed=None, sampler='random',
+                   n_workers=1, chunk_size=65536):
+    """
+    Indici di Sobol delle uscite di capture_efficiency_batch.
+
+    Args:
+        model (CarbonCaptureModel): Modello di cattura; i parametri non campionati
+            restano quelli di model.params.
+        bounds (dict): {fattore: (min, max)} con fattori in OPERATING_FACTORS o in
+            SAMPLED_PARAMETERS, campionati uniformemente; tutto il box deve essere
+            ammissibile (vedi check_bounds), altrimenti ValueError.
+        n_base (int): Righe N delle matrici base (N·(d + 2) valutazioni in totale).
+        outputs (tuple): Uscite di capture_efficiency_batch da analizzare.
+        operating_conditions (dict): Valori fissi delle condizioni operative non
+            incluse in bounds.
+        n_bootstrap (int): Ricampionamenti bootstrap per gli intervalli di confidenza.
+        confidence (float): Livello degli intervalli (percentili del bootstrap).
+        seed (int): Seed per disegno e bootstrap.
+        sampler (str): 'random' oppure 'sobol' (vedi saltelli_design).
+        n_workers (int): 1 per l'esecuzione seriale, altrimenti processi del pool.
+        chunk_size (int): Righe valutate per blocco.
+
+    Returns:
+        dict: 'factors', 'n_base', 'evaluations', 'invalid' (valutazioni non valide,
+            incluse con valore 0) e 'indices': {uscita: {'S1', 'S1_conf', 'ST',
+            'ST_conf'}} con array per fattore e intervalli come (basso, alto).
+    """
+    names = list(bounds)
+    unknown = set(names) - set(OPERATING_FACTORS) - set(SAMPLED_PARAMETERS)
+    if unknown:
+        raise ValueError(f"Fattori non validi: {', '.join(sorted(unknown))}")
+    defaults = dict(operating_conditions or {})
+    missing = [name for name in OPERATING_FACTORS if name not in names and name not in defaults]
+    if missing:
+        raise ValueError(f"Condizioni operative mancanti: {', '.join(missing)}")
+    check_bounds(model, bounds)
+
+    d = len(names)
+    A, B, AB = saltelli_design(bounds, n_base, seed, sampler)
+    X = np.concatenate([A, B, AB.reshape(d * n_base, d)])
+    Y, valid = evaluate_design(model, names, X, defaults, outputs, n_workers, chunk_size)
+
+    fA = Y[:, :n_base]
+    fB = Y[:, n_base:2 * n_base]
+    fAB = Y[:, 2 * n_base:].reshape(len(outputs), d, n_base).transpose(1, 0, 2)
+    S1, ST = sobol_indices(fA, fB, fAB)
+
+    # Bootstrap: stesse righe ricampionate per A, B e tutte le AB_i, con le repliche su un
+    # asse in più di sobol_indices, a blocchi di al più BOOTSTRAP_BLOCK_VALUES valori
+    rng = np.random.default_rng(np.random.SeedSequence(seed).spawn(1)[0])
+    rows = rng.integers(0, n_base, (n_bootstrap, n_base))
+    S1_boot = np.empty((n_bootstrap, d, len(outputs)))
+    ST_boot = np.empty((n_bootstrap, d, len(outputs)))
+    block = max(1, BOOTSTRAP_BLOCK_VALUES // max(1, (d + 2) * len(outputs) * n_base))
+    for start, stop in split_ranges(n_bootstrap, block):
+        sample = rows[start:stop]
+        S1_block, ST_block = sobol_indices(fA[:, sample], fB[:, sample], fAB[:, :, sample])
+        # (d, uscite, repliche) -> (repliche, d, uscite)
+        S1_boot[start:stop] = np.moveaxis(S1_block, -1, 0)
+        ST_boot[start:stop] = np.moveaxis(ST_block, -1, 0)
+    tail = (1 - confidence) / 2 * 100
+    S1_conf = np.nanpercentile(S1_boot, [tail, 100 - tail], axis=0)
+    ST_conf = np.nanpercentile(ST_boot, [tail, 100 - tail], axis=0)
+
+    indices = {}
+    for j, output in enumerate(outputs):
+        indices[output] = {
+            'S1': S1[:, j],
+            'S1_conf': (S1_conf[0, :, j], S1_conf[1, :, j]),
+            'ST': ST[:, j],
+            'ST_conf': (ST_conf[0, :, j], ST_conf[1, :, j]),
+        }
+
+    return {
+        'factors': names,
+        'n_base': n_base,
+        'evaluations': len(X),
+        'invalid': int((~valid).sum()),
+        'indices': indices,
+    }
+
+
+def print_indices(analysis, output='efficiency'):
+    """Stampa la tabella degli indici di Sobol di un'uscita"""
+    indices = analysis['indices'][output]
+    print(f"\nIndici di Sobol per '{output}' ({analysis['evaluations']} valutazioni)")
+    print(f"{'Fattore':<16} {'S1':>8} {'IC S1':>20} {'ST':>8} {'IC ST':>20}")
+    print("-" * 76)
+    for i, name in enumerate(analysis['factors']):
+        S1_low, S1_high = indices['S1_conf'][0][i], indices['S1_conf'][1][i]
+        ST_low, ST_high = indices['ST_conf'][0][i], indices['ST_conf'][1][i]
+        print(f"{name:<16} {indices['S1'][i]:>8.3f} {f'[{S1_low:.3f}, {S1_high:.3f}]':>20} "
+              f"{indices['ST'][i]:>8.3f} {f'[{ST_low:.3f}, {ST_high:.3f}]':>20}")
@@ -0,0 +1,361 @@
+"""
+Server locale di interrogazione del modello di cattura (asyncio, JSON lines).
+
+Il server tiene in memoria un unico CarbonCaptureModel già inizializzato e ascolta
+su localhost (TCP) o su un socket Unix. Ogni riga ricevuta è una richiesta JSON:
+    {"id": 1, "Ws_per_MW": 200, "F0_FCO2_ratio": 0.01, "FR_FCO2_ratio": 5}
+    {"id": 2, "method": "metrics"}
+e ogni risposta è una riga JSON con lo stesso "id" e "result" (nel formato di
+capture_efficiency) oppure "error". Le richieste che arrivano entro batch_window
+secondi dalla prima in coda, da qualsiasi connessione, vengono valutate insieme
+con capture_efficiency_batch; la risposta riporta la latenza della richiesta e la
+dimensione del blocco in cui è stata valutata.
+
+Uso da riga di comando:
+    python server.py --port 8765
+    python server.py --socket /tmp/cal.sock --batch-window-ms 5
+"""
+
+import argparse
+import asyncio
+import collections
+import itertools
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from equations import CarbonCaptureModel
+from instrumentation import Instrumentation
+
+# Chiavi delle condizioni operative di ogni richiesta
+CONDITION_KEYS = ('Ws_per_MW', 'F0_FCO2_ratio', 'FR_FCO2_ratio')
+
+# Limite di una riga di richiesta (byte)
+LINE_LIMIT = 1 << 20
+
+
+class CaptureServer:
+    """Server asyncio che raggruppa le richieste di capture_efficiency in blocchi vettoriali"""
+
+    def __init__(self, capture_model=None, batch_window=0.002, max_batch=8192, latency_history=10_000):
+        """
+        Args:
+            capture_model (CarbonCaptureModel): Modello da interrogare; default CarbonCaptureModel().
+            batch_window (float): Attesa massima (s) dopo la prima richiesta in coda
+                prima di valutare il blocco.
+            max_batch (int): Punti massimi per blocco (il blocco parte appena pieno).
+            latency_history (int): Latenze recenti conservate per i percentili.
+        """
+        self.capture_model = capture_model if capture_model is not None else CarbonCaptureModel()
+        self.batch_window = batch_window
+        self.max_batch = max_batch
+        self.instrumentation = Instrumentation(enabled=True)
+        self.latencies = collections.deque(maxlen=latency_history)
+        self.started = time.monotonic()
+        self._queue = None
+        self._server = None
+        self._batcher = None
+        # Il modello viene valutato in un thread dedicato: il loop resta libero di
+        # accettare le richieste che formeranno il blocco successivo
+        self._executor = ThreadPoolExecutor(max_workers=1)
+
+    async def start(self, host='127.0.0.1', port=0, path=None):
+        """
+        Avvia il server su host:port (port=0 sceglie una porta libera) o sul socket Unix path.
+
+        Returns:
+            str o tuple: Indirizzo effettivo (percorso del socket o (host, porta)).
+        """
+        self._queue = asyncio.Queue()
+        self.started = time.monotonic()
+        self._batcher = asyncio.create_task(self._batch_loop())
+        if path is not None:
+            self._server = await asyncio.start_unix_server(self._handle_connection, path, limit=LINE_LIMIT)
+        else:
+            self._server = await asyncio.start_server(self._handle_connection, host, port, limit=LINE_LIMIT)
+        return self.address
+
+    @property
+    def address(self):
+        return self._server.sockets[0].getsockname()
+
+    async def serve_forever(self):
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def close(self):
+        """Chiude il server, il ciclo dei blocchi e il thread del modello"""
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        if self._batcher is not None:
+            self._batcher.cancel()
+            try:
+                await self._batcher
+            except asyncio.CancelledError:
+                pass
+        self._executor.shutdown(wait=True)
+
+    async def _handle_connection(self, reader, writer):
+        self.instrumentation.count('connections')
+        pending = set()
+        lock = asyncio.Lock()
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except (ConnectionError, ValueError):
+                    break
+                if not line:
+                    break
+                if not line.strip():
+                    continue
+                # Ogni richiesta è servita in un task: le risposte partono appena pronte,
+                # anche fuori ordine rispetto alle richieste (si abbinano con "id")
+                task = asyncio.create_task(self._respond(line, writer, lock))
+                pending.add(task)
+                task.add_done_callback(pending.discard)
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+        finally:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+    async def _respond(self, line, writer, lock):
+        received = time.perf_counter()
+        response = await self.handle_request(line, received)
+        async with lock:
+            writer.write(json.dumps(response).encode('utf-8') + b'\n')
+            try:
+                await writer.drain()
+            except ConnectionError:
+                pass
+
+    async def handle_request(self, line, received=None):
+        """Risposta (dizionario) a una riga di richiesta JSON"""
+        received = time.perf_counter() if received is None else received
+        self.instrumentation.count('requests')
+        try:
+            request = json.loads(line)
+            if not isinstance(request, dict):
+                raise ValueError("la richiesta deve essere un oggetto JSON")
+        except ValueError as e:
+            self.instrumentation.count('errors')
+            return {'id': None, 'error': f"Richiesta non valida: {e}"}
+
+        request_id = request.get('id')
+        method = request.get('method', 'capture_efficiency')
+        if method == 'metrics':
+            return {'id': request_id, 'result': self.metrics()}
+        if method != 'capture_efficiency':
+            self.instrumentation.count('errors')
+            return {'id': request_id, 'error': f"Metodo sconosciuto: {method!r}"}
+
+        try:
+            conditions = tuple(float(request[key]) for key in CONDITION_KEYS)
+        except KeyError as e:
+            self.instrumentation.count('errors')
+            return {'id': request_id, 'error': f"Condizione operativa mancante: {e.args[0]}"}
+        except (TypeError, ValueError):
+            self.instrumentation.count('errors')
+            return {'id': request_id, 'error': "Le condizioni operative devono essere numeri"}
+
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((conditions, future))
+        try:
+            result, batch_size = await future
+        except Exception as e:
+            self.instrumentation.count('errors')
+            return {'id': request_id, 'error': f"Errore nel calcolo: {e}"}
+
+        latency_ms = (time.perf_counter() - received) * 1000
+        self.latencies.append(latency_ms)
+        self.instrumentation.observe('latency_ms', latency_ms)
+        response = {'id': request_id, 'result': result, 'latency_ms': latency_ms, 'batch_size': batch_size}
+        if 'error' in result:
+            response['error'] = result['error']
+        return response
+
+    async def _collect_batch(self):
+        """Prima richiesta in coda più quelle che arrivano entro batch_window (al massimo max_batch)"""
+        items = [await self._queue.get()]
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.batch_window
+        while len(items) < self.max_batch:
+            # Prima quelle già in coda, senza attendere
+            while len(items) < self.max_batch and not self._queue.empty():
+                items.append(self._queue.get_nowait())
+            remaining = deadline - loop.time()
+            if len(items) >= self.max_batch or remaining <= 0:
+                break
+            try:
+                items.append(await asyncio.wait_for(self._queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        return items
+
+    async def _batch_loop(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            items = await self._collect_batch()
+            conditions = np.array([item[0] for item in items], dtype=float)
+            start = time.perf_counter()
+            try:
+                results = await loop.run_in_executor(self._executor, self._evaluate, conditions)
+            except Exception as e:
+                for _, future in items:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            self.instrumentation.count('batches')
+            self.instrumentation.observe('batch_size', len(items))
+            self.instrumentation.observe('compute_ms', (time.perf_counter() - start) * 1000)
+            for (_, future), result in zip(items, results):
+                if not future.done():
+                    future.set_result((result, len(items)))
+
+    def _evaluate(self, conditions):
+        """Valuta un blocco di condizioni (righe Ws, F0/FCO2, FR/FCO2) e restituisce i risultati per punto"""
+        model = self.capture_model
+        batch = model.capture_efficiency_batch(conditions[:, 0], conditions[:, 1], conditions[:, 2])
+        return [model.batch_result_at(batch, i) for i in range(len(conditions))]
+
+    def metrics(self):
+        """
+        Metriche del server: contatori, dimensione dei blocchi, tempo di calcolo e
+        latenza (media, massima e percentili 50/95/99 sulle richieste recenti).
+        """
+        snapshot = self.instrumentation.snapshot()
+        values = snapshot['values']
+        metrics = {
+            'uptime_s': time.monotonic() - self.started,
+            'counters': snapshot['counters'],
+            'batch_size': values.get('batch_size'),
+            'compute_ms': values.get('compute_ms'),
+            'latency_ms': values.get('latency_ms'),
+        }
+        if self.latencies:
+            p50, p95, p99 = np.percentile(np.fromiter(self.latencies, dtype=float), [50, 95, 99])
+            metrics['latency_percentiles_ms'] = {'p50': p50, 'p95': p95, 'p99': p99}
+        return metrics
+
+
+class CaptureClient:
+    """
+    Client asyncio del server: più richieste possono essere in volo sulla stessa
+    connessione e le risposte vengono abbinate per "id".
+    """
+
+    def __init__(self):
+        self._reader = None
+        self._writer = None
+        self._pending = {}
+        self._ids = itertools.count(1)
+        self._receiver = None
+
+    @classmethod
+    async def connect(cls, host='127.0.0.1', port=8765, path=None):
+        """Si connette a host:port oppure al socket Unix path"""
+        client = cls()
+        if path is not None:
+            client._reader, client._writer = await asyncio.open_unix_connection(path, limit=LINE_LIMIT)
+        else:
+            client._reader, client._writer = await asyncio.open_connection(host, port, limit=LINE_LIMIT)
+        client._receiver = asyncio.create_task(client._receive())
+        return client
+
+    async def _receive(self):
+        try:
+            while True:
+                line = await self._reader.readline()
+                if not line:
+                    break
+                response = json.loads(line)
+                future = self._pending.pop(response.get('id'), None)
+                if future is not None and not future.done():
+                    future.set_result(response)
+        finally:
+            for future in self._pending.values():
+                if not future.done():
+                    future.set_exception(ConnectionError("Connessione al server chiusa"))
+            self._pending.clear()
+
+    async def request(self, payload):
+        """Invia una richiesta e ne attende la risposta completa (dizionario)"""
+        request_id = next(self._ids)
+        future = asyncio.get_running_loop().create_future()
+        self._pending[request_id] = future
+        self._writer.write(json.dumps({**payload, 'id': request_id}).encode('utf-8') + b'\n')
+        await self._writer.drain()
+        return await future
+
+    async def capture_efficiency(self, operating_conditions):
+        """Risultato di capture_efficiency calcolato dal server"""
+        response = await self.request({key: operating_conditions[key] for key in CONDITION_KEYS})
+        if 'result' not in response:
+            raise ValueError(response['error'])
+        return response['result']
+
+    async def capture_efficiency_many(self, operating_conditions):
+        """Risposte complete (con latenza e dimensione del blocco) per più condizioni, inviate insieme"""
+        return await asyncio.gather(*(self.request({key: conditions[key] for key in CONDITION_KEYS})
+                                      for conditions in operating_conditions))
+
+    async def metrics(self):
+        return (await self.request({'method': 'metrics'}))['result']
+
+    async def close(self):
+        self._writer.close()
+        try:
+            await self._writer.wait_closed()
+        except ConnectionError:
+            pass
+        if self._receiver is not None:
+            await asyncio.gather(self._receiver, return_exceptions=True)
+
+
+def query_server(operating_conditions, host='127.0.0.1', port=8765, path=None):
+    """Interrogazione sincrona: risposte del server per una lista di condizioni operative"""
+    async def run():
+        client = await CaptureClient.connect(host, port, path)
+        try:
+            return await client.capture_efficiency_many(operating_conditions)
+        finally:
+            await client.close()
+    return asyncio.run(run())
+
+
+async def _serve(args):
+    server = CaptureServer(batch_window=args.batch_window_ms / 1000, max_batch=args.max_batch)
+    address = await server.start(args.host, args.port, args.socket)
+    print(f"Server del modello di cattura in ascolto su {address}")
+    try:
+        await server.serve_forever()
+    finally:
+        await server.close()
+
+
+def run_cli(argv=None):
+    """Avvia il server con le opzioni da riga di comando"""
+    parser = argparse.ArgumentParser(description="Server locale del modello di cattura (JSON lines)")
+    parser.add_argument('--host', default='127.0.0.1', help="indirizzo di ascolto (default: 127.0.0.1)")
+    parser.add_argument('--port', type=int, default=8765, help="porta TCP (default: 8765)")
+    parser.add_argument('--socket', default=None, metavar='PATH', help="socket Unix al posto di TCP")
+    parser.add_argument('--batch-window-ms', type=float, default=2.0,
+                        help="attesa massima per raggruppare le richieste in un blocco (default: 2 ms)")
+    parser.add_argument('--max-batch', type=int, default=8192,
+                        help="punti massimi per blocco (default: 8192)")
+    args = parser.parse_args(argv)
+    try:
+        asyncio.run(_serve(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    run_cli()
@@ -0,0 +1,224 @@
+"""
+Scrittura incrementale su file dei risultati degli studi parametrici, a blocchi.
+
+Ogni sink accoda i blocchi prodotti da AdvancedAnalysis.parametric_study_chunks e,
+dopo ogni blocco completato, salva in un file di avanzamento JSON l'offset (punti già
+scritti) e la descrizione dello studio (forma della griglia, impronta dei parametri,
+condizioni operative): riaprendo lo stesso percorso la scrittura riprende dall'ultimo
+blocco completo, solo se lo studio è lo stesso, e gli eventuali dati di un blocco
+interrotto vengono scartati.
+
+Formati: CSV (un unico file), NPZ e Parquet (una cartella con un file per blocco;
+Parquet richiede pyarrow).
+"""
+
+import abc
+import csv
+import glob
+import json
+import os
+
+import numpy as np
+
+from lazy_import import lazy_module
+
+# pyarrow serve solo per ParquetSink: viene importato al primo utilizzo
+pa = lazy_module('pyarrow')
+pq = lazy_module('pyarrow.parquet')
+
+# Colonne dei blocchi di parametric_study_chunks
+STUDY_FIELDS = ('Ws_per_MW', 'residence_time_min', 'efficiency', 'average_conversion')
+
+
+class LinearGrid:
+    """
+    Griglia equispaziata come np.linspace(start, stop, num) calcolata a richiesta:
+    len() e slicing senza materializzare l'intero array.
+    """
+
+    def __init__(self, start, stop, num):
+        self.start = float(start)
+        self.stop = float(stop)
+        self.num = int(num)
+
+    def __len__(self):
+        return self.num
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice):
+            raise TypeError("LinearGrid supporta solo lo slicing")
+        first, last, stride = index.indices(self.num)
+        positions = np.arange(first, last, stride)
+        if self.num == 1:
+            return np.full(len(positions), self.start)
+        step = (self.stop - self.start) / (self.num - 1)
+        values = self.start + positions * step
+        # Come np.linspace l'ultimo punto coincide esattamente con stop
+        return np.where(positions == self.num - 1, self.stop, values)
+
+
+class _ChunkSink(abc.ABC):
+    """Base dei sink: offset dei punti scritti e file di avanzamento"""
+
+    def __init__(self, progress_path, fields=STUDY_FIELDS):
+        self.progress_path = progress_path
+        self.fields = tuple(fields)
+        self.offset = 0
+        self.study = None
+        self._progress = {}
+        if os.path.exists(progress_path):
+            with open(progress_path, encoding='utf-8') as f:
+                self._progress = json.load(f)
+            self.offset = self._progress['offset']
+            self.study = self._progress.get('study')
+            if self.offset and self._progress['fields'] != list(self.fields):
+                raise ValueError(f"Il sink {progress_path} contiene le colonne {self._progress['fields']}, "
+                                 f"non {list(self.fields)}: impossibile riprendere")
+
+    def bind(self, study):
+        """
+        Associa il sink allo studio descritto da study (dict serializzabile in JSON).
+
+        Raises:
+            ValueError: Se il sink contiene già dei blocchi di uno studio diverso.
+        """
+        study = json.loads(json.dumps(study))
+        if self.offset and self.study is not None and self.study != study:
+            changed = sorted(key for key in set(study) | set(self.study)
+                             if study.get(key) != self.study.get(key))
+            raise ValueError(f"Il sink {self.progress_path} contiene uno studio diverso "
+                             f"(differenze in: {', '.join(changed)}): impossibile riprendere")
+        self.study = study
+
+    def _save_progress(self, **extra):
+        self._progress = {'offset': self.offset, 'fields': list(self.fields), 'study': self.study, **extra}
+        tmp_path = f'{self.progress_path}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self._progress, f)
+        os.replace(tmp_path, self.progress_path)
+
+    def write(self, chunk):
+        """Accoda un blocco {'offset': ..., campo: array}; deve seguire l'ultimo scritto"""
+        if chunk['offset'] != self.offset:
+            raise ValueError(f"Blocco non contiguo: offset {chunk['offset']}, atteso {self.offset}")
+        n_points = len(chunk[self.fields[0]])
+        extra = self._append(chunk)
+        self.offset += n_points
+        self._save_progress(**(extra or {}))
+
+    @abc.abstractmethod
+    def _append(self, chunk):
+        """Scrive i campi del blocco; restituisce None o i valori extra da salvare nell'avanzamento"""
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        self.close()
+        return False
+
+
+class CSVSink(_ChunkSink):
+    """Blocchi accodati a un unico file CSV con intestazione"""
+
+    def __init__(self, path, fields=STUDY_FIELDS):
+        super().__init__(f'{path}.progress.json', fields)
+        self.path = path
+        if self.offset:
+            # Scarta le righe di un eventuale blocco interrotto dopo l'ultimo salvataggio
+            self._file = open(path, 'r+', newline='', encoding='utf-8')
+            self._file.truncate(self._progress['bytes'])
+            self._file.seek(self._progress['bytes'])
+        else:
+            self._file = open(path, 'w', newline='', encoding='utf-8')
+            self._file.write(','.join(self.fields) + '\n')
+        self._writer = csv.writer(self._file)
+
+    def _append(self, chunk):
+        columns = [np.asarray(chunk[field]).tolist() for field in self.fields]
+        self._writer.writerows(zip(*columns))
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        return {'bytes': self._file.tell()}
+
+    def close(self):
+        self._file.close()
+
+
+class _DirectorySink(_ChunkSink):
+    """Un file per blocco in una cartella, nominato con l'offset del blocco"""
+
+    extension = None
+
+    def __init__(self, directory, fields=STUDY_FIELDS):
+        os.makedirs(directory, exist_ok=True)
+        super().__init__(os.path.join(directory, 'progress.json'), fields)
+        self.directory = directory
+        # Blocchi successivi all'ultimo completato (o di una scrittura precedente) non sono validi
+        for path in self.chunk_paths():
+            if _chunk_offset(path) >= self.offset:
+                os.remove(path)
+
+    def chunk_paths(self):
+        """File dei blocchi in ordine di offset"""
+        return sorted(glob.glob(os.path.join(self.directory, f'chunk_*{self.extension}')))
+
+    def _append(self, chunk):
+        path = os.path.join(self.directory, f'chunk_{chunk["offset"]:015d}{self.extension}')
+        tmp_path = f'{path}.tmp'
+        self._write_chunk(tmp_path, {field: np.asarray(chunk[field]) for field in self.fields})
+        os.replace(tmp_path, path)
+
+    @abc.abstractmethod
+    def _write_chunk(self, path, columns):
+        """Scrive in path le colonne {campo: array} di un blocco"""
+
+
+class NPZSink(_DirectorySink):
+    """Un file .npz per blocco"""
+
+    extension = '.npz'
+
+    def _write_chunk(self, path, columns):
+        with open(path, 'wb') as f:
+            np.savez(f, **columns)
+
+
+class ParquetSink(_DirectorySink):
+    """Un file Parquet per blocco (richiede pyarrow); la cartella è leggibile come dataset"""
+
+    extension = '.parquet'
+
+    def _write_chunk(self, path, columns):
+        pq.write_table(pa.table(columns), path)
+
+
+def _chunk_offset(path):
+    name = os.path.basename(path)
+    return int(name[len('chunk_'):].split('.')[0])
+
+
+SINKS = {'csv': CSVSink, 'npz': NPZSink, 'parquet': ParquetSink}
+
+
+def open_sink(path, output_format='csv', fields=STUDY_FIELDS):
+    """Apre (o riprende) un sink del formato indicato: 'csv', 'npz' o 'parquet'"""
+    if output_format not in SINKS:
+        raise ValueError(f"Formato non valido: {output_format!r} (valori ammessi: {', '.join(SINKS)})")
+    return SINKS[output_format](path, fields)
+
+
+def read_npz_chunks(directory):
+    """Rilegge i blocchi di un NPZSink uno alla volta come dizionari di array"""
+    sink_fields = None
+    progress_path = os.path.join(directory, 'progress.json')
+    if os.path.exists(progress_path):
+        with open(progress_path, encoding='utf-8') as f:
+            sink_fields = json.load(f)['fields']
+    for path in sorted(glob.glob(os.path.join(directory, 'chunk_*.npz'))):
+        with np.load(path) as data:
+            fields = sink_fields or data.files
+            yield {'offset': _chunk_offset(path), **{field: data[field] for field in fields}}
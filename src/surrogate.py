@@ -0,0 +1,303 @@
+"""
+Modello surrogato tabulato dell'efficienza di cattura, per interrogazioni istantanee.
+
+A parametri fissati il modello dipende dalle condizioni operative solo attraverso
+il tempo di residenza τ, il rapporto di makeup F0/FR (che determina le conversioni
+medie massime dell'Equazione 11) e il rapporto FR/FCO2, che compare solo come
+fattore delle Equazioni (21)-(23):
+    E = min(FR/FCO2 · X_ave(τ, F0/FR), MAX_EFFICIENCY)
+    E_K = FR/FCO2 · fa·X_ave,K(τ, F0/FR)        E_D = FR/FCO2 · (1 - fa)·X_ave,D(τ, F0/FR)
+Le tre funzioni di (τ, F0/FR) vengono tabulate su una griglia in log τ × log(F0/FR)
+raffinata per bisezione degli intervalli finché l'interpolazione lineare a metà
+intervallo non differisce dal modello esatto meno della tolleranza; le interrogazioni
+sono interpolazioni bilineari vettoriali e il fattore FR/FCO2 è applicato esattamente.
+I punti fuori dalla tabella vengono calcolati con il modello esatto.
+
+Nella forma chiusa dell'Eq. (16) il contributo diffusivo si aggiunge solo per τ > tK
+(salto in τ = tK) e il tempo massimo è min(10τ, T0) (angolo in τ = T0/10): questi
+punti sono nodi fissi della griglia, con τ = tK ripetuto per il valore a sinistra e
+il limite da destra, così l'interpolazione non attraversa la discontinuità.
+"""
+
+import json
+import os
+
+import numpy as np
+
+from equations import MAX_EFFICIENCY, CarbonCaptureModel
+from parameters import ModelParameters
+
+# Uscite del surrogato, con le stesse chiavi di capture_efficiency_batch
+OUTPUTS = ('efficiency', 'efficiency_kinetic', 'efficiency_diffusion', 'average_conversion')
+
+# Funzioni tabulate: X_ave, fa·X_ave,K e (1 - fa)·X_ave,D (uscite del batch con FR/FCO2 = 1)
+_TABLES = ('average_conversion', 'efficiency_kinetic', 'efficiency_diffusion')
+
+# Scostamento relativo in τ con cui si valuta il limite da destra di un salto
+_RIGHT_LIMIT = 1e-9
+
+
+# Celle massime della tabella di ricerca degli intervalli di un asse
+_MAX_LOOKUP_CELLS = 1 << 20
+
+
+class _AxisLocator:
+    """
+    Indice dell'intervallo di un asse a nodi non uniformi per molti punti: una
+    tabella su celle uniformi dà il primo intervallo candidato, poi pochi passi in
+    avanti (le celle sono al più larghe quanto l'intervallo più stretto).
+    Equivale a np.searchsorted(nodes, x, side='left') - 1, limitato a [0, nodi - 2].
+    """
+
+    def __init__(self, nodes):
+        self.nodes = nodes
+        widths = np.diff(nodes)
+        span = nodes[-1] - nodes[0]
+        n_cells = int(min(np.ceil(span / widths[widths > 0].min()), _MAX_LOOKUP_CELLS))
+        self.scale = n_cells / span
+        edges = nodes[0] + np.arange(n_cells) / self.scale
+        self.lookup = np.clip(np.searchsorted(nodes, edges, side='left') - 1, 0, len(nodes) - 2)
+
+    def __call__(self, x):
+        cells = np.clip(((x - self.nodes[0]) * self.scale).astype(np.intp), 0, len(self.lookup) - 1)
+        index = self.lookup[cells]
+        last = len(self.nodes) - 2
+        while True:
+            advance = (index < last) & (x > self.nodes[np.minimum(index + 1, last + 1)])
+            if not advance.any():
+                return index
+            index += advance
+
+
+def _tau_breakpoints(params, tau_bounds):
+    """Nodi fissi in log τ interni all'intervallo e maschera dei nodi che rappresentano un limite da destra"""
+    nodes, right_limit = [], []
+    low, high = tau_bounds
+    if low < params.t_kinetic < high:
+        nodes += [np.log(params.t_kinetic)] * 2
+        right_limit += [False, True]
+    if low < params.T0 / 10 < high:
+        nodes.append(np.log(params.T0 / 10))
+        right_limit.append(False)
+    return np.array(nodes), np.array(right_limit, dtype=bool)
+
+
+class SurrogateModel:
+    """Tabelle di X_ave, fa·X_ave,K e (1 - fa)·X_ave,D su log τ × log(F0/FR) con interpolazione bilineare"""
+
+    def __init__(self, tau_nodes, makeup_nodes, tables, params=None, tolerance=None, validation=None):
+        """
+        Args:
+            tau_nodes (np.ndarray): Nodi in log τ (τ in minuti), crescenti.
+            makeup_nodes (np.ndarray): Nodi in log(F0/FR), crescenti.
+            tables (np.ndarray): Valori delle funzioni tabulate, forma (3, nodi τ, nodi F0/FR).
+            params (ModelParameters): Parametri con cui è stata costruita la tabella.
+            tolerance (float): Tolleranza usata nella costruzione.
+            validation (dict): Stima dell'errore (vedi error_estimate).
+        """
+        self.tau_nodes = np.asarray(tau_nodes, dtype=float)
+        self.makeup_nodes = np.asarray(makeup_nodes, dtype=float)
+        self.tables = np.asarray(tables, dtype=float)
+        self._locate_tau = _AxisLocator(self.tau_nodes)
+        self._locate_makeup = _AxisLocator(self.makeup_nodes)
+        self._flat_tables = [np.ascontiguousarray(table).ravel() for table in self.tables]
+        self.capture_model = CarbonCaptureModel(params=params)
+        self.tolerance = tolerance
+        self.validation = validation
+
+    @property
+    def params(self):
+        return self.capture_model.params
+
+    @staticmethod
+    def _exact_tables(capture_model, log_tau, log_makeup):
+        """Funzioni tabulate calcolate con capture_efficiency_batch a FR/FCO2 = 1"""
+        FCO2, _, _ = capture_model.get_operating_flows(0.0, 1.0)
+        tau_min = np.exp(log_tau)
+        Ws_per_MW = tau_min * 60.0 * capture_model.params.M_CaO_kg * FCO2
+        batch = capture_model.capture_efficiency_batch(Ws_per_MW, np.exp(log_makeup), 1.0)
+        return np.stack([batch[name] for name in _TABLES])
+
+    @classmethod
+    def build(cls, capture_model=None, tau_bounds=(0.01, 1000.0), makeup_bounds=(1e-5, 10.0),
+              tolerance=1e-5, initial_points=17, max_points=2049, validation_samples=20_000, seed=0):
+        """
+        Costruisce la tabella con raffinamento adattivo.
+
+        A ogni iterazione confronta, per ogni intervallo di ciascun asse e su tutti i
+        nodi dell'altro asse, il modello esatto nel punto medio con la media dei due
+        estremi; gli intervalli con differenza maggiore di tolerance/2 vengono divisi.
+
+        Args:
+            capture_model (CarbonCaptureModel): Modello esatto; default CarbonCaptureModel().
+            tau_bounds (tuple): Intervallo di τ in minuti.
+            makeup_bounds (tuple): Intervallo di F0/FR.
+            tolerance (float): Errore di interpolazione ammesso sulle conversioni tabulate
+                (sulle efficienze va moltiplicato per FR/FCO2).
+            initial_points (int): Nodi iniziali per asse.
+            max_points (int): Nodi massimi per asse.
+            validation_samples (int): Punti casuali per la stima dell'errore (0 la omette).
+            seed (int): Seed dei punti di validazione.
+        """
+        capture_model = capture_model if capture_model is not None else CarbonCaptureModel()
+        breakpoints, breakpoint_right = _tau_breakpoints(capture_model.params, tau_bounds)
+        tau_nodes = np.concatenate([np.linspace(np.log(tau_bounds[0]), np.log(tau_bounds[1]), initial_points),
+                                    breakpoints])
+        right_limit = np.concatenate([np.zeros(initial_points, dtype=bool), breakpoint_right])
+        order = np.argsort(tau_nodes, kind='stable')
+        axes = [tau_nodes[order], np.linspace(np.log(makeup_bounds[0]), np.log(makeup_bounds[1]), initial_points)]
+        right_limit = right_limit[order]
+
+        while True:
+            # I nodi di limite da destra vengono valutati appena oltre il salto
+            tau_eval = axes[0] + np.where(right_limit, _RIGHT_LIMIT, 0.0)
+            tables = cls._exact_tables(capture_model, tau_eval[:, None], axes[1][None, :])
+            # Errori di entrambi gli assi sulla stessa griglia, poi inserimento dei nuovi nodi
+            new_axes = list(axes)
+            for axis in (0, 1):
+                nodes = axes[axis]
+                if len(nodes) >= max_points:
+                    continue
+                middle = 0.5 * (nodes[:-1] + nodes[1:])
+                if axis == 0:
+                    exact = cls._exact_tables(capture_model, middle[:, None], axes[1][None, :])
+                    linear = 0.5 * (tables[:, :-1, :] + tables[:, 1:, :])
+                    error = np.abs(exact - linear).max(axis=(0, 2))
+                else:
+                    exact = cls._exact_tables(capture_model, tau_eval[:, None], middle[None, :])
+                    linear = 0.5 * (tables[:, :, :-1] + tables[:, :, 1:])
+                    error = np.abs(exact - linear).max(axis=(0, 1))
+                # Gli intervalli di ampiezza nulla (salti) non si dividono
+                error = np.where(np.diff(nodes) > 0, error, 0.0)
+                split = error > tolerance / 2
+                # Si dividono prima gli intervalli peggiori, entro il limite di nodi
+                budget = max_points - len(nodes)
+                if split.sum() > budget:
+                    split = error >= np.sort(error)[-budget]
+                if np.any(split):
+                    order = np.argsort(np.concatenate([nodes, middle[split]]), kind='stable')
+                    new_axes[axis] = np.concatenate([nodes, middle[split]])[order]
+                    if axis == 0:
+                        right_limit = np.concatenate([right_limit, np.zeros(split.sum(), dtype=bool)])[order]
+            if all(len(new) == len(old) for new, old in zip(new_axes, axes)):
+                break
+            axes = new_axes
+
+        surrogate = cls(axes[0], axes[1], tables, capture_model.params, tolerance)
+        if validation_samples:
+            surrogate.validation = surrogate.error_estimate(capture_model, validation_samples, seed=seed)
+        return surrogate
+
+    def _interpolate(self, log_tau, log_makeup):
+        """
+        Interpolazione bilineare delle tabelle nei punti dati (array 1-D). Un punto
+        che coincide con un nodo usa l'intervallo alla sua sinistra: in un nodo
+        ripetuto (salto) vale il valore a sinistra, come il modello esatto.
+        """
+        x_nodes, y_nodes = self.tau_nodes, self.makeup_nodes
+        i = self._locate_tau(log_tau)
+        j = self._locate_makeup(log_makeup)
+        wx = (log_tau - x_nodes[i]) / (x_nodes[i + 1] - x_nodes[i])
+        wy = (log_makeup - y_nodes[j]) / (y_nodes[j + 1] - y_nodes[j])
+
+        # Indici piatti dei quattro vertici della cella e relativi pesi
+        k = i * len(y_nodes) + j
+        corners = (k, k + 1, k + len(y_nodes), k + len(y_nodes) + 1)
+        weights = ((1 - wx) * (1 - wy), (1 - wx) * wy, wx * (1 - wy), wx * wy)
+        return [sum(weight * np.take(table, corner) for corner, weight in zip(corners, weights))
+                for table in self._flat_tables]
+
+    def query(self, Ws_per_MW, F0_FCO2_ratio, FR_FCO2_ratio):
+        """
+        Uscite del modello nelle condizioni operative date (array in broadcasting, come
+        capture_efficiency_batch).
+
+        Returns:
+            dict: Array per le chiavi in OUTPUTS, 'residence_time_min', 'valid' e
+                'exact' (punti fuori dalla tabella, calcolati con il modello esatto).
+        """
+        inputs = np.broadcast_arrays(np.asarray(Ws_per_MW, dtype=float), np.asarray(F0_FCO2_ratio, dtype=float),
+                                     np.asarray(FR_FCO2_ratio, dtype=float))
+        shape = inputs[0].shape
+        Ws_per_MW, F0_FCO2_ratio, FR_FCO2_ratio = (values.ravel() for values in inputs)
+        model = self.capture_model
+        FCO2, _, FR = model.get_operating_flows(F0_FCO2_ratio, FR_FCO2_ratio)
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            tau_min = Ws_per_MW / (model.params.M_CaO_kg * FR) / 60.0
+            log_tau = np.log(tau_min)
+            log_makeup = np.log(F0_FCO2_ratio / FR_FCO2_ratio)
+        inside = ((log_tau >= self.tau_nodes[0]) & (log_tau <= self.tau_nodes[-1])
+                  & (log_makeup >= self.makeup_nodes[0]) & (log_makeup <= self.makeup_nodes[-1])
+                  & np.isfinite(FR_FCO2_ratio) & (FCO2 > 0))
+
+        result = {name: np.zeros(inside.size) for name in OUTPUTS + ('residence_time_min',)}
+        result['valid'] = np.ones(inside.size, dtype=bool)
+        result['exact'] = ~inside
+
+        Xave, kinetic, diffusion = self._interpolate(log_tau[inside], log_makeup[inside])
+        ratio = FR_FCO2_ratio[inside]
+        result['efficiency'][inside] = np.minimum(ratio * Xave, MAX_EFFICIENCY)
+        result['efficiency_kinetic'][inside] = ratio * kinetic
+        result['efficiency_diffusion'][inside] = ratio * diffusion
+        result['average_conversion'][inside] = Xave
+        result['residence_time_min'][inside] = tau_min[inside]
+
+        outside = ~inside
+        if np.any(outside):
+            batch = model.capture_efficiency_batch(Ws_per_MW[outside], F0_FCO2_ratio[outside],
+                                                   FR_FCO2_ratio[outside])
+            for name in OUTPUTS + ('residence_time_min', 'valid'):
+                result[name][outside] = batch[name]
+        return {name: values.reshape(shape) for name, values in result.items()}
+
+    def error_estimate(self, capture_model=None, n_samples=20_000, FR_bounds=(1.0, 30.0), seed=None):
+        """
+        Errore del surrogato rispetto al modello esatto su punti casuali nel dominio
+        della tabella (τ e F0/FR log-uniformi, FR/FCO2 uniforme in FR_bounds).
+
+        Returns:
+            dict: Per ogni uscita in OUTPUTS, errore assoluto 'max', 'mean' e 'p99',
+                più 'samples'.
+        """
+        capture_model = capture_model if capture_model is not None else self.capture_model
+        rng = np.random.default_rng(seed)
+        log_tau = rng.uniform(self.tau_nodes[0], self.tau_nodes[-1], n_samples)
+        log_makeup = rng.uniform(self.makeup_nodes[0], self.makeup_nodes[-1], n_samples)
+        FR_FCO2_ratio = rng.uniform(*FR_bounds, n_samples)
+
+        FCO2, _, FR = capture_model.get_operating_flows(0.0, FR_FCO2_ratio)
+        Ws_per_MW = np.exp(log_tau) * 60.0 * capture_model.params.M_CaO_kg * FR
+        F0_FCO2_ratio = np.exp(log_makeup) * FR_FCO2_ratio
+
+        exact = capture_model.capture_efficiency_batch(Ws_per_MW, F0_FCO2_ratio, FR_FCO2_ratio)
+        approx = self.query(Ws_per_MW, F0_FCO2_ratio, FR_FCO2_ratio)
+        estimate = {'samples': n_samples}
+        for name in OUTPUTS:
+            error = np.abs(approx[name] - exact[name])[exact['valid']]
+            estimate[name] = {'max': float(error.max()), 'mean': float(error.mean()),
+                              'p99': float(np.percentile(error, 99))}
+        return estimate
+
+    def save(self, path):
+        """Salva la tabella in un file .npz (nodi, valori, parametri e stima dell'errore)"""
+        meta = {'params': self.params.to_dict(), 'tolerance': self.tolerance, 'validation': self.validation}
+        tmp_path = f'{path}.tmp'
+        with open(tmp_path, 'wb') as f:
+            np.savez(f, tau_nodes=self.tau_nodes, makeup_nodes=self.makeup_nodes, tables=self.tables,
+                     meta=np.array(json.dumps(meta)))
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path, params=None):
+        """
+        Rilegge una tabella salvata con save(). Se params è dato deve coincidere con i
+        parametri della tabella, altrimenti ValueError.
+        """
+        with np.load(path) as data:
+            meta = json.loads(str(data['meta']))
+            stored_params = ModelParameters.from_dict(meta['params'])
+            if params is not None and params != stored_params:
+                raise ValueError(f"La tabella {path} è stata costruita con parametri diversi")
+            return cls(data['tau_nodes'], data['makeup_nodes'], data['tables'], stored_params,
+                       meta['tolerance'], meta['validation'])
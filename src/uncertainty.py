@@ -0,0 +1,317 @@
+"""
+Propagazione Monte Carlo dell'incertezza dei parametri del sorbente (Tabella 1 e
+tempi del test TGA) sull'efficienza di cattura.
+
+I parametri vengono campionati a blocchi dalle distribuzioni indicate e valutati
+con capture_efficiency_batch su tutti i punti operativi insieme; per ogni punto si
+aggiornano statistiche in streaming (media e varianza di Welford, minimo, massimo,
+istogramma da cui si stimano i percentili) senza conservare i campioni.
+
+Ogni blocco usa un generatore figlio di np.random.SeedSequence(seed): a parità di
+seed e di batch_size il risultato non dipende dal numero di processi.
+"""
+
+import functools
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from equations import SAMPLED_PARAMETERS
+
+# Grandezze di capture_efficiency_batch di cui si raccolgono le statistiche
+QUANTITIES = ('efficiency', 'efficiency_kinetic', 'efficiency_diffusion', 'average_conversion')
+
+# Grandezze il cui contributo non è limitato a MAX_EFFICIENCY: FR/FCO2 · fa · Xave_K
+# (o (1 - fa) · Xave_D) arriva al più a FR/FCO2, dato che le conversioni sono <= 1
+_UNCAPPED_EFFICIENCIES = ('efficiency_kinetic', 'efficiency_diffusion')
+
+
+class Normal:
+    """Distribuzione normale, eventualmente troncata a [low, high]"""
+
+    def __init__(self, mean, std, low=None, high=None):
+        self.mean = mean
+        self.std = std
+        self.low = -np.inf if low is None else low
+        self.high = np.inf if high is None else high
+
+    def sample(self, rng, size):
+        values = rng.normal(self.mean, self.std, size)
+        # Troncamento per rigetto: si ricampionano solo i valori fuori dall'intervallo
+        outside = (values < self.low) | (values > self.high)
+        while np.any(outside):
+            values[outside] = rng.normal(self.mean, self.std, int(outside.sum()))
+            outside = (values < self.low) | (values > self.high)
+        return values
+
+
+class Uniform:
+    """Distribuzione uniforme su [low, high]"""
+
+    def __init__(self, low, high):
+        self.low = low
+        self.high = high
+
+    def sample(self, rng, size):
+        return rng.uniform(self.low, self.high, size)
+
+
+class LogNormal:
+    """Distribuzione lognormale con mediana `median` e deviazione standard `sigma` del logaritmo"""
+
+    def __init__(self, median, sigma):
+        self.median = median
+        self.sigma = sigma
+
+    def sample(self, rng, size):
+        return rng.lognormal(np.log(self.median), self.sigma, size)
+
+
+class Triangular:
+    """Distribuzione triangolare su [low, high] con moda `mode`"""
+
+    def __init__(self, low, mode, high):
+        self.low = low
+        self.mode = mode
+        self.high = high
+
+    def sample(self, rng, size):
+        return rng.triangular(self.low, self.mode, self.high, size)
+
+
+class StreamingStatistics:
+    """
+    Statistiche per punto aggiornate a blocchi: conteggio, media e M2 (algoritmo di
+    Welford/Chan), minimo, massimo e istogramma a bin fissi su value_range.
+
+    Gli estremi di value_range sono scalari o array per punto (n_points,). I valori
+    fuori dall'intervallo finiscono nel primo o nell'ultimo bin: i percentili che vi
+    cadono sono quindi limitati a [minimo, massimo] ma non più interpolati.
+    """
+
+    def __init__(self, n_points, bins=1000, value_range=(0.0, 1.0)):
+        self.bins = bins
+        self.value_range = value_range
+        self.count = np.zeros(n_points, dtype=np.int64)
+        self.mean = np.zeros(n_points)
+        self.m2 = np.zeros(n_points)
+        self.minimum = np.full(n_points, np.inf)
+        self.maximum = np.full(n_points, -np.inf)
+        self.histogram = np.zeros((n_points, bins), dtype=np.int64)
+
+    def update(self, values, valid=None):
+        """Aggiunge un blocco di valori di forma (n_points, n_campioni), escludendo i non validi"""
+        values = np.asarray(values, dtype=float)
+        if valid is None:
+            valid = np.isfinite(values)
+        batch = StreamingStatistics(len(self.count), self.bins, self.value_range)
+        batch.count = valid.sum(axis=1)
+        filled = np.where(valid, values, 0.0)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            batch.mean = np.where(batch.count > 0, filled.sum(axis=1) / batch.count, 0.0)
+        batch.m2 = np.where(valid, (values - batch.mean[:, None]) ** 2, 0.0).sum(axis=1)
+        batch.minimum = np.where(valid, values, np.inf).min(axis=1)
+        batch.maximum = np.where(valid, values, -np.inf).max(axis=1)
+
+        low, high = self._bounds()
+        bin_index = np.clip(((filled - low[:, None]) / (high - low)[:, None] * self.bins).astype(np.int64),
+                            0, self.bins - 1)
+        flat_index = (np.arange(len(self.count))[:, None] * self.bins + bin_index)[valid]
+        batch.histogram = np.bincount(flat_index, minlength=self.histogram.size).reshape(self.histogram.shape)
+
+        self.merge(batch)
+
+    def merge(self, other):
+        """Unisce le statistiche di un altro blocco (formula di Chan per media e varianza)"""
+        total = self.count + other.count
+        delta = other.mean - self.mean
+        with np.errstate(invalid='ignore', divide='ignore'):
+            weight = np.where(total > 0, other.count / total, 0.0)
+        self.mean = self.mean + delta * weight
+        self.m2 = self.m2 + other.m2 + delta ** 2 * self.count * weight
+        self.count = total
+        self.minimum = np.minimum(self.minimum, other.minimum)
+        self.maximum = np.maximum(self.maximum, other.maximum)
+        self.histogram += other.histogram
+
+    def std(self):
+        """Deviazione standard campionaria (ddof=1)"""
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.sqrt(np.where(self.count > 1, self.m2 / (self.count - 1), np.nan))
+
+    def _bounds(self):
+        """Estremi dell'istogramma come array per punto"""
+        n_points = len(self.count)
+        return tuple(np.broadcast_to(np.asarray(bound, dtype=float), (n_points,)) for bound in self.value_range)
+
+    def bin_edges(self):
+        """Bordi dei bin: forma (bins + 1,) con estremi scalari, (n_points, bins + 1) con estremi per punto"""
+        low, high = (np.asarray(bound, dtype=float) for bound in self.value_range)
+        return np.linspace(low, high, self.bins + 1, axis=-1)
+
+    def percentiles(self, q):
+        """
+        Percentili stimati dall'istogramma con interpolazione lineare nel bin
+        (risoluzione (high - low)/bins), limitati a [minimo, massimo].
+
+        Returns:
+            np.ndarray: Forma (len(q), n_points).
+        """
+        q = np.atleast_1d(np.asarray(q, dtype=float))
+        low, high = self._bounds()
+        width = (high - low) / self.bins
+        cumulative = np.cumsum(self.histogram, axis=1)
+        result = np.full((len(q), len(self.count)), np.nan)
+        for i, percent in enumerate(q):
+            rank = percent / 100 * self.count
+            bin_index = np.minimum((cumulative < rank[:, None]).sum(axis=1), self.bins - 1)
+            points = np.arange(len(self.count))
+            before = np.where(bin_index > 0, cumulative[points, bin_index - 1], 0)
+            in_bin = self.histogram[points, bin_index]
+            with np.errstate(invalid='ignore', divide='ignore'):
+                fraction = np.where(in_bin > 0, (rank - before) / in_bin, 0.0)
+            estimate = low + width * (bin_index + fraction)
+            estimate = np.clip(estimate, self.minimum, self.maximum)
+            result[i] = np.where(self.count > 0, estimate, np.nan)
+        return result
+
+
+# Modello e distribuzioni del processo worker, inizializzati una sola volta per processo
+_worker_state = None
+
+
+def _init_worker(state):
+    global _worker_state
+    _worker_state = state
+
+
+def _evaluate_block(seed_sequence, n_samples):
+    """_evaluate_block_with_state con lo stato del processo worker"""
+    return _evaluate_block_with_state(_worker_state, seed_sequence, n_samples)
+
+
+def _evaluate_block_with_state(state, seed_sequence, n_samples):
+    """Campiona un blocco di parametri e ne restituisce le statistiche per punto"""
+    model, conditions, distributions, value_ranges, bins = state
+    rng = np.random.default_rng(seed_sequence)
+    samples = {name: distribution.sample(rng, n_samples)[None, :]
+               for name, distribution in distributions.items()}
+
+    Ws_per_MW, F0_FCO2_ratio, FR_FCO2_ratio = conditions
+    batch = model.capture_efficiency_batch(Ws_per_MW[:, None], F0_FCO2_ratio[:, None],
+                                           FR_FCO2_ratio[:, None], samples=samples)
+
+    statistics = {}
+    for quantity, value_range in value_ranges.items():
+        stats = StreamingStatistics(len(Ws_per_MW), bins, value_range)
+        stats.update(batch[quantity], batch['valid'])
+        statistics[quantity] = stats
+    return statistics
+
+
+def _block_sizes(n_samples, batch_size):
+    batch_size = max(1, int(batch_size))
+    return [min(batch_size, n_samples - start) for start in range(0, n_samples, batch_size)]
+
+
+def _value_ranges(quantities, FR_FCO2_ratio, value_ranges=None):
+    """Intervallo dell'istogramma di ogni grandezza: [0, 1], [0, max(FR/FCO2, 1)] per punto o quello indicato"""
+    ranges = {}
+    for quantity in quantities:
+        if value_ranges is not None and quantity in value_ranges:
+            ranges[quantity] = value_ranges[quantity]
+        elif quantity in _UNCAPPED_EFFICIENCIES:
+            ranges[quantity] = (0.0, np.maximum(FR_FCO2_ratio, 1.0))
+        else:
+            ranges[quantity] = (0.0, 1.0)
+    return ranges
+
+
+def propagate_uncertainty(model, operating_conditions, distributions, n_samples=100_000,
+                          batch_size=10_000, seed=None, n_workers=1, bins=1000,
+                          percentiles=(5, 50, 95), quantities=QUANTITIES, value_ranges=None):
+    """
+    Propaga l'incertezza dei parametri campionati fino all'efficienza di cattura.
+
+    Args:
+        model (CarbonCaptureModel): Modello di cattura; i parametri non campionati
+            restano quelli di model.params.
+        operating_conditions (list): Dizionari come quelli di capture_efficiency
+            ('Ws_per_MW', 'F0_FCO2_ratio', 'FR_FCO2_ratio').
+        distributions (dict): {nome parametro: distribuzione} con nomi in
+            SAMPLED_PARAMETERS e oggetti con metodo sample(rng, size) (es. Normal).
+        n_samples (int): Campioni totali per punto operativo.
+        batch_size (int): Campioni per blocco; la memoria usata è proporzionale a
+            batch_size × numero di punti.
+        seed (int): Seed della SeedSequence da cui derivano i generatori dei blocchi.
+        n_workers (int): 1 per l'esecuzione seriale, altrimenti processi del pool
+            (None = tutti i core).
+        bins (int): Bin dell'istogramma usato per i percentili.
+        percentiles (tuple): Percentili da riportare.
+        quantities (tuple): Grandezze di capture_efficiency_batch da analizzare.
+        value_ranges (dict): {grandezza: (low, high)} dell'istogramma, con estremi scalari
+            o per punto. Default: [0, max(FR/FCO2, 1)] per punto per efficiency_kinetic ed
+            efficiency_diffusion, che non sono limitate a MAX_EFFICIENCY, e [0, 1] per le
+            altre. I valori fuori intervallo cadono nei bin estremi (vedi StreamingStatistics).
+
+    Returns:
+        dict: 'n_samples', 'seed', 'operating_conditions' e 'statistics', con per ogni
+            grandezza gli array per punto 'count', 'mean', 'std', 'min', 'max',
+            'percentiles' ({q: array}), 'histogram' e 'bin_edges' (per punto se lo è
+            l'intervallo dell'istogramma). I campioni con
+            parametri non ammissibili (vedi CarbonCaptureModel.parameter_validity: k > 0,
+            0 <= Xr < X1, t_kinetic > 0, T0 > t_kinetic) o risultati non finiti sono
+            esclusi e contati in 'invalid'.
+    """
+    unknown = set(distributions) - set(SAMPLED_PARAMETERS)
+    if unknown:
+        raise ValueError(f"Parametri non campionabili: {', '.join(sorted(unknown))} "
+                         f"(valori ammessi: {', '.join(SAMPLED_PARAMETERS)})")
+
+    conditions = tuple(np.array([c[key] for c in operating_conditions], dtype=float)
+                       for key in ('Ws_per_MW', 'F0_FCO2_ratio', 'FR_FCO2_ratio'))
+    sizes = _block_sizes(n_samples, batch_size)
+    seed_sequence = np.random.SeedSequence(seed)
+    children = seed_sequence.spawn(len(sizes))
+    ranges = _value_ranges(quantities, conditions[2], value_ranges)
+    state = (model, conditions, distributions, ranges, bins)
+
+    totals = {quantity: StreamingStatistics(len(conditions[0]), bins, ranges[quantity]) for quantity in quantities}
+    if n_workers == 1 or len(sizes) <= 1:
+        # Lo stato globale serve solo ai processi del pool: in serie si passa esplicitamente
+        blocks = map(functools.partial(_evaluate_block_with_state, state), children, sizes)
+    else:
+        executor = ProcessPoolExecutor(max_workers=n_workers, initializer=_init_worker,
+                                       initargs=(state,))
+        blocks = executor.map(_evaluate_block, children, sizes)
+
+    try:
+        # Unione nell'ordine dei blocchi: risultati identici con qualsiasi numero di processi
+        for block in blocks:
+            for quantity, stats in block.items():
+                totals[quantity].merge(stats)
+    finally:
+        if n_workers != 1 and len(sizes) > 1:
+            executor.shutdown()
+
+    statistics = {}
+    for quantity, stats in totals.items():
+        values = stats.percentiles(percentiles)
+        statistics[quantity] = {
+            'count': stats.count,
+            'invalid': n_samples - stats.count,
+            'mean': stats.mean,
+            'std': stats.std(),
+            'min': stats.minimum,
+            'max': stats.maximum,
+            'percentiles': {q: values[i] for i, q in enumerate(percentiles)},
+            'histogram': stats.histogram,
+            'bin_edges': stats.bin_edges(),
+        }
+
+    return {
+        'n_samples': n_samples,
+        'seed': seed_sequence.entropy,
+        'operating_conditions': list(operating_conditions),
+        'statistics': statistics,
+    }
@@ -0,0 +1,67 @@
+"""Versioni vettoriali delle equazioni confrontate con quelle scalari"""
+
+import numpy as np
+import pytest
+
+from equations import CarbonCaptureModel, CineticModelEquation
+
+CYCLES = np.arange(1, 41)
+TIMES = np.array([0.0, 0.05, 0.3, 0.31, 1.0, 4.99, 5.0, 12.0])
+TAUS = np.array([0.01, 0.1, 0.3, 0.31, 1.0, 2.6, 10.0, 60.0])
+
+
+@pytest.mark.parametrize('phase', ['kinetic', 'diffusion'])
+def test_conversion_cycle_N_array(phase):
+    equations = CineticModelEquation()
+    expected = [equations.conversion_cycle_N(N, phase) for N in CYCLES.tolist()]
+    np.testing.assert_allclose(equations.conversion_cycle_N_array(CYCLES, phase), expected, rtol=1e-15)
+
+
+def test_conversion_at_time_t_array():
+    equations = CineticModelEquation()
+    expected = [[equations.conversion_at_time_t(N, t) for t in TIMES.tolist()] for N in CYCLES.tolist()]
+    result = equations.conversion_at_time_t_array(CYCLES[:, None], TIMES[None, :])
+    np.testing.assert_allclose(result, expected, rtol=1e-15, atol=0)
+
+
+def test_phase_averages_closed_form_matches_quad():
+    model = CarbonCaptureModel(integration_method='quad')
+    Xmax_ave_K, Xmax_ave_D = 0.05, 0.06
+    kinetic = model.average_conversion_kinetic_phase_array(TAUS, np.full(TAUS.shape, Xmax_ave_K))
+    diffusion = model.average_conversion_diffusion_phase_array(TAUS, np.full(TAUS.shape, Xmax_ave_K),
+                                                               np.full(TAUS.shape, Xmax_ave_D))
+    for i, tau in enumerate(TAUS.tolist()):
+        assert kinetic[i] == pytest.approx(model.average_conversion_kinetic_phase(tau, Xmax_ave_K),
+                                           rel=1e-10, abs=1e-14)
+        expected = model.average_conversion_diffusion_phase(tau, Xmax_ave_K, Xmax_ave_D)
+        assert diffusion[i] == pytest.approx(expected, rel=1e-10, abs=1e-14)
+
+
+def test_capture_efficiency_batch_matches_scalar():
+    model = CarbonCaptureModel(integration_method='analytic')
+    Ws = np.array([1.0, 50.0, 200.0, 400.0, 1500.0])
+    F0 = np.array([0.001, 0.01, 0.05, 0.1, 0.5])
+    FR = np.array([1.0, 3.0, 5.0, 10.0, 20.0])
+    batch = model.capture_efficiency_batch(Ws, F0, FR)
+    assert batch['valid'].all()
+    for i in range(len(Ws)):
+        conditions = {'Ws_per_MW': Ws[i], 'F0_FCO2_ratio': F0[i], 'FR_FCO2_ratio': FR[i]}
+        expected = model.capture_efficiency(conditions)
+        # L'Eq. (11) è esatta a conversion_tolerance (1e-12), amplificata al più da FR/FCO2
+        for key in ('efficiency', 'efficiency_kinetic', 'efficiency_diffusion', 'residence_time_min',
+                    'average_conversion', 'active_fraction'):
+            assert batch[key][i] == pytest.approx(expected[key], rel=1e-12, abs=1e-10), key
+
+
+def test_capture_efficiency_batch_masks_invalid_inputs():
+    batch = CarbonCaptureModel().capture_efficiency_batch([200.0, -1.0, np.nan], 0.05, 5.0)
+    np.testing.assert_array_equal(batch['valid'], [True, False, False])
+    np.testing.assert_array_equal(batch['efficiency'][1:], 0.0)
+
+
+def test_capture_efficiency_logs_errors(caplog, capsys):
+    with caplog.at_level('WARNING', logger='equations'):
+        result = CarbonCaptureModel().capture_efficiency({'Ws_per_MW': 200, 'F0_FCO2_ratio': 0.05})
+    assert result['efficiency'] == 0.0 and 'FR_FCO2_ratio' in result['error']
+    assert "Errore nel calcolo dell'efficienza" in caplog.text
+    assert capsys.readouterr().out == ''
@@ -0,0 +1,41 @@
+"""Budget di import del nucleo numerico, misurato con python -X importtime"""
+
+import subprocess
+import sys
+
+import pytest
+
+from .conftest import SRC_DIR
+
+# Moduli che il nucleo numerico non deve importare (caricati solo al primo utilizzo)
+HEAVY_MODULES = ('matplotlib', 'pandas', 'scipy')
+
+# Tempo massimo di import dei moduli del progetto, numpy escluso (µs)
+IMPORT_BUDGET_US = 150_000
+
+
+def _import_times(module):
+    """{modulo: tempo cumulativo in µs} dall'output di -X importtime in un nuovo interprete"""
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+                            cwd=SRC_DIR, check=True, capture_output=True, text=True)
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        times[name.strip()] = int(cumulative)
+    return times
+
+
+@pytest.mark.parametrize('module', ['parameters', 'equations', 'model'])
+def test_no_heavy_imports(module):
+    times = _import_times(module)
+    loaded = sorted(name for name in times if name.split('.')[0] in HEAVY_MODULES)
+    assert not loaded, f"import {module} carica {', '.join(loaded)}"
+
+
+@pytest.mark.parametrize('module', ['equations', 'model'])
+def test_import_budget(module):
+    times = _import_times(module)
+    own_time = times[module] - times.get('numpy', 0)
+    assert own_time <= IMPORT_BUDGET_US, f"import {module}: {own_time / 1000:.0f} ms oltre numpy"
@@ -0,0 +1,57 @@
+"""Valutazione incrementale: riuso delle fasi e modello serializzabile per i pool"""
+
+import pickle
+
+import numpy as np
+
+from equations import CarbonCaptureModel
+from model import AdvancedAnalysis
+
+WS = np.linspace(10.0, 400.0, 16)
+
+
+def test_model_pickles_after_incremental_call():
+    analysis = AdvancedAnalysis()
+    # Lo studio seriale passa da capture_efficiency_incremental e crea il grafo delle fasi
+    serial = analysis.parametric_study(WS, 5, 0.01)
+    copy = pickle.loads(pickle.dumps(analysis.capture_model))
+    np.testing.assert_array_equal(copy.capture_efficiency_incremental(WS, 0.01, 5)['efficiency'],
+                                  serial['efficiency'])
+
+    # I pool ricevono il modello serializzato (con run_replicas anche con fork)
+    pooled = analysis.parametric_study(WS, 5, 0.01, n_workers=2, chunk_size=4)
+    assert pooled == serial
+    conditions = {'Ws_per_MW': 200, 'F0_FCO2_ratio': 0.05, 'FR_FCO2_ratio': 5}
+    replicas = analysis.particle_study(conditions, 30, n_replicas=2, seed=1, n_workers=2, n_particles=2000)
+    assert len(replicas['replicas']) == 2
+
+
+def _stages(model):
+    return model.incremental_info()['stages']
+
+
+def test_only_stages_with_changed_inputs_are_recomputed():
+    model = CarbonCaptureModel(integration_method='analytic')
+    FR = np.array([2.0, 5.0, 10.0])
+    first = model.capture_efficiency_incremental(WS[:, None], 0.01, FR)
+    assert _stages(model)['maximum_conversion']['evaluated'] == 1
+    assert _stages(model)['maximum_conversion']['points_evaluated'] == FR.size
+
+    # Solo Ws cambia: flussi ed Eq. 11 sono riusati, τ e le fasi a valle ricalcolati
+    model.capture_efficiency_incremental(WS[:, None] + 1.0, 0.01, FR)
+    stages = _stages(model)
+    assert stages['flows']['reused'] == 1 and stages['maximum_conversion']['reused'] == 1
+    assert stages['residence_time']['evaluated'] == 2 and stages['phase_averages']['evaluated'] == 2
+
+    # Il metodo di integrazione non entra nel percorso incrementale: nessun ricalcolo
+    evaluated = model.incremental_info()['total']['evaluated']
+    model.integration_method = 'quad'
+    model.capture_efficiency_incremental(WS[:, None] + 1.0, 0.01, FR)
+    assert model.incremental_info()['total']['evaluated'] == evaluated
+    assert _stages(model)['phase_averages']['reused'] == 1
+
+    # La tolleranza dell'Eq. 11 invece sì
+    model.conversion_tolerance = 1e-10
+    again = model.capture_efficiency_incremental(WS[:, None], 0.01, FR)
+    assert _stages(model)['maximum_conversion']['evaluated'] == 2
+    np.testing.assert_allclose(again['efficiency'], first['efficiency'], rtol=1e-8)
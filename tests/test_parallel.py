@@ -0,0 +1,33 @@
+"""Griglia distribuita sul pool di processi confrontata con la valutazione seriale"""
+
+import numpy as np
+
+from equations import CarbonCaptureModel
+from parallel import capture_efficiency_parallel, split_ranges
+
+
+def test_split_ranges_covers_grid():
+    assert split_ranges(10, 4) == [(0, 4), (4, 8), (8, 10)]
+    assert split_ranges(0, 4) == []
+
+
+def test_parallel_matches_serial():
+    model = CarbonCaptureModel(integration_method='analytic')
+    Ws = np.linspace(10.0, 400.0, 7)[:, None, None]
+    F0 = np.array([0.001, 0.01, 0.05])[None, :, None]
+    FR = np.linspace(1.0, 20.0, 5)[None, None, :]
+    serial = model.capture_efficiency_batch(Ws, F0, FR)
+    calls = []
+    parallel = capture_efficiency_parallel(model, Ws, F0, FR, n_workers=2, chunk_size=16,
+                                           progress=lambda completed, total: calls.append((completed, total)))
+    assert parallel.keys() == serial.keys()
+    for key in serial:
+        if key == 'flows':
+            continue
+        assert parallel[key].shape == serial[key].shape
+        np.testing.assert_array_equal(parallel[key], serial[key], err_msg=key)
+    for key in serial['flows']:
+        np.testing.assert_array_equal(parallel['flows'][key], serial['flows'][key], err_msg=key)
+    # Un richiamo per blocco, l'ultimo a griglia completa
+    assert len(calls) == len(split_ranges(serial['efficiency'].size, 16))
+    assert calls[-1] == (105, 105)
@@ -0,0 +1,52 @@
+"""ModelParameters: record immutabile, replace, hash e serializzazione"""
+
+import pickle
+
+import pytest
+
+from parameters import ModelParameters
+
+
+def test_replace_returns_new_instance():
+    params = ModelParameters()
+    changed = params.replace(T0=10, f0=0.2)
+    assert (changed.T0, changed.f0) == (10, 0.2)
+    assert params.T0 == 5 and params.f0 == 0.15
+    assert changed.replace(T0=5, f0=0.15) == params
+    assert repr(changed) == 'ModelParameters(f0=0.2, T0=10)'
+    with pytest.raises(TypeError):
+        params.replace(sconosciuto=1)
+
+
+def test_immutable():
+    params = ModelParameters()
+    with pytest.raises(AttributeError):
+        params.T0 = 10
+    with pytest.raises(AttributeError):
+        del params.T0
+
+
+def test_equal_parameters_hash_equal():
+    a = ModelParameters(T0=10)
+    b = ModelParameters().replace(T0=10)
+    assert a == b and a is not b
+    assert hash(a) == hash(b)
+    assert a.fingerprint() == b.fingerprint()
+    assert len({a, b, ModelParameters()}) == 2
+    assert ModelParameters(T0=11).fingerprint() != a.fingerprint()
+
+
+def test_json_round_trip(tmp_path):
+    params = ModelParameters(ks=7.1e-10, T_carbonator=640)
+    assert ModelParameters.from_json(params.to_json()) == params
+    path = tmp_path / 'params.json'
+    params.to_json(str(path))
+    assert ModelParameters.from_json(path=str(path)) == params
+    # I campi mancanti prendono il default
+    assert ModelParameters.from_json('{"T0": 10}') == ModelParameters(T0=10)
+
+
+def test_pickle_round_trip():
+    params = ModelParameters(h=40e-9)
+    copy = pickle.loads(pickle.dumps(params))
+    assert copy == params and hash(copy) == hash(params)
@@ -0,0 +1,50 @@
+"""Equazione (11) su infiniti cicli: errore entro la maggiorazione dichiarata"""
+
+import math
+
+import numpy as np
+import pytest
+
+from equations import CarbonCaptureModel
+from parameters import ModelParameters
+
+
+def _model(**values):
+    """Modello di cattura con i parametri del sorbente indicati"""
+    return CarbonCaptureModel(params=ModelParameters(**values))
+
+
+def _brute_force(p, k, Xr, X1):
+    """Xr + X1·p·Σ q^n/(kn + c) sommata termine a termine (fsum) finché q^n è trascurabile"""
+    c = 1 / (1 - Xr / X1)
+    if p == 1:
+        return Xr + X1 / c
+    log_q = math.log1p(-p)
+    n = np.arange(int(math.ceil(-45 / log_q)) + 1, dtype=float)
+    powers = np.exp(n * log_q)
+    return Xr + X1 * p * math.fsum((powers / (k * n + c)).tolist())
+
+
+# (j_kinetic, p): valori tipici, a = c/k grande (j piccolo) e casi limite p -> 0, p = 1
+CASES = [(0.676, 0.3), (0.676, 1e-4), (0.676, 1.0), (0.2, 0.5), (0.1, 0.3), (0.05, 0.3),
+         (0.01, 0.05), (0.01, 0.001), (0.001, 0.3), (0.676, 0.75)]
+
+
+@pytest.mark.parametrize('j_kinetic, p', CASES)
+def test_exact_sum_within_bound(j_kinetic, p):
+    model = _model(j_kinetic=j_kinetic)
+    params = model.params
+    Xmax_ave_K, Xmax_ave_D, bound = model.average_maximum_conversion_exact(p, 1 - p, tol=1e-12)
+    assert bound <= 1e-12
+    expected_K = _brute_force(p, params.j_kinetic, params.Xr_kinetic, params.X1_kinetic)
+    expected_D = _brute_force(p, params.j_diffusion, params.Xr_diffusion, params.X1_diffusion)
+    # Oltre alla maggiorazione resta solo l'arrotondamento del riferimento (fsum)
+    assert abs(Xmax_ave_K - expected_K) <= bound + 4 * np.finfo(float).eps * expected_K
+    assert abs(Xmax_ave_D - expected_D) <= bound + 4 * np.finfo(float).eps * expected_D
+
+
+@pytest.mark.parametrize('values', [{'j_kinetic': 0.0}, {'X1_kinetic': 0.0}, {'Xr_kinetic': 0.218},
+                                    {'j_kinetic': -0.1}])
+def test_inadmissible_parameters_are_invalid(values):
+    batch = _model(**values).capture_efficiency_batch([100.0, 1000.0], 0.05, 5.0)
+    assert not batch['valid'].any()
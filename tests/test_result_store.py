@@ -0,0 +1,87 @@
+"""Archivio su disco dei risultati: letture, espulsione LRU e chiavi degli studi"""
+
+import os
+
+import numpy as np
+
+from model import AdvancedAnalysis
+from result_store import ResultStore, result_key
+
+WS = np.linspace(10.0, 400.0, 16)
+
+
+def _arrays(value, n=100):
+    return {'values': np.full(n, value, dtype=float)}
+
+
+def _age(store, key, mtime):
+    os.utime(os.path.join(store.directory, key, 'meta.json'), (mtime, mtime))
+
+
+def test_hit_and_miss(tmp_path):
+    store = ResultStore(str(tmp_path))
+    assert store.get('assente') is None
+    store.put('a', _arrays(1.0), study='prova')
+    assert 'a' in store
+    values = store.get('a')['values']
+    np.testing.assert_array_equal(values, 1.0)
+    assert isinstance(values, np.memmap) and not values.flags.writeable
+    info = store.info()
+    assert (info['hits'], info['misses'], info['entries']) == (1, 1, 1)
+
+
+def test_eviction_is_lru_and_keeps_new_entry(tmp_path):
+    store = ResultStore(str(tmp_path))
+    store.put('a', _arrays(1.0))
+    entry_bytes = store.info()['bytes']
+    store.put('b', _arrays(2.0))
+    _age(store, 'a', 1_000)
+    _age(store, 'b', 2_000)
+    store.max_bytes = 2 * entry_bytes
+
+    # Con il limite a due voci, la terza espelle la meno recente
+    store.put('c', _arrays(3.0))
+    assert 'a' not in store and 'b' in store and 'c' in store
+    assert store.evictions == 1
+
+    # Una voce appena letta diventa la più recente
+    _age(store, 'b', 3_000)
+    _age(store, 'c', 4_000)
+    store.get('b')
+    store.put('d', _arrays(4.0))
+    assert 'b' in store and 'c' not in store and 'd' in store
+
+    # Anche con un limite più piccolo della voce stessa, put() non la espelle mai
+    store.max_bytes = entry_bytes + 1
+    _age(store, 'b', 5_000)
+    _age(store, 'd', 6_000)
+    store.put('e', _arrays(5.0))
+    assert 'e' in store and store.info()['entries'] == 1
+
+
+def test_oversized_entry_is_rejected(tmp_path):
+    store = ResultStore(str(tmp_path), max_bytes=100)
+    assert store.put('grande', _arrays(1.0)) is None
+    assert 'grande' not in store
+    assert store.info()['rejected'] == 1
+    assert os.listdir(store.directory) == []
+
+
+def test_result_key_depends_on_study_params_and_inputs():
+    base = result_key('studio', (1e-12,), {'Ws': WS})
+    assert result_key('studio', (1e-12,), {'Ws': WS.copy()}) == base
+    assert result_key('altro', (1e-12,), {'Ws': WS}) != base
+    assert result_key('studio', (1e-10,), {'Ws': WS}) != base
+    assert result_key('studio', (1e-12,), {'Ws': WS[:-1]}) != base
+
+
+def test_study_reads_back_from_store(tmp_path):
+    store = ResultStore(str(tmp_path))
+    analysis = AdvancedAnalysis(result_store=store)
+    first = analysis.parametric_study(WS, 5, 0.01)
+    assert (store.hits, store.misses) == (0, 1)
+    # Il metodo di integrazione non cambia la valutazione vettoriale: stessa voce
+    analysis.capture_model.integration_method = 'analytic'
+    again = analysis.parametric_study(WS, 5, 0.01)
+    assert (store.hits, store.misses) == (1, 1)
+    assert again == first
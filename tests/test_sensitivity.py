@@ -0,0 +1,61 @@
+"""Indici di Sobol: stimatori su funzioni con indici noti e analisi sul modello"""
+
+import numpy as np
+import pytest
+
+from equations import CarbonCaptureModel
+import sensitivity
+from sensitivity import saltelli_design, sobol_analysis, sobol_indices
+
+BOUNDS = {'x1': (-1.0, 1.0), 'x2': (-1.0, 1.0), 'x3': (-1.0, 1.0)}
+
+
+def _indices(function, n_base=20_000):
+    A, B, AB = saltelli_design(BOUNDS, n_base, seed=1)
+    return sobol_indices(function(A), function(B), function(AB))
+
+
+def test_additive_linear_function():
+    # Y = Σ a_i x_i con x_i uniformi e indipendenti: S1_i = ST_i = a_i² / Σ a_j²
+    a = np.array([1.0, 2.0, 3.0])
+    S1, ST = _indices(lambda X: X @ a)
+    expected = a ** 2 / np.sum(a ** 2)
+    np.testing.assert_allclose(S1, expected, atol=0.03)
+    np.testing.assert_allclose(ST, expected, atol=0.03)
+
+
+def test_pure_interaction():
+    # Y = x1 · x2: nessun effetto del primo ordine, varianza tutta nell'interazione; x3 inerte
+    S1, ST = _indices(lambda X: X[..., 0] * X[..., 1])
+    np.testing.assert_allclose(S1, 0.0, atol=0.03)
+    np.testing.assert_allclose(ST, [1.0, 1.0, 0.0], atol=0.03)
+
+
+def test_model_analysis():
+    model = CarbonCaptureModel(integration_method='analytic')
+    bounds = {'Ws_per_MW': (50.0, 400.0), 'FR_FCO2_ratio': (2.0, 20.0), 'j_kinetic': (0.5, 0.8)}
+    options = dict(n_base=256, operating_conditions={'F0_FCO2_ratio': 0.01}, seed=3, n_bootstrap=50,
+                   outputs=('efficiency',))
+    serial = sobol_analysis(model, bounds, **options)
+    assert serial['evaluations'] == 256 * 5 and serial['invalid'] == 0
+
+    # Stessi indici e intervalli con il pool e con il bootstrap diviso in più blocchi
+    pooled = sobol_analysis(model, bounds, n_workers=2, chunk_size=300, **options)
+    original = sensitivity.BOOTSTRAP_BLOCK_VALUES
+    sensitivity.BOOTSTRAP_BLOCK_VALUES = 256 * 5 * 7
+    try:
+        blocked = sobol_analysis(model, bounds, **options)
+    finally:
+        sensitivity.BOOTSTRAP_BLOCK_VALUES = original
+    indices = serial['indices']['efficiency']
+    for other in (pooled, blocked):
+        for key in ('S1', 'ST', 'S1_conf', 'ST_conf'):
+            np.testing.assert_array_equal(other['indices']['efficiency'][key], indices[key])
+    assert np.all(indices['S1_conf'][0] <= indices['S1_conf'][1])
+    assert sensitivity._worker_state is None
+
+
+def test_inadmissible_bounds_are_rejected():
+    with pytest.raises(ValueError):
+        sobol_analysis(CarbonCaptureModel(), {'Xr_kinetic': (0.0, 0.3)}, n_base=8,
+                       operating_conditions={'Ws_per_MW': 200, 'F0_FCO2_ratio': 0.01, 'FR_FCO2_ratio': 5})
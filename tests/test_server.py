@@ -0,0 +1,66 @@
+"""Server JSON lines: risposte uguali a capture_efficiency ed errori sulle richieste malformate"""
+
+import asyncio
+import json
+
+import pytest
+
+from equations import CarbonCaptureModel
+from server import CaptureClient, CaptureServer
+
+CONDITIONS = [
+    {'Ws_per_MW': 200.0, 'F0_FCO2_ratio': 0.01, 'FR_FCO2_ratio': 5.0},
+    {'Ws_per_MW': 50.0, 'F0_FCO2_ratio': 0.05, 'FR_FCO2_ratio': 10.0},
+]
+
+
+async def _with_server(function):
+    server = CaptureServer(CarbonCaptureModel(integration_method='analytic'))
+    host, port = await server.start(port=0)
+    try:
+        return await function(host, port)
+    finally:
+        await server.close()
+
+
+def test_server_matches_capture_efficiency():
+    async def run(host, port):
+        client = await CaptureClient.connect(host, port)
+        try:
+            return await client.capture_efficiency_many(CONDITIONS)
+        finally:
+            await client.close()
+
+    responses = asyncio.run(_with_server(run))
+    model = CarbonCaptureModel(integration_method='analytic')
+    for conditions, response in zip(CONDITIONS, responses):
+        assert 'error' not in response
+        expected = model.capture_efficiency(conditions)
+        # Il server valuta con capture_efficiency_batch: stessa tolleranza di test_array_api
+        for key in ('efficiency', 'efficiency_kinetic', 'efficiency_diffusion', 'residence_time_min',
+                    'average_conversion', 'active_fraction'):
+            assert response['result'][key] == pytest.approx(expected[key], rel=1e-12, abs=1e-10), key
+
+
+def test_server_reports_malformed_requests():
+    async def run(host, port):
+        reader, writer = await asyncio.open_connection(host, port)
+        lines = [b'non json\n', b'[1, 2]\n',
+                 b'{"id": 3, "Ws_per_MW": 200, "F0_FCO2_ratio": 0.01}\n',
+                 b'{"id": 4, "Ws_per_MW": "molto", "F0_FCO2_ratio": 0.01, "FR_FCO2_ratio": 5}\n',
+                 b'{"id": 5, "method": "sconosciuto"}\n']
+        writer.write(b''.join(lines))
+        await writer.drain()
+        responses = [json.loads(await reader.readline()) for _ in lines]
+        writer.close()
+        await writer.wait_closed()
+        return responses
+
+    responses = asyncio.run(_with_server(run))
+    assert all('error' in response and 'result' not in response for response in responses)
+    # Le righe che non sono oggetti JSON non hanno un id a cui rispondere
+    assert [response['id'] for response in responses].count(None) == 2
+    by_id = {response['id']: response['error'] for response in responses}
+    assert 'FR_FCO2_ratio' in by_id[3]
+    assert 'numeri' in by_id[4]
+    assert 'sconosciuto' in by_id[5]
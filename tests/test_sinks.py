@@ -0,0 +1,94 @@
+"""Scrittura a blocchi degli studi: ripresa dopo un'interruzione e rifiuto di studi diversi"""
+
+import csv
+
+import numpy as np
+import pytest
+
+from model import AdvancedAnalysis
+from parameters import ModelParameters
+from sinks import LinearGrid, NPZSink, _ChunkSink, _DirectorySink, open_sink, read_npz_chunks
+
+GRID = LinearGrid(10.0, 400.0, 50)
+CHUNK = 8
+
+
+class Interrupted(Exception):
+    pass
+
+
+def _interrupt_after(sink, n_chunks):
+    """Fa fallire la scrittura del blocco n_chunks + 1, come un processo interrotto"""
+    write = sink.write
+    written = []
+
+    def interrupted(chunk):
+        if len(written) == n_chunks:
+            raise Interrupted
+        written.append(chunk['offset'])
+        write(chunk)
+    sink.write = interrupted
+
+
+def _read(path, output_format):
+    if output_format == 'csv':
+        with open(path, newline='', encoding='utf-8') as f:
+            rows = list(csv.DictReader(f))
+        return {field: np.array([float(row[field]) for row in rows]) for field in rows[0]}
+    chunks = list(read_npz_chunks(path))
+    return {field: np.concatenate([chunk[field] for chunk in chunks]) for field in chunks[0] if field != 'offset'}
+
+
+@pytest.mark.parametrize('output_format', ['csv', 'npz'])
+def test_resume_after_interruption(tmp_path, output_format):
+    analysis = AdvancedAnalysis()
+    expected = analysis.parametric_study(GRID[:], 5, 0.01)
+    path = str(tmp_path / f'studio.{output_format}')
+
+    sink = open_sink(path, output_format)
+    _interrupt_after(sink, 3)
+    with pytest.raises(Interrupted), sink:
+        analysis.stream_parametric_study(GRID, 5, 0.01, sink, chunk_size=CHUNK)
+
+    # Dati di un blocco scritto a metà dopo l'ultimo salvataggio dell'avanzamento
+    if output_format == 'csv':
+        with open(path, 'a', encoding='utf-8') as f:
+            f.write('1.0,2.0,3.0,4.0\n')
+    else:
+        np.savez(str(tmp_path / 'studio.npz' / 'chunk_000000000000024.npz'), Ws_per_MW=np.zeros(3))
+
+    with open_sink(path, output_format) as sink:
+        assert sink.offset == 3 * CHUNK
+        assert analysis.stream_parametric_study(GRID, 5, 0.01, sink, chunk_size=CHUNK) == len(GRID)
+
+    result = _read(path, output_format)
+    np.testing.assert_array_equal(result['Ws_per_MW'], GRID[:])
+    np.testing.assert_allclose(result['efficiency'], expected['efficiency'], rtol=1e-15)
+
+
+@pytest.mark.parametrize('change', [{'FR_FCO2_ratio': 6}, {'Ws_range': LinearGrid(10.0, 500.0, 50)},
+                                    {'params': {'T0': 10}}])
+def test_refuses_to_resume_another_study(tmp_path, change):
+    path = str(tmp_path / 'studio')
+    with NPZSink(path) as sink:
+        _interrupt_after(sink, 2)
+        with pytest.raises(Interrupted):
+            AdvancedAnalysis().stream_parametric_study(GRID, 5, 0.01, sink, chunk_size=CHUNK)
+
+    analysis = AdvancedAnalysis(params=ModelParameters(**change.get('params', {})))
+    with NPZSink(path) as sink, pytest.raises(ValueError, match='studio diverso'):
+        analysis.stream_parametric_study(change.get('Ws_range', GRID), change.get('FR_FCO2_ratio', 5), 0.01,
+                                         sink, chunk_size=CHUNK)
+    # I blocchi già scritti restano intatti
+    assert [chunk['offset'] for chunk in read_npz_chunks(path)] == [0, CHUNK]
+
+
+def test_base_sinks_are_abstract(tmp_path):
+    with pytest.raises(TypeError):
+        _ChunkSink(str(tmp_path / 'progress.json'))
+
+    class Incomplete(_DirectorySink):
+        extension = '.bin'
+
+    with pytest.raises(TypeError):
+        Incomplete(str(tmp_path / 'incompleto'))
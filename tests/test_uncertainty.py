@@ -0,0 +1,87 @@
+"""Propagazione Monte Carlo: riproducibilità e statistiche in streaming"""
+
+import numpy as np
+import pytest
+
+from equations import CarbonCaptureModel
+import uncertainty
+from uncertainty import Normal, StreamingStatistics, Uniform, propagate_uncertainty
+
+CONDITIONS = [
+    {'Ws_per_MW': 200.0, 'F0_FCO2_ratio': 0.01, 'FR_FCO2_ratio': 5.0},
+    # FR/FCO2 alto: efficiency_diffusion, non limitata, supera 1
+    {'Ws_per_MW': 1000.0, 'F0_FCO2_ratio': 0.5, 'FR_FCO2_ratio': 40.0},
+]
+DISTRIBUTIONS = {
+    'j_kinetic': Normal(0.676, 0.05, low=0.1),
+    'X1_kinetic': Uniform(0.2, 0.24),
+    'T0': Normal(5, 0.5, low=1),
+}
+
+
+def _propagate(**options):
+    model = CarbonCaptureModel(integration_method='analytic')
+    return propagate_uncertainty(model, CONDITIONS, DISTRIBUTIONS, n_samples=2_000, batch_size=500,
+                                 seed=42, **options)
+
+
+def test_fixed_seed_is_independent_of_workers():
+    serial = _propagate()
+    pooled = _propagate(n_workers=2)
+    for quantity, stats in serial['statistics'].items():
+        for key in ('count', 'mean', 'std', 'min', 'max', 'histogram'):
+            np.testing.assert_array_equal(pooled['statistics'][quantity][key], stats[key],
+                                          err_msg=f'{quantity} {key}')
+        for q, values in stats['percentiles'].items():
+            np.testing.assert_array_equal(pooled['statistics'][quantity]['percentiles'][q], values)
+    # Il percorso seriale non lascia lo stato nel modulo
+    assert uncertainty._worker_state is None
+
+
+def test_statistics_match_samples():
+    result = _propagate()
+    # Stessi blocchi e generatori di propagate_uncertainty, ma con i campioni conservati
+    model = CarbonCaptureModel(integration_method='analytic')
+    values = {quantity: [] for quantity in uncertainty.QUANTITIES}
+    valid = []
+    for child, size in zip(np.random.SeedSequence(42).spawn(4), [500] * 4):
+        rng = np.random.default_rng(child)
+        samples = {name: d.sample(rng, size)[None, :] for name, d in DISTRIBUTIONS.items()}
+        batch = model.capture_efficiency_batch(
+            *(np.array([[c[key]] for c in CONDITIONS]) for key in ('Ws_per_MW', 'F0_FCO2_ratio', 'FR_FCO2_ratio')),
+            samples=samples)
+        valid.append(batch['valid'])
+        for quantity in values:
+            values[quantity].append(batch[quantity])
+    valid = np.concatenate(valid, axis=1)
+    assert valid.all()
+
+    assert np.concatenate(values['efficiency_diffusion'], axis=1)[1].min() > 1
+    for quantity, blocks in values.items():
+        samples = np.concatenate(blocks, axis=1)
+        stats = result['statistics'][quantity]
+        np.testing.assert_allclose(stats['mean'], samples.mean(axis=1), rtol=1e-12)
+        np.testing.assert_allclose(stats['std'], samples.std(axis=1, ddof=1), rtol=1e-9)
+        # Percentili entro un bin dell'istogramma, anche oltre 1 per le efficienze non limitate
+        width = np.diff(stats['bin_edges'], axis=-1)[..., 0]
+        for q, estimate in stats['percentiles'].items():
+            np.testing.assert_allclose(estimate, np.percentile(samples, q, axis=1), rtol=0, atol=2 * np.max(width))
+
+
+def test_streaming_statistics_merge_and_range():
+    rng = np.random.default_rng(0)
+    values = rng.uniform(0.0, 3.0, (2, 4000))
+    stats = StreamingStatistics(2, bins=300, value_range=(0.0, np.array([3.0, 1.0])))
+    stats.update(values[:, :1000])
+    stats.update(values[:, 1000:])
+    np.testing.assert_allclose(stats.mean, values.mean(axis=1), rtol=1e-12)
+    assert stats.bin_edges().shape == (2, 301)
+    # Primo punto: intervallo adeguato, percentili entro un bin
+    assert stats.percentiles([50])[0, 0] == pytest.approx(np.median(values[0]), abs=0.01)
+    # Secondo punto: i valori oltre high cadono nell'ultimo bin, il percentile resta nell'intervallo
+    assert stats.percentiles([90])[0, 1] <= 1.0
+
+
+def test_unknown_parameter_is_rejected():
+    with pytest.raises(ValueError):
+        propagate_uncertainty(CarbonCaptureModel(), CONDITIONS, {'ks': Uniform(1e-10, 1e-9)}, n_samples=10)